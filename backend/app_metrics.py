@@ -0,0 +1,311 @@
+"""
+Application Metrics in the Prometheus text format
+Request, outbound-call, database and background-job counters, gauges and histograms, aggregated across uvicorn workers
+"""
+
+import os
+import json
+import time
+import atexit
+import asyncio
+import tempfile
+import functools
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Histogram bucket upper bounds in seconds; everything slower lands in +Inf
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+EXTERNAL_CALL_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+DB_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+JOB_BUCKETS = (1, 5, 10, 30, 60, 120, 300, 600, 900, 1800, 3600)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class AppMetrics:
+    """
+    Every worker keeps its own counters, gauges and histograms in memory (one lock, no
+    I/O on the request path) and writes them as a JSON snapshot to
+    <directory>/<group>-<pid>.json every write_interval seconds and at exit. The group is
+    the parent pid, i.e. the uvicorn master, so snapshots of an earlier server run in the
+    same directory are ignored (and deleted once their master is gone).
+
+    render() - whichever worker serves the scrape - writes its own snapshot first, then
+    merges all snapshots of the group: counters and histograms are summed over every
+    worker that ever wrote one (a dead worker's requests still count), gauges only over
+    live workers. Other workers' values are at most write_interval seconds old.
+    """
+
+    def __init__(self, directory: Optional[str], write_interval: float = 5):
+        self.directory = directory
+        self.write_interval = write_interval
+        self._definitions: Dict[str, Tuple[str, str, Tuple[float, ...]]] = {}
+        self._counters: Dict[Tuple[str, LabelKey], float] = {}
+        self._gauges: Dict[Tuple[str, LabelKey], float] = {}
+        self._histograms: Dict[Tuple[str, LabelKey], List[float]] = {}
+        self._collectors: List[Callable[[], Iterable[Tuple[str, Dict[str, Any], float]]]] = []
+        self._lock = threading.Lock()
+        self._group = str(os.getppid())
+        self._path = None
+
+        if directory:
+            try:
+                os.makedirs(directory, exist_ok=True)
+                self._path = os.path.join(directory, f"{self._group}-{os.getpid()}.json")
+                self._remove_stale_snapshots()
+            except OSError as e:
+                print(f"⚠️ Metrics directory {directory} unusable, /metrics will cover this worker only: {e}")
+                self._path = None
+        if self._path and write_interval > 0:
+            threading.Thread(target=self._run, name="metrics-writer", daemon=True).start()
+            atexit.register(self.write_snapshot)
+
+    # ==================== Definitions ====================
+
+    def counter(self, name: str, help_text: str):
+        self._definitions[name] = ("counter", help_text, ())
+
+    def gauge(self, name: str, help_text: str):
+        self._definitions[name] = ("gauge", help_text, ())
+
+    def histogram(self, name: str, help_text: str, buckets: Tuple[float, ...]):
+        self._definitions[name] = ("histogram", help_text, tuple(buckets))
+
+    def add_collector(self, collect: Callable[[], Iterable[Tuple[str, Dict[str, Any], float]]]):
+        """collect() returns (gauge name, labels, value) samples; called on every snapshot (queue depths)"""
+        self._collectors.append(collect)
+
+    # ==================== Recording ====================
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def add(self, name: str, value: float, **labels):
+        """Move a gauge up or down (in-progress counts)"""
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._gauges[key] = self._gauges.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        bounds = self._definitions[name][2]
+        key = (name, _label_key(labels))
+        with self._lock:
+            # [count per bucket..., +Inf count, sum]
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [0] * (len(bounds) + 2)
+            histogram[_bucket_index(bounds, value)] += 1
+            histogram[-1] += value
+
+    @contextmanager
+    def in_progress(self, name: str, **labels):
+        self.add(name, 1, **labels)
+        try:
+            yield
+        finally:
+            self.add(name, -1, **labels)
+
+    def observe_external_call(self, span_name: str, seconds: float, error: bool = False):
+        """An outbound call finished; "hedra.create_generation" -> service "hedra", operation "create_generation" """
+        service, _, operation = span_name.partition(".")
+        self.observe("external_call_duration_seconds", seconds, service=service, operation=operation or service)
+        if error:
+            self.inc("external_call_errors_total", service=service, operation=operation or service)
+
+    # ==================== Snapshots ====================
+
+    def snapshot(self) -> Dict[str, Any]:
+        """This worker's values, JSON-serializable"""
+        gauges = []
+        for collect in self._collectors:
+            try:
+                gauges.extend([name, _label_key(labels), value] for name, labels, value in collect())
+            except Exception as e:
+                print(f"⚠️ Metrics collector failed: {e}")
+
+        with self._lock:
+            return {
+                "pid": os.getpid(),
+                "written_at": time.time(),
+                "counters": [[name, labels, value] for (name, labels), value in self._counters.items()],
+                "gauges": [[name, labels, value] for (name, labels), value in self._gauges.items()] + gauges,
+                "histograms": [[name, labels, list(values)] for (name, labels), values in self._histograms.items()],
+            }
+
+    def write_snapshot(self) -> Optional[Dict[str, Any]]:
+        snapshot = self.snapshot()
+        if self._path:
+            try:
+                with open(self._path + ".tmp", "w", encoding="utf-8") as f:
+                    json.dump(snapshot, f, separators=(",", ":"))
+                os.replace(self._path + ".tmp", self._path)
+            except OSError as e:
+                print(f"⚠️ Metrics snapshot write failed: {e}")
+        return snapshot
+
+    def render(self) -> str:
+        """All workers' metrics in the Prometheus text exposition format (version 0.0.4)"""
+        own = self.write_snapshot()
+        snapshots = [own]
+        if self._path:
+            for name in os.listdir(self.directory):
+                path = os.path.join(self.directory, name)
+                if path == self._path or not (name.startswith(f"{self._group}-") and name.endswith(".json")):
+                    continue
+                try:
+                    with open(path, encoding="utf-8") as f:
+                        snapshots.append(json.load(f))
+                except (OSError, ValueError):
+                    continue  # being replaced right now; picked up on the next scrape
+
+        counters: Dict[Tuple[str, LabelKey], float] = {}
+        gauges: Dict[Tuple[str, LabelKey], float] = {}
+        histograms: Dict[Tuple[str, LabelKey], List[float]] = {}
+        live_workers = 0
+        for snapshot in snapshots:
+            for name, labels, value in snapshot["counters"]:
+                key = (name, _as_key(labels))
+                counters[key] = counters.get(key, 0) + value
+            for name, labels, values in snapshot["histograms"]:
+                key = (name, _as_key(labels))
+                merged = histograms.get(key)
+                if merged is None or len(merged) != len(values):
+                    histograms[key] = list(values)
+                else:
+                    histograms[key] = [a + b for a, b in zip(merged, values)]
+            if snapshot is own or _pid_alive(snapshot["pid"]):
+                live_workers += 1
+                for name, labels, value in snapshot["gauges"]:
+                    key = (name, _as_key(labels))
+                    gauges[key] = gauges.get(key, 0) + value
+
+        gauges[("metrics_live_workers", ())] = live_workers
+        lines = []
+        for metric_name, (kind, help_text, bounds) in sorted(self._definitions.items()):
+            source = {"counter": counters, "gauge": gauges, "histogram": histograms}[kind]
+            samples = sorted((labels, value) for (name, labels), value in source.items() if name == metric_name)
+            lines.append(f"# HELP {metric_name} {help_text}")
+            lines.append(f"# TYPE {metric_name} {kind}")
+            for labels, value in samples:
+                if kind != "histogram":
+                    lines.append(f"{metric_name}{_format_labels(labels)} {_format_value(value)}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(list(bounds) + ["+Inf"], value[:-1]):
+                    cumulative += count
+                    le = bound if bound == "+Inf" else _format_value(bound)
+                    lines.append(f"{metric_name}_bucket{_format_labels(labels + (('le', le),))} {_format_value(cumulative)}")
+                lines.append(f"{metric_name}_sum{_format_labels(labels)} {_format_value(value[-1])}")
+                lines.append(f"{metric_name}_count{_format_labels(labels)} {_format_value(cumulative)}")
+        return "\n".join(lines) + "\n"
+
+    def _run(self):
+        while True:
+            time.sleep(self.write_interval)
+            self.write_snapshot()
+
+    def _remove_stale_snapshots(self):
+        """Snapshots written under a master that has exited belong to an earlier server run"""
+        for name in os.listdir(self.directory):
+            group = name.split("-", 1)[0]
+            if name.endswith((".json", ".tmp")) and group != self._group and not _pid_alive(group):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+
+def track_job(job: str):
+    """Decorator for background jobs (async or sync): in-progress gauge, outcome counter and duration histogram"""
+    def decorator(fn):
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with _job(job):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with _job(job):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def _job(job: str):
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        with app_metrics.in_progress("background_jobs_in_progress", job=job):
+            yield
+        outcome = "success"
+    finally:
+        app_metrics.inc("background_jobs_total", job=job, outcome=outcome)
+        app_metrics.observe("background_job_duration_seconds", time.perf_counter() - start, job=job)
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _as_key(labels: List[List[str]]) -> LabelKey:
+    return tuple((key, value) for key, value in labels)
+
+
+def _bucket_index(bounds: Tuple[float, ...], value: float) -> int:
+    for index, bound in enumerate(bounds):
+        if value <= bound:
+            return index
+    return len(bounds)
+
+
+def _format_labels(labels: LabelKey) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(
+        f'{key}="' + value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"' for key, value in labels
+    ) + "}"
+
+
+def _format_value(value: float) -> str:
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _pid_alive(pid: Any) -> bool:
+    try:
+        os.kill(int(pid), 0)
+    except (ValueError, ProcessLookupError):
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+# Global instance; METRICS_DIR must be shared by all workers of one server (empty = this worker only)
+app_metrics = AppMetrics(
+    os.getenv("METRICS_DIR", os.path.join(tempfile.gettempdir(), "audiencelab-metrics")) or None,
+    write_interval=float(os.getenv("METRICS_WRITE_SECONDS", "5"))
+)
+
+app_metrics.counter("http_requests_total", "HTTP requests by method, route template and status code")
+app_metrics.histogram("http_request_duration_seconds", "HTTP request latency by method and route template", HTTP_BUCKETS)
+app_metrics.gauge("http_requests_in_progress", "HTTP requests being served, by method and route template")
+app_metrics.histogram("external_call_duration_seconds", "Claude, ElevenLabs, Hedra and S3 call latency by service and operation", EXTERNAL_CALL_BUCKETS)
+app_metrics.counter("external_call_errors_total", "Failed Claude, ElevenLabs, Hedra and S3 calls by service and operation")
+app_metrics.histogram("db_query_duration_seconds", "Database query latency by table and operation", DB_BUCKETS)
+app_metrics.counter("db_query_errors_total", "Failed database queries by table and operation")
+app_metrics.gauge("background_jobs_in_progress", "Background jobs running, by job")
+app_metrics.counter("background_jobs_total", "Finished background jobs by job and outcome")
+app_metrics.histogram("background_job_duration_seconds", "Background job duration by job", JOB_BUCKETS)
+app_metrics.gauge("background_queue_depth", "Items waiting in in-process background queues, by queue")
+app_metrics.gauge("metrics_live_workers", "Worker processes whose gauges are included in this scrape")
@@ -1,10 +1,17 @@
 # Shared authentication module for AudienceLab
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from supabase import create_client, Client
+from supabase import Client
+from typing import Optional
 from jose import jwt
 import os
+import hmac
+import asyncio
 from dotenv import load_dotenv
+from query_metrics import query_metrics
+from supabase_client import get_supabase_client
+from token_cache import TokenCache, token_hash
+from singleflight import SingleFlight
 
 # Load environment variables
 load_dotenv()
@@ -22,7 +29,7 @@ try:
         print("⚠️  Warning: Supabase environment variables not found")
         print("   Please check your .env file and ensure all Supabase variables are set")
     else:
-        supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+        supabase = get_supabase_client()
         print("✅ Supabase client initialized successfully")
 except Exception as e:
     print(f"❌ Failed to initialize Supabase client: {e}")
@@ -33,6 +40,29 @@ except Exception as e:
 # Security
 security = HTTPBearer()
 
+# "local": a token whose signature and claims verify is trusted until it expires; the user
+# profile is fetched once per token and cached. "remote": ask Supabase on every request.
+AUTH_VERIFY_MODE = os.getenv("AUTH_VERIFY_MODE", "local").lower()
+
+# Cached tokens are re-checked with Supabase at this interval so revoked sessions drop out (0 = off).
+# Only tokens used since their last check are re-checked, at most BATCH per round, CONCURRENCY at a time
+AUTH_REVOCATION_CHECK_SECONDS = float(os.getenv("AUTH_REVOCATION_CHECK_SECONDS", "300"))
+AUTH_REVOCATION_CHECK_BATCH = int(os.getenv("AUTH_REVOCATION_CHECK_BATCH", "200"))
+AUTH_REVOCATION_CHECK_CONCURRENCY = int(os.getenv("AUTH_REVOCATION_CHECK_CONCURRENCY", "8"))
+
+token_cache = TokenCache(
+    max_entries=int(os.getenv("AUTH_TOKEN_CACHE_MAX_ENTRIES", "4096")),
+    max_ttl_seconds=float(os.getenv("AUTH_TOKEN_CACHE_MAX_TTL_SECONDS", "0"))
+)
+
+# Parallel requests carrying the same token share one verification
+token_flights = SingleFlight("verify_token")
+
+# The /metrics endpoints are scraped with METRICS_TOKEN; users whose email is listed in
+# METRICS_ADMIN_EMAILS may also read them with their normal session token
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+METRICS_ADMIN_EMAILS = {email.strip().lower() for email in os.getenv("METRICS_ADMIN_EMAILS", "").split(",") if email.strip()}
+
 # Authentication dependency
 async def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
     """Verify Supabase JWT token"""
@@ -53,6 +83,28 @@ async def verify_token(credentials: HTTPAuthorizationCredentials = Depends(secur
             detail="Authentication service not available. Use development mode or configure Supabase."
         )
     
+    if AUTH_VERIFY_MODE == "local":
+        cached_user = token_cache.get(token)
+        if cached_user:
+            return cached_user
+    
+    return await token_flights.do(token_hash(token), lambda: _verify_with_supabase(token))
+
+async def verify_metrics_access(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """Allow the metrics scraper token or a signed-in metrics admin"""
+    if METRICS_TOKEN and hmac.compare_digest(credentials.credentials.encode(), METRICS_TOKEN.encode()):
+        return {"metrics_token": True}
+
+    user = await verify_token(credentials)
+    if (user.get("email") or "").lower() not in METRICS_ADMIN_EMAILS:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Metrics access requires an admin account"
+        )
+    return user
+
+async def _verify_with_supabase(token: str):
+    """Decode the JWT and fetch its user from Supabase"""
     try:
         # Verify JWT token with Supabase secret
         payload = jwt.decode(
@@ -69,8 +121,10 @@ async def verify_token(credentials: HTTPAuthorizationCredentials = Depends(secur
                 detail="Invalid token"
             )
         
-        # Get user from Supabase
-        response = supabase.auth.get_user(token)
+        # Get user from Supabase (off the event loop)
+        response = await asyncio.to_thread(
+            query_metrics.run, "auth.users", "get_user", lambda: supabase.auth.get_user(token), "verify_token"
+        )
         if not response.user:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -78,12 +132,15 @@ async def verify_token(credentials: HTTPAuthorizationCredentials = Depends(secur
             )
         
         # Return user data in the format expected by all routes
-        return {
+        user = {
             "id": response.user.id,  # Facebook routes expect 'id' field
             "user_id": response.user.id,  # Keep for backward compatibility
             "email": response.user.email,
             "created_at": str(response.user.created_at) if response.user.created_at else None
         }
+        if AUTH_VERIFY_MODE == "local":
+            token_cache.put(token, user, payload.get("exp"))
+        return user
         
     except jwt.ExpiredSignatureError:
         raise HTTPException(
@@ -102,6 +159,41 @@ async def verify_token(credentials: HTTPAuthorizationCredentials = Depends(secur
             detail="Authentication failed"
         )
 
+async def check_revoked_tokens():
+    """Re-validate recently used cached tokens with Supabase; drop the ones it rejects (signed out, deleted users)"""
+    token_cache.prune()
+    semaphore = asyncio.Semaphore(max(1, AUTH_REVOCATION_CHECK_CONCURRENCY))
+
+    async def check(token: str):
+        async with semaphore:
+            try:
+                response = await asyncio.to_thread(
+                    query_metrics.run, "auth.users", "get_user", lambda: supabase.auth.get_user(token), "revocation_check"
+                )
+                if not response.user:
+                    token_cache.revoke(token)
+            except Exception as e:
+                # Keep the entry on network errors; only an explicit rejection revokes it
+                if getattr(e, "status", None) in (401, 403, 404):
+                    token_cache.revoke(token)
+
+    await asyncio.gather(*(check(token) for token in token_cache.claim_for_check(AUTH_REVOCATION_CHECK_BATCH)))
+
+async def run_revocation_checks():
+    """Background loop started by the application (local verification mode only)"""
+    while True:
+        await asyncio.sleep(AUTH_REVOCATION_CHECK_SECONDS)
+        try:
+            await check_revoked_tokens()
+        except Exception as e:
+            print(f"⚠️ Token revocation check failed: {e}")
+
+def start_revocation_checks() -> Optional[asyncio.Task]:
+    """Start the revocation loop when it applies; returns the task so shutdown can cancel it"""
+    if AUTH_VERIFY_MODE != "local" or AUTH_REVOCATION_CHECK_SECONDS <= 0 or not supabase:
+        return None
+    return asyncio.create_task(run_revocation_checks())
+
 # Alias for compatibility with existing routes
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     """Get current authenticated user - alias for verify_token for consistency"""
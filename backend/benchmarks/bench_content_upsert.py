@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Content write micro-benchmark
+Compares the read-then-write content save with the single upsert_v3_campaign_content call
+
+Usage (from backend/, against a database with migrations/001 applied):
+    python benchmarks/bench_content_upsert.py --user-id <existing user id> --iterations 50
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from video_ads_v3_database_service import v3_db_service, CAMPAIGNS_TABLE, CONTENT_TABLE  # noqa: E402
+
+
+class RoundTripCounter:
+    """Counts backend calls made through v3_db_service.backend"""
+
+    METHODS = ("select", "insert", "update", "upsert", "delete", "rpc")
+
+    def __init__(self, backend):
+        self.count = 0
+        for name in self.METHODS:
+            setattr(self, name, self._wrap(getattr(backend, name)))
+
+    def _wrap(self, method):
+        async def counted(*args, **kwargs):
+            self.count += 1
+            return await method(*args, **kwargs)
+        return counted
+
+
+async def time_writes(label: str, write, campaign_id: str, iterations: int, counter: RoundTripCounter):
+    timings = []
+    counter.count = 0
+    for i in range(iterations):
+        payload = {"product_data": {"name": f"Benchmark product {i}", "description": "x" * 2000}}
+        start = time.perf_counter()
+        ok = await write(campaign_id, payload, current_step=2)
+        timings.append((time.perf_counter() - start) * 1000)
+        if not ok:
+            raise RuntimeError(f"{label} write failed on iteration {i}")
+
+    timings.sort()
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    print(f"{label:<22} mean={statistics.mean(timings):8.2f}ms  p50={statistics.median(timings):8.2f}ms  "
+          f"p95={p95:8.2f}ms  round trips/write={counter.count / iterations:.1f}")
+    return statistics.median(timings)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--user-id", required=True, help="User that owns the scratch campaign")
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    if not v3_db_service.available:
+        print("❌ No database configured (SUPABASE_URL / DATABASE_URL)")
+        return
+
+    backend = v3_db_service.backend
+    counter = RoundTripCounter(backend)
+    v3_db_service.backend = counter
+
+    campaign = await v3_db_service.create_campaign(args.user_id, campaign_name="content upsert benchmark")
+    campaign_id = campaign["campaign_id"]
+    print(f"📊 {backend.name} backend, {args.iterations} writes each, scratch campaign {campaign_id}")
+
+    try:
+        # Warm up connections and plans for both paths
+        await v3_db_service._upsert_content_legacy(campaign_id, {"product_data": {}}, current_step=2)
+        await v3_db_service._upsert_content(campaign_id, {"product_data": {}}, current_step=2)
+        if not v3_db_service._content_upsert_rpc:
+            print("❌ upsert_v3_campaign_content is not installed; apply migrations/001 first")
+            return
+
+        legacy = await time_writes("read-then-write", v3_db_service._upsert_content_legacy, campaign_id, args.iterations, counter)
+        upsert = await time_writes("single upsert", v3_db_service._upsert_content, campaign_id, args.iterations, counter)
+        print(f"✅ median latency reduced {(1 - upsert / legacy) * 100:.0f}% ({legacy:.2f}ms -> {upsert:.2f}ms)")
+    finally:
+        v3_db_service.backend = backend
+        await backend.delete(CONTENT_TABLE, {"campaign_id": campaign_id})
+        await backend.delete(CAMPAIGNS_TABLE, {"campaign_id": campaign_id})
+        await backend.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
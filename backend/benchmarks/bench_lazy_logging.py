@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Lazy log argument micro-benchmark
+Cost of a disabled DEBUG event with an eagerly formatted payload versus a Lazy argument
+
+Usage (from backend/, no database needed):
+    python benchmarks/bench_lazy_logging.py --iterations 2000
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["ENABLE_DB_LOGGING"] = "false"
+os.environ["LOG_LEVEL"] = "INFO"
+
+from logging_service import logger, Lazy  # noqa: E402
+
+
+def sample_angles(count: int):
+    """Roughly the shape generate_hooks logs: angles with their selected hooks"""
+    return [
+        {
+            "angle_id": f"angle_{i}",
+            "angle": f"Angle {i}: " + "benefit-driven positioning " * 8,
+            "category": "positive" if i % 2 else "negative",
+            "hooks": [{"hook_id": f"hook_{i}_{j}", "text": "Stop scrolling if you " + "x" * 120} for j in range(6)],
+        }
+        for i in range(count)
+    ]
+
+
+def per_call_us(fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--angles", type=int, default=10)
+    args = parser.parse_args()
+
+    angles_data = sample_angles(args.angles)
+    print(f"📊 DEBUG disabled (LOG_LEVEL=INFO), payload {len(json.dumps(angles_data)) // 1024}KB, {args.iterations} calls each")
+
+    eager = per_call_us(lambda: logger.debug("bench.angles", f"Angles data: {json.dumps(angles_data, indent=2)}"), args.iterations)
+    lazy = per_call_us(lambda: logger.debug("bench.angles", Lazy(json.dumps, angles_data, indent=2)), args.iterations)
+    deferred = per_call_us(lambda: logger.debug("bench.angles", Lazy(lambda: f"Angles data: {json.dumps(angles_data, indent=2)}")), args.iterations)
+
+    print(f"{'eager f-string':<16} {eager:10.2f}us/call")
+    print(f"{'Lazy(...)':<16} {lazy:10.2f}us/call")
+    print(f"{'Lazy(lambda)':<16} {deferred:10.2f}us/call")
+    print(f"✅ disabled-event cost reduced {eager / max(deferred, 1e-9):.0f}x ({eager:.2f}us -> {deferred:.2f}us)")
+
+
+if __name__ == "__main__":
+    main()
@@ -34,8 +34,11 @@ class CampaignV3Manager:
         if not campaign:
             return None
         
-        # Get campaign content
-        content = await self.db.get_campaign_content(campaign_id)
+        # Get campaign content (everything the state uses except the audio/video payloads)
+        content = await self.db.get_campaign_content(campaign_id, fields=[
+            "product_data", "avatar_analysis", "journey_mapping", "objections_analysis",
+            "angles", "hooks", "scripts", "selected_angles", "selected_hooks"
+        ])
         
         # Build state object similar to old workflow manager
         state = {
@@ -84,12 +87,14 @@ class CampaignV3Manager:
     
     async def get_product_info(self, campaign_id: str) -> Optional[Dict[str, Any]]:
         """Get product info for a campaign"""
-        content = await self.db.get_campaign_content(campaign_id)
+        content = await self.db.get_campaign_content(campaign_id, fields=["product_data"])
         return content.get("product_data") if content else None
     
     async def get_marketing_analysis(self, campaign_id: str) -> Optional[Dict[str, Any]]:
         """Get marketing analysis for a campaign"""
-        content = await self.db.get_campaign_content(campaign_id)
+        content = await self.db.get_campaign_content(
+            campaign_id, fields=["avatar_analysis", "journey_mapping", "objections_analysis", "angles"]
+        )
         
         if not content:
             return None
@@ -103,27 +108,31 @@ class CampaignV3Manager:
     
     async def get_angles(self, campaign_id: str) -> Optional[List[Any]]:
         """Get angles for a campaign"""
-        content = await self.db.get_campaign_content(campaign_id)
+        content = await self.db.get_campaign_content(campaign_id, fields=["angles"])
         return content.get("angles") if content else None
     
     async def get_hooks(self, campaign_id: str) -> Optional[List[Any]]:
         """Get hooks for a campaign"""
-        content = await self.db.get_campaign_content(campaign_id)
+        content = await self.db.get_campaign_content(campaign_id, fields=["hooks"])
         return content.get("hooks") if content else None
     
     async def get_scripts(self, campaign_id: str) -> Optional[List[Any]]:
         """Get scripts for a campaign"""
-        content = await self.db.get_campaign_content(campaign_id)
+        content = await self.db.get_campaign_content(campaign_id, fields=["scripts"])
         return content.get("scripts") if content else None
     
+    async def get_selected_scripts(self, campaign_id: str) -> List[Dict[str, Any]]:
+        """Get only the selected scripts of a campaign, without loading the scripts document"""
+        return await self.db.get_selected_script_items(campaign_id)
+    
     async def get_selected_angles(self, campaign_id: str) -> Optional[List[Any]]:
         """Get selected angles for a campaign"""
-        content = await self.db.get_campaign_content(campaign_id)
+        content = await self.db.get_campaign_content(campaign_id, fields=["selected_angles"])
         return content.get("selected_angles") if content else None
     
     async def get_selected_hooks(self, campaign_id: str) -> Optional[List[Any]]:
         """Get selected hooks for a campaign"""
-        content = await self.db.get_campaign_content(campaign_id)
+        content = await self.db.get_campaign_content(campaign_id, fields=["selected_hooks"])
         return content.get("selected_hooks") if content else None
     
     async def create_video_entry(self, campaign_id: str, video_data: Dict[str, Any]) -> Optional[str]:
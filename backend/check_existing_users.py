@@ -1,16 +1,12 @@
 #!/usr/bin/env python3
 """Check existing user IDs in campaigns"""
 
-import os
 from dotenv import load_dotenv
-from supabase import create_client
+from supabase_client import get_supabase_client
 
 load_dotenv()
 
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_ANON_KEY")
-
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+supabase = get_supabase_client()
 
 # Check existing campaigns for user IDs
 try:
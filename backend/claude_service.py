@@ -17,7 +17,9 @@ from video_ads_v2_models import (
     AnglesGeneration,
     MarketingAngleV2
 )
-from logging_service import logger
+from logging_service import logger, Lazy
+from request_context import trace_headers
+from tracing import tracer, traced, Tracer
 
 class ClaudeService:
     """Stateless service for Claude interactions"""
@@ -81,18 +83,23 @@ class ClaudeService:
             extra_headers = {}
             if documents and any(doc.get('type') == 'pdf' for doc in documents):
                 extra_headers = {"anthropic-beta": "pdfs-2024-09-25"}
+            extra_headers.update(trace_headers())
 
             # Send to Claude using the Anthropic client directly with timeout
             # Use 20-minute timeout (1200 seconds) for long-running requests
-            response = await asyncio.wait_for(
-                asyncio.to_thread(
-                    self.client.client.messages.create,
-                    **api_params,
-                    extra_headers=extra_headers if extra_headers else None,
-                    timeout=1200.0  # 20 minutes
-                ),
-                timeout=1200.0  # Also set asyncio timeout to 20 minutes
-            )
+            with tracer.span("claude.messages.create", kind=Tracer.CLIENT, model=model, max_tokens=max_tokens) as span:
+                response = await asyncio.wait_for(
+                    asyncio.to_thread(
+                        self.client.client.messages.create,
+                        **api_params,
+                        extra_headers=extra_headers if extra_headers else None,
+                        timeout=1200.0  # 20 minutes
+                    ),
+                    timeout=1200.0  # Also set asyncio timeout to 20 minutes
+                )
+                if hasattr(response, 'usage'):
+                    span.set_attributes(input_tokens=response.usage.input_tokens, output_tokens=response.usage.output_tokens,
+                                        stop_reason=getattr(response, 'stop_reason', None))
 
             # Log response metadata for debugging token usage and truncation
             if hasattr(response, 'usage') and hasattr(response, 'stop_reason'):
@@ -304,6 +311,7 @@ class ClaudeService:
         if missing:
             logger.warning("objections.missing_fields", f"Objections analysis missing {len(missing)} fields: {', '.join(missing[:5])}")
 
+    @traced("claude_service.avatar_analysis")
     async def generate_avatar_analysis(
         self,
         product_info: VideoAdsProductInfoV2,
@@ -396,12 +404,13 @@ Additional Information: {product_info.additional_information or 'None provided'}
                         f"Claude returned non-JSON response. Error: {e}",
                         response_preview=response[:500])
             # Log full response for debugging
-            logger.debug("claude_service.avatar.full_response", f"Full response: {response}")
+            logger.debug("claude_service.avatar.full_response", Lazy(lambda: f"Full response: {response}"))
             raise ValueError(f"Claude did not return valid JSON. Response started with: {response[:100]}...")
         except Exception as e:
             logger.error("claude_service.avatar.parse_error", f"Error parsing avatar analysis: {e}")
             raise
     
+    @traced("claude_service.journey_mapping")
     async def generate_journey_mapping(
         self,
         product_info: VideoAdsProductInfoV2,
@@ -464,6 +473,7 @@ AVATAR ANALYSIS:
             logger.error("claude_service.journey.parse_error", f"Error parsing journey mapping: {e}")
             raise
     
+    @traced("claude_service.objections_analysis")
     async def generate_objections_analysis(
         self,
         product_info: VideoAdsProductInfoV2,
@@ -530,6 +540,7 @@ JOURNEY MAPPING:
             logger.error("claude_service.objections.parse_error", f"Error parsing objections: {e}")
             raise
     
+    @traced("claude_service.angles")
     async def generate_angles(
         self,
         product_info: VideoAdsProductInfoV2,
@@ -626,6 +637,7 @@ OBJECTIONS ANALYSIS:
             logger.error("claude_service.angles.parse_error", f"Error parsing angles: {e}")
             raise
     
+    @traced("claude_service.hooks")
     async def generate_hooks(
         self,
         product_info: VideoAdsProductInfoV2,
@@ -701,7 +713,7 @@ OBJECTIONS ANALYSIS:
 
         # Debug logging
         logger.info(f"claude_service.hooks.angles_count", f"Building prompt for {len(angles_data)} angles")
-        logger.debug(f"claude_service.hooks.angles_data", f"Angles data: {json.dumps(angles_data, indent=2)}")
+        logger.debug(f"claude_service.hooks.angles_data", Lazy(lambda: f"Angles data: {json.dumps(angles_data, indent=2)}"))
 
         # Add product and angles context
         angles_section = f"""
@@ -717,7 +729,7 @@ SELECTED MARKETING ANGLES:
         prompt_parts.append(angles_section)
 
         # Log a sample to verify it's being added
-        logger.debug(f"claude_service.hooks.angles_section_sample", f"Angles section (first 500 chars): {angles_section[:500]}")
+        logger.debug(f"claude_service.hooks.angles_section_sample", Lazy(lambda: f"Angles section (first 500 chars): {angles_section[:500]}"))
         
         # Add optional context if available
         if avatar_analysis:
@@ -741,7 +753,7 @@ Core Values: {avatar_analysis.psychographic_factors.core_values}
 
         # Debug logging for final prompt
         logger.info(f"claude_service.hooks.prompt_length", f"Final prompt length: {len(user_prompt)} characters")
-        logger.debug(f"claude_service.hooks.prompt_sample", f"Final prompt (last 1000 chars): {user_prompt[-1000:]}")
+        logger.debug(f"claude_service.hooks.prompt_sample", Lazy(lambda: f"Final prompt (last 1000 chars): {user_prompt[-1000:]}"))
 
         # Send to Claude with increased token limit for all hooks
         # Using Claude Haiku 4.5 for fast hook generation
@@ -760,7 +772,7 @@ Core Values: {avatar_analysis.psychographic_factors.core_values}
 
             # Debug logging
             logger.info(f"claude_service.hooks.response_keys", f"Response keys: {list(response_data.keys())}")
-            logger.debug(f"claude_service.hooks.response_sample", f"Response sample: {str(response_data)[:500]}")
+            logger.debug(f"claude_service.hooks.response_sample", Lazy(lambda: f"Response sample: {str(response_data)[:500]}"))
 
             hooks_by_angle = response_data.get("hooks_by_angle", [])
             logger.info(f"claude_service.hooks.angles_returned", f"Claude returned hooks for {len(hooks_by_angle)} angles")
@@ -819,6 +831,7 @@ Core Values: {avatar_analysis.psychographic_factors.core_values}
             # Return empty list instead of raising to see what happens
             return []
     
+    @traced("claude_service.scripts")
     async def generate_scripts(
         self,
         product_info: VideoAdsProductInfoV2,
@@ -8,6 +8,8 @@ import anthropic
 from pathlib import Path
 import yaml
 from logging_service import logger
+from request_context import trace_headers
+from tracing import tracer, Tracer
 
 class ClaudeV2Client:
     """Claude API client for v2 video ads workflow"""
@@ -290,13 +292,15 @@ class ClaudeV2Conversation:
             extra_headers = {}
             if documents and any(doc.get('type') == 'pdf' for doc in documents):
                 extra_headers = {"anthropic-beta": "pdfs-2024-09-25"}
+            extra_headers.update(trace_headers())
 
             # Send to Claude
-            response = await asyncio.to_thread(
-                self.client.client.messages.create,
-                **api_params,
-                extra_headers=extra_headers if extra_headers else None
-            )
+            with tracer.span("claude.messages.create", kind=Tracer.CLIENT, model=api_params.get("model")):
+                response = await asyncio.to_thread(
+                    self.client.client.messages.create,
+                    **api_params,
+                    extra_headers=extra_headers if extra_headers else None
+                )
             
             # Extract response content
             response_content = response.content[0].text
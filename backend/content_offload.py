@@ -0,0 +1,152 @@
+"""
+Content Offload for large JSON columns
+Stores oversized values compressed in S3 under their content hash and keeps a pointer in the row
+"""
+
+import gzip
+import json
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from logging_service import logger
+
+try:
+    import zstandard
+except ImportError:  # optional; gzip is used without it
+    zstandard = None
+
+POINTER_KEY = "$offload"
+
+
+def is_offloaded(value: Any) -> bool:
+    """Whether a column value is an offload pointer rather than the content itself"""
+    return isinstance(value, dict) and POINTER_KEY in value
+
+
+def summarize(value: Any) -> Dict[str, Any]:
+    """Small description kept in the row next to the pointer"""
+    if isinstance(value, dict):
+        return {"type": "object", "keys": list(value)[:20], "size": len(value)}
+    if isinstance(value, list):
+        return {"type": "array", "size": len(value)}
+    return {"type": type(value).__name__}
+
+
+class ContentOffloader:
+    """
+    Values whose JSON is at least threshold_bytes are compressed (zstd when installed,
+    otherwise gzip) and written to S3 as <prefix>/<sha256>.json.<ext>; identical content
+    is stored once and shared, e.g. by forked campaigns. Decompressed blobs are kept in
+    an LRU bounded by cache_max_bytes; each read parses its own copy.
+    """
+
+    def __init__(self, s3, threshold_bytes: int = 64 * 1024, compression: str = "zstd",
+                 prefix: str = "content/v3", cache_max_bytes: int = 64 * 1024 * 1024):
+        self.s3 = s3
+        self.threshold_bytes = threshold_bytes
+        self.compression = compression if compression != "zstd" or zstandard is not None else "gzip"
+        self.prefix = prefix.rstrip("/")
+        self.cache_max_bytes = cache_max_bytes
+        self._blobs: "OrderedDict[str, bytes]" = OrderedDict()
+        self._cached_bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {"offloaded": 0, "inline": 0, "cache_hits": 0, "downloads": 0, "upload_errors": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold_bytes > 0 and bool(getattr(self.s3, "enabled", False))
+
+    async def offload(self, value: Any) -> Any:
+        """Return a pointer for large values (after uploading them), the value itself otherwise"""
+        if not self.enabled or value is None or is_offloaded(value):
+            return value
+
+        raw = json.dumps(value, sort_keys=True, separators=(",", ":"), default=str).encode()
+        if len(raw) < self.threshold_bytes:
+            self.stats["inline"] += 1
+            return value
+
+        digest = hashlib.sha256(raw).hexdigest()
+        extension = "zst" if self.compression == "zstd" else "gz"
+        key = f"{self.prefix}/{digest}.json.{extension}"
+
+        # Content-addressed: a blob we already hold was uploaded earlier
+        if not self._cache_get(digest):
+            compressed = await asyncio.to_thread(self._compress, raw)
+            url = await asyncio.to_thread(self.s3.upload_file_from_bytes, compressed, key, "application/octet-stream")
+            if not url:
+                # Keep the value inline rather than lose it
+                self.stats["upload_errors"] += 1
+                logger.warning("content_offload.upload_failed", f"Could not offload {len(raw)} bytes, storing inline",
+                               bytes=len(raw), key=key)
+                return value
+            self._cache_put(digest, raw)
+            stored = len(compressed)
+        else:
+            stored = None
+
+        self.stats["offloaded"] += 1
+        return {
+            POINTER_KEY: {
+                "key": key,
+                "sha256": digest,
+                "encoding": self.compression,
+                "bytes": len(raw),
+                "stored_bytes": stored,
+            },
+            "summary": summarize(value),
+        }
+
+    async def resolve(self, value: Any) -> Any:
+        """Return the content a pointer refers to; other values are returned unchanged"""
+        if not is_offloaded(value):
+            return value
+
+        pointer = value[POINTER_KEY]
+        raw = self._cache_get(pointer["sha256"])
+        if raw is not None:
+            self.stats["cache_hits"] += 1
+        else:
+            compressed = await asyncio.to_thread(self.s3.get_file_bytes, pointer["key"])
+            if compressed is None:
+                raise RuntimeError(f"Offloaded content not found: {pointer['key']}")
+            raw = await asyncio.to_thread(self._decompress, compressed, pointer.get("encoding", "gzip"))
+            self.stats["downloads"] += 1
+            self._cache_put(pointer["sha256"], raw)
+
+        return json.loads(raw)
+
+    def _compress(self, raw: bytes) -> bytes:
+        if self.compression == "zstd":
+            return zstandard.ZstdCompressor(level=10).compress(raw)
+        return gzip.compress(raw, compresslevel=6)
+
+    @staticmethod
+    def _decompress(data: bytes, encoding: str) -> bytes:
+        if encoding == "zstd":
+            if zstandard is None:
+                raise RuntimeError("zstandard is required to read zstd-compressed offloaded content")
+            return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+        return gzip.decompress(data)
+
+    def _cache_get(self, digest: str) -> Optional[bytes]:
+        with self._lock:
+            raw = self._blobs.get(digest)
+            if raw is not None:
+                self._blobs.move_to_end(digest)
+            return raw
+
+    def _cache_put(self, digest: str, raw: bytes):
+        if len(raw) > self.cache_max_bytes:
+            return
+        with self._lock:
+            if digest in self._blobs:
+                self._blobs.move_to_end(digest)
+                return
+            self._blobs[digest] = raw
+            self._cached_bytes += len(raw)
+            while self._cached_bytes > self.cache_max_bytes:
+                _, evicted = self._blobs.popitem(last=False)
+                self._cached_bytes -= len(evicted)
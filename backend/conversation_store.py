@@ -0,0 +1,326 @@
+"""
+Conversation State Store for the V2 workflow
+Bounded in-memory LRU with an optional SQLite tier shared by all workers on a host
+"""
+
+import os
+import json
+import time
+import zlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Callable, Iterator, Tuple
+from dotenv import load_dotenv
+from logging_service import logger
+
+load_dotenv()
+
+# Phases kept in ClaudeV2Conversation.context
+CONTEXT_PHASES = ("product_info", "avatar_analysis", "journey_mapping", "objections_analysis", "angles_generation")
+
+
+def compact_context(context: Dict[str, Any]) -> Dict[str, Any]:
+    """Drop the empty phases of a ClaudeV2Conversation.context"""
+    return {phase: data for phase, data in (context or {}).items() if data}
+
+
+def restore_context(compact: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Inverse of compact_context, re-adding the empty phases"""
+    context = {phase: {} for phase in CONTEXT_PHASES}
+    if compact:
+        context.update(compact)
+    return context
+
+
+class LRUConversationCache:
+    """Thread-safe LRU bounded by entry count and time-to-live; items() keeps insertion order"""
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 3600):
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, int, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._sequence = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            expires_at, _, value = item
+            if expires_at <= time.time():
+                del self._entries[key]
+                self.evictions += 1
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Dict[str, Any]):
+        with self._lock:
+            existing = self._entries.get(key)
+            if existing is not None:
+                sequence = existing[1]
+            else:
+                self._sequence += 1
+                sequence = self._sequence
+            self._entries[key] = (time.time() + self.ttl_seconds, sequence, value)
+            self._entries.move_to_end(key)
+            self._prune_locked()
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            return self._entries.pop(key, None) is not None
+
+    def items(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """Live entries, oldest insertion first (reads don't reorder them)"""
+        with self._lock:
+            self._prune_locked()
+            entries = sorted(self._entries.items(), key=lambda item: item[1][1])
+            return [(key, value) for key, (_, _, value) in entries]
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._prune_locked()
+            return len(self._entries)
+
+    def _prune_locked(self):
+        now = time.time()
+        expired = [key for key, (expires_at, _, _) in self._entries.items() if expires_at <= now]
+        for key in expired:
+            del self._entries[key]
+        self.evictions += len(expired)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+
+class ConversationStore:
+    """
+    Drop-in replacement for the old active_conversations dict.
+
+    Entries have the shape {"conversation", "state", "analysis"}. The local LRU keeps
+    live objects; when a SQLite path is configured every write is also persisted so a
+    request landing on another worker can rehydrate the entry.
+    """
+
+    def __init__(
+        self,
+        conversation_factory: Callable[[], Any] = None,
+        max_entries: int = 256,
+        ttl_seconds: float = 3600,
+        sqlite_path: Optional[str] = None
+    ):
+        self.conversation_factory = conversation_factory
+        self.ttl_seconds = ttl_seconds
+        self.local = LRUConversationCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self.sqlite_path = sqlite_path
+        self._db_lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+
+        if sqlite_path:
+            try:
+                self._db = sqlite3.connect(sqlite_path, timeout=5.0, check_same_thread=False)
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute("PRAGMA synchronous=NORMAL")
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS conversations ("
+                    "conversation_id TEXT PRIMARY KEY, user_id TEXT, payload BLOB NOT NULL, "
+                    "expires_at REAL NOT NULL, updated_at REAL NOT NULL)"
+                )
+                self._db.execute("CREATE INDEX IF NOT EXISTS idx_conversations_expires ON conversations (expires_at)")
+                self._db.execute("CREATE INDEX IF NOT EXISTS idx_conversations_user ON conversations (user_id)")
+                self._db.commit()
+                self.purge_expired()
+                logger.info("conversation_store.sqlite.ready", f"Shared conversation store at {sqlite_path}")
+            except Exception as e:
+                logger.error("conversation_store.sqlite.init_failed", f"Falling back to memory-only store: {e}", error=str(e))
+                self._db = None
+
+    # ---------- dict-compatible API ----------
+
+    def get(self, conversation_id: str, default: Any = None) -> Optional[Dict[str, Any]]:
+        entry = self.local.get(conversation_id)
+        if entry is not None:
+            return entry
+
+        entry = self._load_shared(conversation_id)
+        if entry is None:
+            return default
+
+        self.local.set(conversation_id, entry)
+        return entry
+
+    def __getitem__(self, conversation_id: str) -> Dict[str, Any]:
+        entry = self.get(conversation_id)
+        if entry is None:
+            raise KeyError(conversation_id)
+        return entry
+
+    def __setitem__(self, conversation_id: str, entry: Dict[str, Any]):
+        self.local.set(conversation_id, entry)
+        self._save_shared(conversation_id, entry)
+
+    def __delitem__(self, conversation_id: str):
+        self.pop(conversation_id)
+
+    def __contains__(self, conversation_id: str) -> bool:
+        return self.get(conversation_id) is not None
+
+    def __len__(self) -> int:
+        if self._db is None:
+            return len(self.local)
+        with self._db_lock:
+            row = self._db.execute("SELECT COUNT(*) FROM conversations WHERE expires_at > ?", (time.time(),)).fetchone()
+        return row[0] if row else 0
+
+    def pop(self, conversation_id: str, default: Any = None) -> Optional[Dict[str, Any]]:
+        entry = self.get(conversation_id)
+        self.local.delete(conversation_id)
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute("DELETE FROM conversations WHERE conversation_id = ?", (conversation_id,))
+                self._db.commit()
+        return entry if entry is not None else default
+
+    def keys(self) -> List[str]:
+        if self._db is None:
+            return [conversation_id for conversation_id, _ in self.local.items()]
+        with self._db_lock:
+            rows = self._db.execute(
+                "SELECT conversation_id FROM conversations WHERE expires_at > ? ORDER BY rowid",
+                (time.time(),)
+            ).fetchall()
+        return [conversation_id for (conversation_id,) in rows]
+
+    def find_by_user(self, user_id: str) -> List[str]:
+        """Live conversation ids for a user, oldest first, without loading their payloads"""
+        if self._db is None:
+            return [
+                conversation_id for conversation_id, entry in self.local.items()
+                if getattr(entry.get("state"), "user_id", None) == user_id
+            ]
+        with self._db_lock:
+            rows = self._db.execute(
+                "SELECT conversation_id FROM conversations WHERE user_id = ? AND expires_at > ? ORDER BY rowid",
+                (user_id, time.time())
+            ).fetchall()
+        return [conversation_id for (conversation_id,) in rows]
+
+    def items(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Live entries, oldest first (matches the insertion order callers relied on)"""
+        if self._db is None:
+            return iter(self.local.items())
+        return self._iter_shared()
+
+    # ---------- shared tier ----------
+
+    def purge_expired(self) -> int:
+        """Drop expired rows from the shared tier, returns the number removed"""
+        if self._db is None:
+            return 0
+        with self._db_lock:
+            cursor = self._db.execute("DELETE FROM conversations WHERE expires_at <= ?", (time.time(),))
+            self._db.commit()
+            return cursor.rowcount
+
+    def _save_shared(self, conversation_id: str, entry: Dict[str, Any]):
+        if self._db is None:
+            return
+        try:
+            state = entry.get("state")
+            payload = self._pack_entry(entry)
+            now = time.time()
+            with self._db_lock:
+                # Upsert rather than INSERT OR REPLACE so the rowid (creation order) is kept
+                self._db.execute(
+                    "INSERT INTO conversations (conversation_id, user_id, payload, expires_at, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?) ON CONFLICT (conversation_id) DO UPDATE SET "
+                    "user_id = excluded.user_id, payload = excluded.payload, "
+                    "expires_at = excluded.expires_at, updated_at = excluded.updated_at",
+                    (conversation_id, getattr(state, "user_id", None), payload, now + self.ttl_seconds, now)
+                )
+                self._db.commit()
+        except Exception as e:
+            logger.error("conversation_store.save_failed", f"Could not persist conversation {conversation_id}: {e}", error=str(e))
+
+    def _load_shared(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        if self._db is None:
+            return None
+        try:
+            with self._db_lock:
+                row = self._db.execute(
+                    "SELECT payload FROM conversations WHERE conversation_id = ? AND expires_at > ?",
+                    (conversation_id, time.time())
+                ).fetchone()
+            return self._unpack_entry(row[0]) if row else None
+        except Exception as e:
+            logger.error("conversation_store.load_failed", f"Could not load conversation {conversation_id}: {e}", error=str(e))
+            return None
+
+    def _iter_shared(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        for conversation_id in self.keys():
+            entry = self.get(conversation_id)
+            if entry is not None:
+                yield conversation_id, entry
+
+    def _pack_entry(self, entry: Dict[str, Any]) -> bytes:
+        """Compact binary form: state and analysis JSON plus the non-empty conversation context"""
+        state = entry.get("state")
+        analysis = entry.get("analysis")
+        conversation = entry.get("conversation")
+
+        record = {
+            "state": state.model_dump(mode="json") if state is not None else None,
+            # The analysis is normally the same object as state.analysis; don't store it twice
+            "analysis": (
+                analysis.model_dump(mode="json")
+                if analysis is not None and analysis is not getattr(state, "analysis", None)
+                else None
+            ),
+            "context": compact_context(conversation.context) if conversation is not None else None
+        }
+        raw = json.dumps(record, separators=(",", ":"), ensure_ascii=False, default=str)
+        return zlib.compress(raw.encode("utf-8"), 6)
+
+    def _unpack_entry(self, payload: bytes) -> Dict[str, Any]:
+        from video_ads_v2_models import WorkflowStateV2, MarketingAnalysisV2
+
+        record = json.loads(zlib.decompress(payload).decode("utf-8"))
+        state = WorkflowStateV2.model_validate(record["state"]) if record.get("state") else None
+        if record.get("analysis"):
+            analysis = MarketingAnalysisV2.model_validate(record["analysis"])
+        else:
+            analysis = state.analysis if state else None
+
+        conversation = None
+        if record.get("context") is not None and self.conversation_factory:
+            # Message history is not shared; rehydrated conversations start a fresh thread
+            conversation = self.conversation_factory()
+            conversation.context = restore_context(record["context"])
+
+        return {"conversation": conversation, "state": state, "analysis": analysis}
+
+
+def create_conversation_store(conversation_factory: Callable[[], Any] = None) -> ConversationStore:
+    """Build a store from CONVERSATION_STORE_* environment settings"""
+    backend = os.getenv("CONVERSATION_STORE_BACKEND", "memory").lower()
+    max_entries = int(os.getenv("CONVERSATION_STORE_MAX_ENTRIES", "256"))
+    ttl_seconds = float(os.getenv("CONVERSATION_STORE_TTL_SECONDS", "21600"))
+
+    sqlite_path = None
+    if backend == "sqlite":
+        sqlite_path = os.getenv(
+            "CONVERSATION_STORE_SQLITE_PATH",
+            os.path.join(os.path.dirname(os.path.abspath(__file__)), "conversation_store.sqlite3")
+        )
+    elif backend != "memory":
+        logger.warning("conversation_store.backend.unknown", f"Unknown CONVERSATION_STORE_BACKEND '{backend}', using memory")
+
+    return ConversationStore(
+        conversation_factory=conversation_factory,
+        max_entries=max_entries,
+        ttl_seconds=ttl_seconds,
+        sqlite_path=sqlite_path
+    )
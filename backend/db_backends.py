@@ -0,0 +1,392 @@
+"""
+Database Backends for the Video Ads database services
+Async table primitives over either supabase-py (PostgREST) or an asyncpg connection pool
+"""
+
+import os
+import re
+import json
+import time
+import asyncio
+from typing import Optional, Dict, Any, List, Union, Iterable, Sequence
+from dotenv import load_dotenv
+from logging_service import logger
+from query_metrics import query_metrics
+
+load_dotenv()
+
+Row = Dict[str, Any]
+OrderBy = Union[str, List[str], None]
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+class SupabaseBackend:
+    """
+    Runs supabase-py query builders in a worker thread.
+
+    The client is synchronous; calling .execute() directly inside async routes blocks
+    the event loop for the whole HTTP round trip, so every call is pushed off-loop.
+    """
+
+    name = "supabase"
+
+    def __init__(self, client):
+        self.client = client
+
+    async def _run(self, table: str, operation: str, build):
+        # Caller is resolved on the loop; the timing (and result sizing) happens in the worker thread
+        caller = query_metrics.caller()
+        return await asyncio.to_thread(query_metrics.run, table, operation, lambda: build().execute(), caller)
+
+    async def select(
+        self,
+        table: str,
+        columns: str = "*",
+        filters: Optional[Dict[str, Any]] = None,
+        in_filters: Optional[Dict[str, Iterable[Any]]] = None,
+        order_by: OrderBy = None,
+        desc: bool = False,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        after: Optional[Sequence[Any]] = None
+    ) -> List[Row]:
+        def build():
+            query = self.client.table(table).select(columns)
+            for column, value in (filters or {}).items():
+                query = query.eq(column, value)
+            for column, values in (in_filters or {}).items():
+                query = query.in_(column, list(values))
+            if after is not None:
+                query = query.or_(_keyset_filter(_order_columns(order_by), after, desc))
+            for column in _order_columns(order_by):
+                query = query.order(column, desc=desc)
+            if limit is not None and offset is not None:
+                query = query.range(offset, offset + limit - 1)
+            elif limit is not None:
+                query = query.limit(limit)
+            return query
+
+        result = await self._run(table, "select", build)
+        return result.data or []
+
+    async def insert(self, table: str, rows: Union[Row, List[Row]]) -> List[Row]:
+        result = await self._run(table, "insert", lambda: self.client.table(table).insert(rows))
+        return result.data or []
+
+    async def update(self, table: str, values: Row, filters: Dict[str, Any]) -> List[Row]:
+        def build():
+            query = self.client.table(table).update(values)
+            for column, value in filters.items():
+                query = query.eq(column, value)
+            return query
+
+        result = await self._run(table, "update", build)
+        return result.data or []
+
+    async def upsert(self, table: str, rows: Union[Row, List[Row]], on_conflict: str) -> List[Row]:
+        result = await self._run(table, "upsert", lambda: self.client.table(table).upsert(rows, on_conflict=on_conflict))
+        return result.data or []
+
+    async def delete(self, table: str, filters: Dict[str, Any]) -> List[Row]:
+        def build():
+            query = self.client.table(table).delete()
+            for column, value in filters.items():
+                query = query.eq(column, value)
+            return query
+
+        result = await self._run(table, "delete", build)
+        return result.data or []
+
+    async def rpc(self, function: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        result = await self._run(function, "rpc", lambda: self.client.rpc(function, params or {}))
+        return result.data
+
+    async def close(self):
+        pass
+
+
+class AsyncpgBackend:
+    """
+    Talks to Postgres directly through an asyncpg pool.
+
+    Queries are generated with a stable shape per call site, so asyncpg's per-connection
+    statement cache turns them into prepared statements on first use. Rows come back in the same shape PostgREST returns
+    (uuid as str, timestamps as ISO strings, json as Python objects).
+    """
+
+    name = "asyncpg"
+
+    def __init__(
+        self,
+        dsn: str,
+        min_size: int = 2,
+        max_size: int = 10,
+        statement_cache_size: int = 256
+    ):
+        self.dsn = dsn
+        self.min_size = min_size
+        self.max_size = max_size
+        self.statement_cache_size = statement_cache_size
+        self._pool = None
+        self._pool_lock = asyncio.Lock()
+
+    async def pool(self):
+        if self._pool is None:
+            async with self._pool_lock:
+                if self._pool is None:
+                    import asyncpg
+
+                    self._pool = await asyncpg.create_pool(
+                        self.dsn,
+                        min_size=self.min_size,
+                        max_size=self.max_size,
+                        statement_cache_size=self.statement_cache_size,
+                        init=self._init_connection
+                    )
+                    logger.info("db.asyncpg.pool_ready", f"asyncpg pool ready (min={self.min_size}, max={self.max_size})",
+                                min_size=self.min_size, max_size=self.max_size)
+        return self._pool
+
+    async def _init_connection(self, conn):
+        for type_name in ("json", "jsonb"):
+            await conn.set_type_codec(type_name, encoder=_json_dumps, decoder=json.loads, schema="pg_catalog")
+        await conn.set_type_codec("uuid", encoder=str, decoder=str, schema="pg_catalog", format="text")
+        for type_name in ("timestamptz", "timestamp"):
+            await conn.set_type_codec(type_name, encoder=str, decoder=_pg_timestamp_to_iso, schema="pg_catalog", format="text")
+
+    async def fetch(self, sql: str, *args, table: str = "sql", operation: str = "fetch") -> List[Row]:
+        caller = query_metrics.caller()
+        start = time.perf_counter()
+        try:
+            pool = await self.pool()
+            async with pool.acquire() as conn:
+                records = await conn.fetch(sql, *args)
+        except Exception:
+            query_metrics.record(table, operation, (time.perf_counter() - start) * 1000, caller=caller, error=True)
+            raise
+        rows = [dict(record) for record in records]
+        query_metrics.record(table, operation, (time.perf_counter() - start) * 1000, data=rows, caller=caller)
+        return rows
+
+    async def select(
+        self,
+        table: str,
+        columns: str = "*",
+        filters: Optional[Dict[str, Any]] = None,
+        in_filters: Optional[Dict[str, Iterable[Any]]] = None,
+        order_by: OrderBy = None,
+        desc: bool = False,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        after: Optional[Sequence[Any]] = None
+    ) -> List[Row]:
+        sql, args = build_select_sql(table, columns, filters, in_filters, order_by, desc, limit, offset, after)
+        return await self.fetch(sql, *args, table=table, operation="select")
+
+    async def insert(self, table: str, rows: Union[Row, List[Row]]) -> List[Row]:
+        rows = [rows] if isinstance(rows, dict) else rows
+        if not rows:
+            return []
+        sql, args = build_insert_sql(table, rows)
+        return await self.fetch(sql, *args, table=table, operation="insert")
+
+    async def update(self, table: str, values: Row, filters: Dict[str, Any]) -> List[Row]:
+        assignments = []
+        args = []
+        for column, value in values.items():
+            args.append(value)
+            assignments.append(f"{_quote(column)} = ${len(args)}")
+        where, args = _where_clause(filters, None, args)
+        sql = f"UPDATE {_quote(table)} SET {', '.join(assignments)}{where} RETURNING *"
+        return await self.fetch(sql, *args, table=table, operation="update")
+
+    async def upsert(self, table: str, rows: Union[Row, List[Row]], on_conflict: str) -> List[Row]:
+        rows = [rows] if isinstance(rows, dict) else rows
+        if not rows:
+            return []
+        sql, args = build_insert_sql(table, rows, on_conflict=on_conflict)
+        return await self.fetch(sql, *args, table=table, operation="upsert")
+
+    async def delete(self, table: str, filters: Dict[str, Any]) -> List[Row]:
+        where, args = _where_clause(filters, None, [])
+        return await self.fetch(f"DELETE FROM {_quote(table)}{where} RETURNING *", *args, table=table, operation="delete")
+
+    async def rpc(self, function: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        params = params or {}
+        named = ", ".join(f"{_quote(name)} => ${index}" for index, name in enumerate(params, start=1))
+        rows = await self.fetch(f"SELECT * FROM {_quote(function)}({named})", *params.values(), table=function, operation="rpc")
+        # Scalar functions come back as one row with one column named after the function (PostgREST unwraps it)
+        if len(rows) == 1 and list(rows[0].keys()) == [function]:
+            return rows[0][function]
+        return rows
+
+    async def close(self):
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+
+# ==================== SQL helpers ====================
+
+def _quote(identifier: str) -> str:
+    if not _IDENTIFIER.match(identifier):
+        raise ValueError(f"Invalid SQL identifier: {identifier!r}")
+    return f'"{identifier}"'
+
+
+def _order_columns(order_by: OrderBy) -> List[str]:
+    if not order_by:
+        return []
+    return [order_by] if isinstance(order_by, str) else list(order_by)
+
+
+def _columns_sql(columns: str) -> str:
+    if columns.strip() == "*":
+        return "*"
+    return ", ".join(_quote(column.strip()) for column in columns.split(",") if column.strip())
+
+
+def _where_clause(filters: Optional[Dict[str, Any]], in_filters: Optional[Dict[str, Iterable[Any]]], args: List[Any]):
+    conditions = []
+    for column, value in (filters or {}).items():
+        if value is None:
+            conditions.append(f"{_quote(column)} IS NULL")
+        else:
+            args.append(value)
+            conditions.append(f"{_quote(column)} = ${len(args)}")
+    for column, values in (in_filters or {}).items():
+        args.append(list(values))
+        conditions.append(f"{_quote(column)} = ANY(${len(args)})")
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+    return where, args
+
+
+def _keyset_filter(order_columns: List[str], after: Sequence[Any], desc: bool) -> str:
+    """PostgREST or= filter for rows past the keyset cursor `after` (one value per order column)"""
+    if len(after) != len(order_columns):
+        raise ValueError("Keyset cursor needs one value per order_by column")
+    operator = "lt" if desc else "gt"
+    branches = []
+    for index, column in enumerate(order_columns):
+        terms = [f'{order_columns[i]}.eq."{after[i]}"' for i in range(index)]
+        terms.append(f'{column}.{operator}."{after[index]}"')
+        branches.append(terms[0] if len(terms) == 1 else f"and({','.join(terms)})")
+    return ",".join(branches)
+
+
+def build_select_sql(table, columns="*", filters=None, in_filters=None, order_by=None, desc=False, limit=None, offset=None, after=None):
+    """SELECT with equality / ANY filters; after is a keyset cursor (one value per order_by column)"""
+    where, args = _where_clause(filters, in_filters, [])
+    sql = f"SELECT {_columns_sql(columns)} FROM {_quote(table)}{where}"
+    order_columns = _order_columns(order_by)
+    if after is not None:
+        if len(after) != len(order_columns):
+            raise ValueError("Keyset cursor needs one value per order_by column")
+        placeholders = []
+        for value in after:
+            args.append(value)
+            placeholders.append(f"${len(args)}")
+        comparison = "<" if desc else ">"
+        sql += (" AND " if where else " WHERE ") + (
+            f"({', '.join(_quote(column) for column in order_columns)}) {comparison} ({', '.join(placeholders)})"
+        )
+    if order_columns:
+        direction = " DESC" if desc else ""
+        sql += " ORDER BY " + ", ".join(f"{_quote(column)}{direction}" for column in order_columns)
+    if limit is not None:
+        args.append(limit)
+        sql += f" LIMIT ${len(args)}"
+    if offset is not None:
+        args.append(offset)
+        sql += f" OFFSET ${len(args)}"
+    return sql, args
+
+
+def build_insert_sql(table: str, rows: List[Row], on_conflict: Optional[str] = None):
+    # Union of keys keeps one statement for heterogeneous rows; missing keys fall back to DEFAULT
+    columns = []
+    for row in rows:
+        for column in row:
+            if column not in columns:
+                columns.append(column)
+
+    args = []
+    values_sql = []
+    for row in rows:
+        placeholders = []
+        for column in columns:
+            if column in row:
+                args.append(row[column])
+                placeholders.append(f"${len(args)}")
+            else:
+                placeholders.append("DEFAULT")
+        values_sql.append(f"({', '.join(placeholders)})")
+
+    sql = (
+        f"INSERT INTO {_quote(table)} ({', '.join(_quote(column) for column in columns)}) "
+        f"VALUES {', '.join(values_sql)}"
+    )
+    if on_conflict:
+        conflict_columns = [column.strip() for column in on_conflict.split(",")]
+        updates = [column for column in columns if column not in conflict_columns]
+        conflict_sql = ", ".join(_quote(column) for column in conflict_columns)
+        if updates:
+            sql += f" ON CONFLICT ({conflict_sql}) DO UPDATE SET " + ", ".join(
+                f"{_quote(column)} = EXCLUDED.{_quote(column)}" for column in updates
+            )
+        else:
+            sql += f" ON CONFLICT ({conflict_sql}) DO NOTHING"
+    return sql + " RETURNING *", args
+
+
+def _json_dumps(value: Any) -> str:
+    return json.dumps(value, default=str)
+
+
+def _pg_timestamp_to_iso(value: str) -> str:
+    """'2025-07-06 12:00:00.123+00' -> '2025-07-06T12:00:00.123+00:00' (PostgREST style)"""
+    value = value.replace(" ", "T", 1)
+    if re.search(r"[+-]\d{2}$", value):
+        value += ":00"
+    return value
+
+
+# ==================== Factory ====================
+
+# One pool per worker process, shared by every service that asks for the asyncpg backend
+_asyncpg_backend: Optional[AsyncpgBackend] = None
+
+
+def create_db_backend(supabase_client=None):
+    """
+    Pick the backend from DB_BACKEND (supabase | asyncpg).
+
+    asyncpg needs DATABASE_URL (the Supabase Postgres connection string); pool size comes
+    from DB_POOL_MIN_SIZE / DB_POOL_MAX_SIZE. Falls back to supabase when it is not set.
+    """
+    global _asyncpg_backend
+    backend = os.getenv("DB_BACKEND", "supabase").lower()
+
+    if backend == "asyncpg":
+        dsn = os.getenv("DATABASE_URL")
+        if dsn:
+            if _asyncpg_backend is None:
+                _asyncpg_backend = AsyncpgBackend(
+                    dsn,
+                    min_size=int(os.getenv("DB_POOL_MIN_SIZE", "2")),
+                    max_size=int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+                    statement_cache_size=int(os.getenv("DB_STATEMENT_CACHE_SIZE", "256"))
+                )
+            return _asyncpg_backend
+        logger.warning("db.asyncpg.no_dsn", "DB_BACKEND=asyncpg but DATABASE_URL is not set, using supabase")
+
+    if supabase_client is None:
+        return None
+    return SupabaseBackend(supabase_client)
+
+
+async def close_db_backends():
+    """Close the shared asyncpg pool (called on application shutdown)"""
+    if _asyncpg_backend is not None:
+        await _asyncpg_backend.close()
@@ -11,8 +11,11 @@ import asyncio
 import subprocess
 from typing import Optional, Dict, Any, List
 from pathlib import Path
-from logging_service import logger
+from logging_service import logger, Lazy
 from s3_service import s3_service
+from request_context import trace_headers
+from tracing import traced, Tracer
+from app_metrics import track_job
 
 class HedraAPIClient:
     """Client for interacting with Hedra's video generation API"""
@@ -20,11 +23,17 @@ class HedraAPIClient:
     def __init__(self, api_key: str):
         self.api_key = api_key
         self.base_url = "https://api.hedra.com/web-app/public"  # From n8n workflow
-        self.headers = {
+        self._base_headers = {
             "x-api-key": api_key,  # Lowercase as per n8n workflow
             "User-Agent": "Sucana-v4/1.0"
         }
     
+    @property
+    def headers(self) -> Dict[str, str]:
+        """API headers plus the current request's trace id"""
+        return {**self._base_headers, **trace_headers()}
+    
+    @traced("hedra.create_asset", kind=Tracer.CLIENT)
     async def create_asset(self, name: str, asset_type: str) -> str:
         """
         Create an asset (step 1 for both image and audio) - matches n8n workflow
@@ -57,6 +66,7 @@ class HedraAPIClient:
             logger.error("hedra.asset.creation_error", f"Asset creation error: {e}", error=str(e))
             raise
 
+    @traced("hedra.upload_file_to_asset", kind=Tracer.CLIENT)
     async def upload_file_to_asset(self, asset_id: str, file_path: str, file_type: str) -> str:
         """
         Upload file to existing asset (step 2) - matches n8n workflow exactly
@@ -158,6 +168,7 @@ class HedraAPIClient:
             logger.error("hedra.models.retrieval_error", f"Models retrieval error: {e}", error=str(e))
             raise
 
+    @traced("hedra.create_generation", kind=Tracer.CLIENT)
     async def create_generation(self, character_id: str, audio_id: str, 
                               aspect_ratio: str = "9:16", quality: str = "720p", 
                               audio_duration: Optional[float] = None, 
@@ -290,6 +301,7 @@ class HedraAPIClient:
             logger.error("hedra.generation.creation_error", f"Generation creation error: {e}", error=str(e))
             raise
     
+    @traced("hedra.check_generation_status", kind=Tracer.CLIENT)
     async def check_generation_status(self, job_id: str) -> Dict[str, Any]:
         """
         Check generation job status - updated for new API
@@ -310,7 +322,7 @@ class HedraAPIClient:
                         progress = result.get('progress', 0)
                         logger.info("hedra.status.success", f"Status check successful - Status: {status}, Progress: {progress}", 
                                    status=status, progress=progress)
-                        logger.debug("hedra.generation.status_response", f"Full status response: {result}", response=result)
+                        logger.debug("hedra.generation.status_response", Lazy(lambda: f"Full status response: {result}"), response=result)
                         return result
                     else:
                         error_text = await response.text()
@@ -321,6 +333,8 @@ class HedraAPIClient:
             logger.error("hedra.status.exception", f"Exception checking status: {e}", error=str(e))
             raise
     
+    @traced("hedra.wait_for_completion")
+    @track_job("hedra_video_generation")
     async def wait_for_completion(self, job_id: str, max_wait_minutes: int = 15) -> Dict[str, Any]:
         """
         Wait for generation to complete - matches n8n workflow logic
@@ -343,7 +357,7 @@ class HedraAPIClient:
                 status = await self.check_generation_status(job_id)
                 
                 # Log the full status for debugging
-                logger.debug("hedra.status.response", f"Status response: {status}", status=status)
+                logger.debug("hedra.status.response", Lazy(lambda: f"Status response: {status}"), status=status)
                 
                 progress = status.get('progress', 0)
                 state = status.get('state', status.get('status', 'unknown'))
@@ -387,6 +401,7 @@ class HedraAPIClient:
                     job_id=job_id, max_wait_minutes=max_wait_minutes)
         raise Exception(f"Generation {job_id} timed out after {max_wait_minutes} minutes")
     
+    @traced("hedra.download_video", kind=Tracer.CLIENT)
     async def download_video(self, video_url: str, save_path: str) -> str:
         """
         Download generated video
@@ -412,6 +427,7 @@ class HedraAPIClient:
             logger.error("hedra.video.download_error", f"Video download error: {e}", error=str(e))
             raise
     
+    @traced("hedra.upload_character", kind=Tracer.CLIENT)
     async def upload_character(self, image_path: str) -> str:
         """
         Upload a character image and return the character ID
@@ -0,0 +1,114 @@
+"""
+Log Sampling for database logging
+Decides which log rows reach simple_logs: sampling rules by event prefix, level or route, plus per-event rate caps
+"""
+
+import time
+import zlib
+import random
+import threading
+from fnmatch import fnmatchcase
+from typing import Any, Dict, List, Optional, Tuple
+
+# Same values as logging_service.LogLevel
+LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40, "CRITICAL": 50}
+ERROR = 40
+
+
+def parse_rules(spec: str) -> List[Tuple[str, str, float]]:
+    """
+    "route:/health=0,level:DEBUG=0,request.=0.1" -> [(kind, pattern, rate), ...]
+
+    kind is "route" (glob on the request path), "level" (level name) or "event"
+    (event-name prefix; the "event:" tag may be omitted). Rules are tried in order;
+    the first match gives the rate, rows matching none are kept.
+    """
+    rules = []
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        selector, _, rate = item.rpartition("=")
+        kind, _, pattern = selector.partition(":") if ":" in selector else ("event", "", selector)
+        if kind not in ("route", "level", "event") or not pattern:
+            raise ValueError(f"Invalid log sampling rule: {item}")
+        rules.append((kind, pattern.upper() if kind == "level" else pattern, float(rate)))
+    return rules
+
+
+class LogSampler:
+    """
+    keep() is called for every row bound for the database. ERROR+ rows and rows of slow
+    operations (processing_time / duration_ms at or above slow_ms) are always kept.
+
+    Sampling is keyed on the trace id when there is one, so a request's rows are kept or
+    dropped together; kept rows record the rate as metadata.sample_rate so the log
+    rollup can weight them. Each event name then has a token bucket of `burst` rows refilled at
+    `rate_per_second` (0 = no cap).
+    """
+
+    def __init__(self, rules: List[Tuple[str, str, float]], rate_per_second: float = 0, burst: int = 30, slow_ms: float = 2000):
+        self.rules = rules
+        self.rate_per_second = rate_per_second
+        self.burst = max(1, burst)
+        self.slow_ms = slow_ms
+        self._buckets: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+        self.stats = {"kept": 0, "always_kept": 0, "sampled_out": 0, "rate_limited": 0}
+
+    def keep(self, event_name: str, level: int, metadata: Dict[str, Any], context: Dict[str, Any]) -> bool:
+        if level >= ERROR or self._is_slow(metadata):
+            self.stats["always_kept"] += 1
+            return True
+
+        rate = self._rate(event_name, level, context.get("route") or metadata.get("path"))
+        if rate < 1:
+            if not self._sampled(rate, context.get("trace_id")):
+                self.stats["sampled_out"] += 1
+                return False
+            metadata["sample_rate"] = rate
+
+        if self.rate_per_second > 0 and not self._take_token(event_name):
+            self.stats["rate_limited"] += 1
+            return False
+
+        self.stats["kept"] += 1
+        return True
+
+    def _is_slow(self, metadata: Dict[str, Any]) -> bool:
+        if self.slow_ms <= 0:
+            return False
+        seconds = metadata.get("processing_time")
+        if isinstance(seconds, (int, float)) and seconds * 1000 >= self.slow_ms:
+            return True
+        duration_ms = metadata.get("duration_ms")
+        return isinstance(duration_ms, (int, float)) and duration_ms >= self.slow_ms
+
+    def _rate(self, event_name: str, level: int, route: Optional[str]) -> float:
+        for kind, pattern, rate in self.rules:
+            if kind == "event" and event_name.startswith(pattern):
+                return rate
+            if kind == "level" and LEVELS.get(pattern) == level:
+                return rate
+            if kind == "route" and route and fnmatchcase(route, pattern):
+                return rate
+        return 1.0
+
+    @staticmethod
+    def _sampled(rate: float, trace_id: Optional[str]) -> bool:
+        if rate <= 0:
+            return False
+        if trace_id:
+            return zlib.crc32(trace_id.encode()) % 10000 < rate * 10000
+        return random.random() < rate
+
+    def _take_token(self, event_name: str) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(event_name)
+            if bucket is None:
+                bucket = self._buckets[event_name] = [float(self.burst), now]
+            tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate_per_second)
+            bucket[1] = now
+            if tokens < 1:
+                bucket[0] = tokens
+                return False
+            bucket[0] = tokens - 1
+            return True
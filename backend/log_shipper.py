@@ -0,0 +1,161 @@
+"""
+Log Shipper for database logging
+Background thread that batches queued log rows into simple_logs inserts, off the request path
+"""
+
+import time
+import atexit
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, List
+
+# Same values as logging_service.LogLevel
+WARNING = 30
+ERROR = 40
+
+
+class LogShipper:
+    """
+    submit() only appends to a bounded deque (atomic under the GIL, no lock taken) and
+    returns. A daemon thread ships up to max_batch rows per insert whenever batch_size
+    rows are waiting or flush_interval seconds have passed.
+
+    Backpressure, when the inserts cannot keep up:
+    - above high_water of capacity, DEBUG/INFO rows are sampled (1 in sample_every is kept);
+    - when full, new rows below ERROR are dropped; an ERROR+ row evicts the oldest queued row.
+
+    close() (application shutdown, and atexit as a fallback) ships everything still queued.
+    Batches the database rejects twice, and rows left when close() times out, go to
+    on_failure (e.g. LogSpool.append) instead of being lost.
+    """
+
+    def __init__(
+        self,
+        insert: Callable[[List[Dict[str, Any]]], Any],
+        capacity: int = 10000,
+        batch_size: int = 10,
+        max_batch: int = 500,
+        flush_interval: float = 5,
+        high_water: float = 0.8,
+        sample_every: int = 10,
+        on_failure: Callable[[List[Dict[str, Any]]], Any] = None
+    ):
+        self.insert = insert
+        self.on_failure = on_failure
+        self.capacity = max(1, capacity)
+        self.batch_size = max(1, batch_size)
+        self.max_batch = max(self.batch_size, max_batch)
+        self.flush_interval = flush_interval
+        self.high_water = int(self.capacity * high_water)
+        self.sample_every = max(1, sample_every)
+        self.stats = {"queued": 0, "shipped": 0, "batches": 0, "dropped": 0, "sampled_out": 0, "evicted": 0, "failed": 0, "spooled": 0}
+
+        self._queue: deque = deque()
+        self._wake = threading.Event()
+        self._stopping = False
+        self._shipping = False
+        self._sample_counter = 0
+        self._thread = threading.Thread(target=self._run, name="log-shipper", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, row: Dict[str, Any], level: int):
+        """Queue a row for the database; never blocks"""
+        queued = len(self._queue)
+
+        if queued >= self.capacity:
+            if level < ERROR:
+                self.stats["dropped"] += 1
+                return
+            try:
+                self._queue.popleft()
+                self.stats["evicted"] += 1
+            except IndexError:
+                pass
+        elif queued >= self.high_water and level < WARNING:
+            self._sample_counter += 1
+            if self._sample_counter % self.sample_every:
+                self.stats["sampled_out"] += 1
+                return
+
+        self._queue.append(row)
+        self.stats["queued"] += 1
+        if queued + 1 == self.batch_size:
+            self._wake.set()
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Ship what is queued now and wait for it (blocking; call from a thread). False on timeout."""
+        deadline = time.monotonic() + timeout
+        self._wake.set()
+        while self._queue or self._shipping:
+            if time.monotonic() >= deadline or not self._thread.is_alive():
+                return False
+            time.sleep(0.02)
+        return True
+
+    def close(self, timeout: float = 10.0):
+        """Stop the thread after it has shipped every queued row"""
+        if self._stopping:
+            return
+        self._stopping = True
+        self._wake.set()
+        self._thread.join(timeout)
+        if self._queue:
+            remaining = self._take(len(self._queue))
+            self._shipping = False
+            if not self._spool(remaining):
+                print(f"⚠️ Log shipper stopped with {len(remaining)} rows not shipped")
+
+    def backlog(self) -> int:
+        return len(self._queue)
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            while self._queue:
+                self._ship(self._take(self.max_batch))
+                # Keep draining full batches; a partial one waits for the interval
+                if len(self._queue) < self.batch_size and not self._stopping:
+                    break
+            if self._stopping and not self._queue:
+                return
+
+    def _take(self, limit: int) -> List[Dict[str, Any]]:
+        self._shipping = True
+        batch = []
+        while len(batch) < limit:
+            try:
+                batch.append(self._queue.popleft())
+            except IndexError:
+                break
+        return batch
+
+    def _ship(self, batch: List[Dict[str, Any]]):
+        try:
+            for attempt in range(2):
+                try:
+                    self.insert(batch)
+                    self.stats["shipped"] += len(batch)
+                    self.stats["batches"] += 1
+                    return
+                except Exception as e:
+                    if attempt:
+                        print(f"❌ Error shipping {len(batch)} logs to database: {e}")
+                        if not self._spool(batch):
+                            self.stats["failed"] += len(batch)
+                    else:
+                        time.sleep(0.5)
+        finally:
+            self._shipping = False
+
+    def _spool(self, batch: List[Dict[str, Any]]) -> bool:
+        if not self.on_failure:
+            return False
+        try:
+            self.on_failure(batch)
+            self.stats["spooled"] += len(batch)
+            return True
+        except Exception as e:
+            print(f"❌ Error spooling {len(batch)} logs: {e}")
+            return False
@@ -0,0 +1,209 @@
+"""
+Log Spool for database logging
+Local append-only NDJSON files for log rows the database did not take, replayed into simple_logs later
+"""
+
+import os
+import json
+import uuid
+import gzip
+import fcntl
+import atexit
+import threading
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List
+
+
+class LogSpool:
+    """
+    append() writes rows to <directory>/current-<pid>.ndjson. At max_bytes (and before each
+    replay) the file is rotated to spool-<timestamp>-<pid>.ndjson.gz.
+
+    A replay thread loads rotated files into the database every replay_interval seconds in
+    batches of replay_batch rows. After each loaded batch it records the number of lines
+    done in <file>.ckpt, so a restarted or failed replay resumes after the last loaded
+    batch. Rows get their primary key and created_at when spooled and `load` ignores ids
+    already present, so a batch re-sent after a crash is not stored twice. Workers sharing
+    the directory replay one at a time (flock); files left by exited workers are picked up.
+
+    A batch failing with an error is_permanent() accepts (the database rejected the rows,
+    not just unreachable) moves its file to dead-<file> and replay goes on with the next
+    file; any other failure pauses replay until the next interval. Rotated and dead files
+    together are kept under max_total_bytes, deleting dead files first, then the oldest.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        load: Callable[[List[Dict[str, Any]]], Any],
+        max_bytes: int = 10 * 1024 * 1024,
+        replay_interval: float = 60,
+        replay_batch: int = 500,
+        max_total_bytes: int = 0,
+        is_permanent: Callable[[Exception], bool] = None
+    ):
+        self.directory = directory
+        self.load = load
+        self.max_bytes = max_bytes
+        self.replay_interval = replay_interval
+        self.replay_batch = max(1, replay_batch)
+        self.max_total_bytes = max_total_bytes
+        self.is_permanent = is_permanent or (lambda error: False)
+        self.stats = {"spooled": 0, "rotations": 0, "replayed": 0, "replay_errors": 0, "files_done": 0,
+                      "files_dead": 0, "files_evicted": 0}
+
+        os.makedirs(directory, exist_ok=True)
+        self._current = os.path.join(directory, f"current-{os.getpid()}.ndjson")
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        if replay_interval > 0:
+            self._thread = threading.Thread(target=self._run, name="log-spool-replay", daemon=True)
+            self._thread.start()
+        # Registered before the shipper's, so it runs after the shipper has spooled what is left
+        atexit.register(self.close)
+
+    def append(self, rows: List[Dict[str, Any]]):
+        """Write rows to the current file (called when shipping them failed)"""
+        spooled_at = datetime.now(timezone.utc).isoformat()
+        lines = "".join(
+            json.dumps({"id": str(uuid.uuid4()), "created_at": spooled_at, **row}, default=str) + "\n" for row in rows
+        )
+        with self._lock:
+            with open(self._current, "a", encoding="utf-8") as f:
+                f.write(lines)
+            self.stats["spooled"] += len(rows)
+            if os.path.getsize(self._current) >= self.max_bytes:
+                self._rotate(self._current)
+
+    def pending_files(self) -> List[str]:
+        return sorted(name for name in os.listdir(self.directory) if name.startswith("spool-") and name.endswith(".ndjson.gz"))
+
+    def dead_files(self) -> List[str]:
+        return sorted(name for name in os.listdir(self.directory) if name.startswith("dead-") and name.endswith(".ndjson.gz"))
+
+    def close(self):
+        """Stop replaying; rows still spooled stay on disk for the next start"""
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        with self._lock:
+            if os.path.exists(self._current) and os.path.getsize(self._current):
+                self._rotate(self._current)
+
+    def _rotate(self, path: str):
+        """Compress a current-*.ndjson file into a rotated file (caller holds the lock for our own file)"""
+        pid = os.path.basename(path)[len("current-"):-len(".ndjson")]
+        rotated = os.path.join(self.directory, f"spool-{datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')}-{pid}.ndjson.gz")
+        with open(path, "rb") as src, gzip.open(rotated + ".tmp", "wb") as dst:
+            dst.write(src.read())
+        os.replace(rotated + ".tmp", rotated)
+        os.remove(path)
+        self.stats["rotations"] += 1
+
+    def _run(self):
+        while not self._stop.wait(self.replay_interval):
+            try:
+                self.replay()
+            except Exception as e:
+                self.stats["replay_errors"] += 1
+                print(f"⚠️ Log spool replay failed: {e}")
+
+    def replay(self):
+        """Rotate pending rows and load every rotated file, oldest first; stops at the first failure"""
+        with open(os.path.join(self.directory, "replay.lock"), "w") as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return  # another worker is replaying
+
+            self._rotate_pending()
+            self._enforce_total_size()
+            for name in self.pending_files():
+                if not self._replay_file(os.path.join(self.directory, name)):
+                    return
+
+    def _enforce_total_size(self):
+        """Delete the oldest rotated / dead files until the spool fits in max_total_bytes"""
+        if self.max_total_bytes <= 0:
+            return
+        # Dead files go first (they are never replayed), then pending files oldest first
+        files = [os.path.join(self.directory, name) for name in self.dead_files() + self.pending_files()]
+        sizes = {path: os.path.getsize(path) for path in files}
+        total = sum(sizes.values())
+        for path in files:
+            if total <= self.max_total_bytes:
+                return
+            os.remove(path)
+            if os.path.exists(path + ".ckpt"):
+                os.remove(path + ".ckpt")
+            total -= sizes[path]
+            self.stats["files_evicted"] += 1
+            print(f"⚠️ Log spool over {self.max_total_bytes} bytes, dropped {os.path.basename(path)}")
+
+    def _rotate_pending(self):
+        for name in os.listdir(self.directory):
+            if not (name.startswith("current-") and name.endswith(".ndjson")):
+                continue
+            path = os.path.join(self.directory, name)
+            if path == self._current:
+                with self._lock:
+                    if os.path.exists(path) and os.path.getsize(path):
+                        self._rotate(path)
+            elif not _process_alive(name[len("current-"):-len(".ndjson")]):
+                self._rotate(path)
+
+    def _replay_file(self, path: str) -> bool:
+        checkpoint_path = path + ".ckpt"
+        done = 0
+        if os.path.exists(checkpoint_path):
+            with open(checkpoint_path) as f:
+                done = int(f.read().strip() or 0)
+
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+
+        for start in range(done, len(rows), self.replay_batch):
+            batch = rows[start:start + self.replay_batch]
+            try:
+                self.load(batch)
+            except Exception as e:
+                self.stats["replay_errors"] += 1
+                if self.is_permanent(e):
+                    # Retrying cannot succeed; set the file aside so the rest of the spool drains
+                    dead = os.path.join(self.directory, "dead-" + os.path.basename(path))
+                    os.replace(path, dead)
+                    if os.path.exists(checkpoint_path):
+                        os.replace(checkpoint_path, dead + ".ckpt")
+                    self.stats["files_dead"] += 1
+                    print(f"❌ Log spool rejected at {os.path.basename(path)}:{start}, moved to {os.path.basename(dead)}: {e}")
+                    return True
+                # Database still unavailable; try again next interval
+                print(f"⚠️ Log spool replay paused at {os.path.basename(path)}:{start}: {e}")
+                return False
+            self.stats["replayed"] += len(batch)
+            _write_checkpoint(checkpoint_path, start + len(batch))
+
+        os.remove(path)
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+        self.stats["files_done"] += 1
+        return True
+
+
+def _write_checkpoint(path: str, lines_done: int):
+    with open(path + ".tmp", "w") as f:
+        f.write(str(lines_done))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(path + ".tmp", path)
+
+
+def _process_alive(pid: str) -> bool:
+    try:
+        os.kill(int(pid), 0)
+    except (ValueError, ProcessLookupError):
+        return False
+    except PermissionError:
+        pass
+    return True
@@ -4,6 +4,7 @@ Handles both console and database logging with configurable levels and batching
 """
 
 import os
+import re
 import sys
 import json
 import asyncio
@@ -14,12 +15,56 @@ from typing import Optional, Dict, Any, List
 from enum import Enum
 from contextlib import contextmanager
 import time
-from supabase import create_client, Client
 from dotenv import load_dotenv
+from query_metrics import query_metrics
+from supabase_client import get_supabase_client
+from log_shipper import LogShipper
+import request_context
+from tracing import tracer
+from log_sampling import LogSampler, parse_rules
+from log_spool import LogSpool
 
 # Load environment variables
 load_dotenv()
 
+# Postgres functions over simple_logs_rollup (see backend/migrations/006_simple_logs_rollup.sql)
+ROLLUP_REFRESH_FUNCTION = 'refresh_simple_logs_rollup'
+ANALYTICS_FUNCTION = 'get_simple_logs_analytics'
+LOG_ROLLUP_REFRESH_SECONDS = float(os.getenv('LOG_ROLLUP_REFRESH_SECONDS', '300'))
+
+# Only UUID-shaped ids go into the uuid columns of simple_logs
+UUID_PATTERN = re.compile(r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$', re.I)
+
+class Lazy:
+    """
+    Deferred log argument: Lazy(json.dumps, data, indent=2) is only called when the event
+    is emitted. Wrap f-strings as Lazy(lambda: f"..."); other callables are logged as-is.
+    """
+    __slots__ = ('fn', 'args', 'kwargs')
+    
+    def __init__(self, fn, *args, **kwargs):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+    
+    def __call__(self):
+        return self.fn(*self.args, **self.kwargs)
+
+def _render(value):
+    """Evaluate a deferred log argument"""
+    if isinstance(value, Lazy):
+        return value()
+    return value
+
+def _rejected_by_database(error: Exception) -> bool:
+    """
+    True when PostgREST refused the rows themselves (4xx: data exception 22xxx, integrity
+    violation 23xxx, undefined column / syntax 42xxx, PGRST1xx/2xx request errors), not when
+    the database was unreachable or overloaded
+    """
+    code = str(getattr(error, 'code', '') or '')
+    return code[:2] in ('22', '23', '42') or code.startswith(('PGRST1', 'PGRST2'))
+
 class LogLevel(Enum):
     """Log levels matching Python's logging module"""
     DEBUG = 10
@@ -55,10 +100,8 @@ class LoggingService:
             self.supabase_client = None
             if self.db_logging_enabled:
                 try:
-                    supabase_url = os.getenv('SUPABASE_URL')
-                    supabase_key = os.getenv('SUPABASE_SERVICE_KEY') or os.getenv('SUPABASE_ANON_KEY')
-                    if supabase_url and supabase_key:
-                        self.supabase_client = create_client(supabase_url, supabase_key)
+                    self.supabase_client = get_supabase_client("service") or get_supabase_client("anon")
+                    if self.supabase_client:
                         print(f"✅ Database logging initialized")
                     else:
                         print(f"⚠️ Database logging disabled: Missing Supabase credentials")
@@ -82,102 +125,96 @@ class LoggingService:
                 console_handler.setFormatter(formatter)
                 self.logger.addHandler(console_handler)
             
-            # Log buffer for batching
-            self.log_buffer: List[Dict] = []
-            self.buffer_lock = asyncio.Lock() if asyncio.get_event_loop_policy() else None
-            
-            # Context storage for request-scoped data
-            self.context = {}
+            # Which rows reach the database: sampling rules plus a per-event rate cap
+            self.sampler = LogSampler(
+                parse_rules(os.getenv(
+                    'LOG_SAMPLE_RULES',
+                    'route:*/health=0,route:/metrics*=0,request.=0.1,hedra.status.=0.1,level:DEBUG=0'
+                )),
+                rate_per_second=float(os.getenv('LOG_EVENT_RATE_PER_SECOND', '1')),
+                burst=int(os.getenv('LOG_EVENT_BURST', '30')),
+                slow_ms=float(os.getenv('LOG_SLOW_MS', '2000'))
+            )
             
-            # Start background task for flushing logs
+            # Database rows are queued and inserted in batches by a background thread;
+            # batches the database rejects are kept in a local spool and replayed later
+            self.shipper = None
+            self.spool = None
             if self.db_logging_enabled:
-                try:
-                    loop = asyncio.get_event_loop()
-                    if loop.is_running():
-                        asyncio.create_task(self._periodic_flush())
-                except RuntimeError:
-                    # No event loop running, will flush synchronously
-                    pass
+                if os.getenv('LOG_SPOOL_ENABLED', 'true').lower() == 'true':
+                    try:
+                        self.spool = LogSpool(
+                            os.getenv('LOG_SPOOL_DIR', 'log_spool'),
+                            self._load_spooled_logs,
+                            max_bytes=int(float(os.getenv('LOG_SPOOL_MAX_MB', '10')) * 1024 * 1024),
+                            replay_interval=float(os.getenv('LOG_SPOOL_REPLAY_SECONDS', '60')),
+                            max_total_bytes=int(float(os.getenv('LOG_SPOOL_MAX_TOTAL_MB', '500')) * 1024 * 1024),
+                            is_permanent=_rejected_by_database
+                        )
+                    except OSError as e:
+                        print(f"⚠️ Log spool disabled: {e}")
+                self.shipper = LogShipper(
+                    self._insert_logs,
+                    capacity=int(os.getenv('LOG_QUEUE_SIZE', '10000')),
+                    batch_size=self.batch_size,
+                    max_batch=int(os.getenv('LOG_MAX_BATCH', '500')),
+                    flush_interval=self.flush_interval,
+                    sample_every=int(os.getenv('LOG_BACKPRESSURE_SAMPLE_EVERY', '10')),
+                    on_failure=self.spool.append if self.spool else None
+                )
             
             self._initialized = True
     
+    @property
+    def context(self) -> Dict[str, Any]:
+        """Context of the current request (contextvar; concurrent requests do not see each other's)"""
+        return request_context.get_context()
+    
     def set_context(self, **kwargs):
-        """Set context that will be included in all subsequent logs"""
-        self.context.update(kwargs)
+        """Set context that will be included in all subsequent logs of this request"""
+        request_context.update_context(**kwargs)
     
     def clear_context(self):
-        """Clear the logging context"""
-        self.context = {}
+        """Clear the logging context (the request's trace id is kept)"""
+        request_context.clear_context()
     
     @contextmanager
     def with_context(self, **kwargs):
         """Context manager for temporary context"""
-        old_context = self.context.copy()
-        self.context.update(kwargs)
-        try:
+        with request_context.context_scope(**kwargs):
             yield
-        finally:
-            self.context = old_context
     
-    async def _periodic_flush(self):
-        """Background task to periodically flush log buffer"""
-        while True:
-            await asyncio.sleep(self.flush_interval)
-            await self.flush()
+    def _insert_logs(self, rows: List[Dict]):
+        """Insert a batch of rows into simple_logs (runs on the shipper thread)"""
+        query_metrics.run('simple_logs', 'insert', self.supabase_client.table('simple_logs').insert(rows).execute,
+                          'log_shipper', log_slow=False)
     
-    async def flush(self):
-        """Flush log buffer to database"""
-        if not self.db_logging_enabled or not self.supabase_client:
-            return
-        
-        if self.buffer_lock:
-            async with self.buffer_lock:
-                if self.log_buffer:
-                    logs_to_flush = self.log_buffer.copy()
-                    self.log_buffer.clear()
-                else:
-                    return
-        else:
-            if self.log_buffer:
-                logs_to_flush = self.log_buffer.copy()
-                self.log_buffer.clear()
-            else:
-                return
-        
-        try:
-            # Insert logs in batch
-            print(f"📝 Flushing {len(logs_to_flush)} logs to database...")
-            result = self.supabase_client.table('simple_logs').insert(logs_to_flush).execute()
-            if not result.data:
-                print(f"⚠️ Failed to flush {len(logs_to_flush)} logs to database")
-            else:
-                print(f"✅ Successfully flushed {len(logs_to_flush)} logs to database")
-        except Exception as e:
-            print(f"❌ Error flushing logs to database: {e}")
+    def _load_spooled_logs(self, rows: List[Dict]):
+        """Replay spooled rows; they carry their id, so rows already stored are skipped"""
+        query_metrics.run('simple_logs', 'upsert', self.supabase_client.table('simple_logs').upsert(
+            rows, on_conflict='id', ignore_duplicates=True
+        ).execute, 'log_spool', log_slow=False)
+    
+    async def flush(self, timeout: float = 10.0) -> bool:
+        """Wait until every queued log row has been written"""
+        if not self.shipper:
+            return True
+        return await asyncio.to_thread(self.shipper.flush, timeout)
+    
+    def close(self):
+        """Ship the remaining rows and stop the shipper (application shutdown)"""
+        if self.shipper:
+            self.shipper.close()
+        if self.spool:
+            self.spool.close()
     
     def _should_log(self, level: LogLevel) -> bool:
         """Check if the given level should be logged"""
         return level.value >= self.log_level.value
     
-    async def _add_to_buffer(self, log_entry: Dict):
-        """Add log entry to buffer and flush if needed"""
-        if not self.db_logging_enabled or not self.supabase_client:
-            return
-        
-        if self.buffer_lock:
-            async with self.buffer_lock:
-                self.log_buffer.append(log_entry)
-                if len(self.log_buffer) >= self.batch_size:
-                    await self.flush()
-        else:
-            self.log_buffer.append(log_entry)
-            if len(self.log_buffer) >= self.batch_size:
-                # Synchronous flush
-                try:
-                    result = self.supabase_client.table('simple_logs').insert(self.log_buffer).execute()
-                    self.log_buffer.clear()
-                except Exception as e:
-                    print(f"❌ Error flushing logs: {e}")
+    def is_enabled(self, level: LogLevel) -> bool:
+        """Whether events at level are emitted; guard for log-only work that Lazy cannot wrap"""
+        return self._should_log(level)
     
     def log(self, 
             event_name: str,
@@ -193,32 +230,38 @@ class LoggingService:
         
         Args:
             event_name: Standardized event name (e.g., 'workflow.started')
-            event_value: Detailed message or description
+            event_value: Detailed message or description (or a Lazy producing it)
             level: Log level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
             user_id: User ID associated with the event
             session_id: Session ID for tracking
             thread_id: Thread/Conversation ID
             metadata: Additional context as dictionary
-            **kwargs: Additional key-value pairs to add to metadata
+            **kwargs: Additional key-value pairs to add to metadata (values may be Lazy)
         """
         if not self._should_log(level):
             return
         
+        # Deferred arguments are rendered only now that the event will be emitted
+        event_value = _render(event_value)
+        
         # Merge context with provided values
-        user_id = user_id or self.context.get('user_id')
-        session_id = session_id or self.context.get('session_id')
-        thread_id = thread_id or self.context.get('thread_id') or self.context.get('conversation_id')
+        context = self.context
+        user_id = user_id or context.get('user_id')
+        session_id = session_id or context.get('session_id')
+        thread_id = thread_id or context.get('thread_id') or context.get('conversation_id')
         
         # Build metadata
         full_metadata = {}
         if metadata:
             full_metadata.update(metadata)
         if kwargs:
-            full_metadata.update(kwargs)
+            full_metadata.update({key: _render(value) for key, value in kwargs.items()})
         
         # Add context metadata
-        if self.context.get('metadata'):
-            full_metadata.update(self.context['metadata'])
+        if context.get('metadata'):
+            full_metadata.update(context['metadata'])
+        if context.get('trace_id'):
+            full_metadata['trace_id'] = context['trace_id']
         
         # Add level to metadata
         full_metadata['level'] = level.name
@@ -237,11 +280,8 @@ class LoggingService:
             self.logger.critical(log_message)
         
         # Database logging
-        if self.db_logging_enabled:
+        if self.db_logging_enabled and self.sampler.keep(event_name, level.value, full_metadata, context):
             # Validate UUIDs - only include if they look like valid UUIDs
-            import re
-            uuid_pattern = re.compile(r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$', re.I)
-            
             log_entry = {
                 'event_name': event_name,
                 'event_value': event_value,
@@ -249,47 +289,15 @@ class LoggingService:
             }
             
             # Only add UUID fields if they're valid UUIDs
-            if user_id and uuid_pattern.match(str(user_id)):
+            if user_id and UUID_PATTERN.match(str(user_id)):
                 log_entry['user_id'] = user_id
-            if session_id and uuid_pattern.match(str(session_id)):
+            if session_id and UUID_PATTERN.match(str(session_id)):
                 log_entry['session_id'] = session_id
-            if thread_id and uuid_pattern.match(str(thread_id)):
+            if thread_id and UUID_PATTERN.match(str(thread_id)):
                 log_entry['thread_id'] = thread_id
             
-            # Immediate write for batch_size = 1
-            if self.batch_size == 1 and self.supabase_client:
-                try:
-                    result = self.supabase_client.table('simple_logs').insert([log_entry]).execute()
-                    if not result.data:
-                        print(f"⚠️ Failed to insert log: {event_name}")
-                except Exception as e:
-                    print(f"❌ Error logging to database: {e}")
-            else:
-                # Try async first, fall back to sync
-                try:
-                    loop = asyncio.get_event_loop()
-                    if loop.is_running():
-                        asyncio.create_task(self._add_to_buffer(log_entry))
-                    else:
-                        # Synchronous fallback
-                        self.log_buffer.append(log_entry)
-                        if len(self.log_buffer) >= self.batch_size:
-                            if self.supabase_client:
-                                try:
-                                    self.supabase_client.table('simple_logs').insert(self.log_buffer).execute()
-                                    self.log_buffer.clear()
-                                except Exception as e:
-                                    print(f"❌ Error logging to database: {e}")
-                except RuntimeError:
-                    # No event loop, use synchronous approach
-                    self.log_buffer.append(log_entry)
-                    if len(self.log_buffer) >= self.batch_size:
-                        if self.supabase_client:
-                            try:
-                                self.supabase_client.table('simple_logs').insert(self.log_buffer).execute()
-                                self.log_buffer.clear()
-                            except Exception as e:
-                                print(f"❌ Error logging to database: {e}")
+            if self.shipper:
+                self.shipper.submit(log_entry, level.value)
     
     # Convenience methods for different log levels
     def debug(self, event_name: str, event_value: str = None, **kwargs):
@@ -318,11 +326,12 @@ class LoggingService:
     
     @contextmanager
     def timer(self, event_name: str, **kwargs):
-        """Context manager to time operations"""
+        """Context manager to time operations (also recorded as a tracing span)"""
         start_time = time.time()
         self.info(f"{event_name}.started", **kwargs)
         try:
-            yield
+            with tracer.span(event_name, **kwargs):
+                yield
             duration_ms = int((time.time() - start_time) * 1000)
             self.info(f"{event_name}.completed", duration_ms=duration_ms, **kwargs)
         except Exception as e:
@@ -357,11 +366,71 @@ class LoggingService:
         query = query.order('created_at', desc=True).limit(limit)
         
         try:
-            result = query.execute()
+            result = await asyncio.to_thread(
+                query_metrics.run, 'simple_logs', 'select', query.execute, 'query_logs'
+            )
             return result.data if result.data else []
         except Exception as e:
             self.error('logging.query.failed', str(e))
             return []
+    
+    async def refresh_log_rollup(self) -> Optional[int]:
+        """Fold rows inserted since the last refresh into simple_logs_rollup; rollup rows written"""
+        if not self.supabase_client:
+            return None
+        result = await asyncio.to_thread(
+            query_metrics.run, 'simple_logs_rollup', 'rpc',
+            self.supabase_client.rpc(ROLLUP_REFRESH_FUNCTION, {}).execute, 'log_rollup', False
+        )
+        return result.data
+    
+    async def log_analytics(self,
+                            start_date: datetime,
+                            end_date: datetime,
+                            granularity: str = None,
+                            event_prefix: str = None,
+                            limit: int = 100) -> Optional[Dict[str, Any]]:
+        """
+        Server-side aggregates over simple_logs for [start_date, end_date), at hour resolution:
+        counts and errors per event name, p50/p95/p99 of processing_time and duration_ms,
+        error rates per route and per phase ("<phase>.completed" / "<phase>.failed" events).
+        
+        granularity ('hour', 'day', 'week') splits every section into periods, e.g. to see
+        which phase got slower day by day. Computed from simple_logs_rollup, which is
+        refreshed first; raises when the migration has not been applied.
+        """
+        if not self.supabase_client:
+            return None
+        await self.refresh_log_rollup()
+        result = await asyncio.to_thread(
+            query_metrics.run, 'simple_logs_rollup', 'rpc',
+            self.supabase_client.rpc(ANALYTICS_FUNCTION, {
+                'p_start': start_date.isoformat(),
+                'p_end': end_date.isoformat(),
+                'p_granularity': granularity,
+                'p_event_prefix': event_prefix,
+                'p_limit': limit
+            }).execute, 'log_analytics'
+        )
+        return result.data
+    
+    async def run_rollup_refresh(self):
+        """Background loop started by the application; stops if the rollup is not installed"""
+        while True:
+            await asyncio.sleep(LOG_ROLLUP_REFRESH_SECONDS)
+            try:
+                await self.refresh_log_rollup()
+            except Exception as e:
+                if ROLLUP_REFRESH_FUNCTION in str(e):
+                    print(f"⚠️ {ROLLUP_REFRESH_FUNCTION} not installed, log rollup refresh stopped")
+                    return
+                print(f"⚠️ Log rollup refresh failed: {e}")
+    
+    def start_rollup_refresh(self) -> Optional[asyncio.Task]:
+        """Start the rollup refresh loop; returns the task so shutdown can cancel it"""
+        if not self.db_logging_enabled or not self.supabase_client or LOG_ROLLUP_REFRESH_SECONDS <= 0:
+            return None
+        return asyncio.create_task(self.run_rollup_refresh())
 
 # Global logger instance
 logger = LoggingService()
@@ -1,16 +1,27 @@
 from fastapi import FastAPI, Depends, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+from fastapi.responses import PlainTextResponse
+from starlette.routing import Match
 from pydantic import BaseModel
 import os
 import time
+from datetime import datetime, timedelta, timezone
 from dotenv import load_dotenv
 
 # Import shared authentication
-from auth import verify_token, supabase
+from auth import verify_token, verify_metrics_access, supabase, start_revocation_checks
 
 # Import logging service
 from logging_service import logger
+from db_backends import close_db_backends
+from query_metrics import query_metrics
+from singleflight import singleflight_stats
+from supabase_client import validate_supabase_clients, close_supabase_clients
+from read_cache import request_cache_scope
+from request_context import context_scope, incoming_trace_id, TRACE_HEADER
+from tracing import tracer, Tracer
+from app_metrics import app_metrics
 
 # Load environment variables
 load_dotenv()
@@ -58,6 +69,13 @@ async def handle_options_requests(request, call_next):
         })
     return await call_next(request)
 
+# Memoize database reads for the lifetime of each request
+@app.middleware("http")
+async def request_read_cache(request, call_next):
+    """Scope the per-request row cache used by the database services"""
+    with request_cache_scope():
+        return await call_next(request)
+
 # Add request logging middleware
 @app.middleware("http")
 async def log_requests(request, call_next):
@@ -84,6 +102,7 @@ async def log_requests(request, call_next):
             f"{request.method} {request.url.path} - {response.status_code}",
             method=request.method,
             path=request.url.path,
+            route=getattr(request.state, "route_template", None),
             status_code=response.status_code,
             processing_time=processing_time
         )
@@ -96,11 +115,70 @@ async def log_requests(request, call_next):
             f"{request.method} {request.url.path} - Error: {str(e)}",
             method=request.method,
             path=request.url.path,
+            route=getattr(request.state, "route_template", None),
             error=str(e),
             processing_time=processing_time
         )
         raise
 
+# Wraps every handler and inner middleware, so it sees every request (preflights included)
+@app.middleware("http")
+async def request_metrics(request, call_next):
+    """Request counts, latency and in-flight gauges per route template for /metrics"""
+    labels = {"method": request.method, "route": route_template(request.scope)}
+    # Shared with log_requests, so request rows carry the template for the log rollup
+    request.state.route_template = labels["route"]
+    status_code = 500
+    start = time.perf_counter()
+    try:
+        with app_metrics.in_progress("http_requests_in_progress", **labels):
+            response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        app_metrics.observe("http_request_duration_seconds", time.perf_counter() - start, **labels)
+        app_metrics.inc("http_requests_total", status=status_code, **labels)
+
+# Registered last, so it is the outermost middleware: metrics and logging run inside the request's context and trace id
+@app.middleware("http")
+async def request_context_middleware(request, call_next):
+    """Request-scoped log context; the trace id is returned to the caller and sent on outbound calls"""
+    trace_id = incoming_trace_id(request.headers)
+    with context_scope(trace_id=trace_id, route=request.url.path):
+        # Root span of the request's trace; handlers, Claude/DB/S3/Hedra calls nest under it
+        with tracer.span(f"{request.method} {request.url.path}", kind=Tracer.SERVER, root=True,
+                         **{"http.method": request.method, "http.target": request.url.path}) as span:
+            response = await call_next(request)
+            span.set_attribute("http.status_code", response.status_code)
+    response.headers[TRACE_HEADER] = trace_id
+    return response
+
+def route_template(scope) -> str:
+    """Path template of the matching route ("/api/v3/campaigns/{campaign_id}"), so metric labels stay bounded"""
+    partial = None
+    for route in app.router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+        if match == Match.PARTIAL and partial is None:
+            partial = route.path
+    return partial or "unmatched"
+
+def background_queue_depths():
+    """Queue lengths sampled into each metrics snapshot"""
+    from video_ads_v3_database_service import v3_db_service
+    depths = [
+        ("background_queue_depth", {"queue": "campaign_writes"}, v3_db_service.campaign_writes.backlog()),
+        ("background_queue_depth", {"queue": "trace_export"}, tracer.backlog()),
+    ]
+    if logger.shipper:
+        depths.append(("background_queue_depth", {"queue": "log_shipper"}, logger.shipper.backlog()))
+    if logger.spool:
+        depths.append(("background_queue_depth", {"queue": "log_spool_files"}, len(logger.spool.pending_files())))
+    return depths
+
+app_metrics.add_collector(background_queue_depths)
+
 # Startup event
 @app.on_event("startup")
 async def startup_event():
@@ -111,12 +189,29 @@ async def startup_event():
         environment=os.getenv("ENVIRONMENT", "development"),
         supabase_connected=supabase is not None
     )
+    # Check the shared Supabase clients once and warm their connection pools
+    await validate_supabase_clients()
+    # Periodically drop cached tokens whose sessions were revoked
+    app.state.revocation_checks = start_revocation_checks()
+    # Keep the simple_logs analytics rollup current
+    app.state.log_rollup_refresh = logger.start_rollup_refresh()
 
 # Shutdown event
 @app.on_event("shutdown")
 async def shutdown_event():
     """Log server shutdown"""
     logger.info("server.shutdown", "FastAPI server shutting down")
+    if getattr(app.state, "revocation_checks", None):
+        app.state.revocation_checks.cancel()
+    if getattr(app.state, "log_rollup_refresh", None):
+        app.state.log_rollup_refresh.cancel()
+    from video_ads_v3_database_service import v3_db_service
+    await v3_db_service.flush_campaign_writes()
+    await close_db_backends()
+    # Ship queued log rows before the database clients go away
+    logger.close()
+    tracer.close()
+    close_supabase_clients()
 
 # Local storage directories - keeping for cache/temp files but not serving
 os.makedirs("generated_audio", exist_ok=True)
@@ -163,7 +258,7 @@ async def health_check():
     return {
         "status": "healthy",
         "supabase_connected": supabase is not None,
-        "timestamp": "2025-07-06T12:00:00Z"
+        "timestamp": datetime.now(timezone.utc).isoformat()
     }
 
 # Development mode authentication (only when Supabase is not available)
@@ -197,6 +292,65 @@ def health_check():
         "service": "audiencelab-backend"
     }
 
+@app.get("/metrics", dependencies=[Depends(verify_metrics_access)])
+def prometheus_metrics():
+    """All workers' request, outbound-call, database and background-job metrics in the Prometheus text format"""
+    return PlainTextResponse(app_metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/metrics/db-queries", dependencies=[Depends(verify_metrics_access)])
+async def db_query_metrics():
+    """Database latency histograms per table/operation, time per caller and recent slow queries (this worker)"""
+    return {"pid": os.getpid(), **query_metrics.snapshot()}
+
+@app.get("/metrics/logging", dependencies=[Depends(verify_metrics_access)])
+async def logging_metrics():
+    """Database log shipping counters and current queue length (this worker)"""
+    if not logger.shipper:
+        return {"pid": os.getpid(), "db_logging_enabled": False}
+    return {
+        "pid": os.getpid(),
+        "db_logging_enabled": True,
+        "backlog": logger.shipper.backlog(),
+        "shipping": logger.shipper.stats,
+        "sampling": logger.sampler.stats,
+        "spool": {
+            **logger.spool.stats,
+            "pending_files": len(logger.spool.pending_files()),
+            "dead_files": len(logger.spool.dead_files())
+        } if logger.spool else None
+    }
+
+@app.get("/metrics/log-analytics", dependencies=[Depends(verify_metrics_access)])
+async def log_analytics(
+    start: datetime = None,
+    end: datetime = None,
+    granularity: str = None,
+    event_prefix: str = None,
+    limit: int = 100
+):
+    """Event counts, processing_time / duration_ms percentiles and route / phase error rates (default: last 7 days)"""
+    if granularity not in (None, "hour", "day", "week"):
+        raise HTTPException(status_code=400, detail="granularity must be hour, day or week")
+    end = end or datetime.now(timezone.utc)
+    start = start or end - timedelta(days=7)
+    try:
+        analytics = await logger.log_analytics(start, end, granularity, event_prefix, min(max(limit, 1), 1000))
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Log analytics unavailable: {e}")
+    if analytics is None:
+        raise HTTPException(status_code=503, detail="Database logging is not configured")
+    return analytics
+
+@app.get("/metrics/tracing", dependencies=[Depends(verify_metrics_access)])
+async def tracing_metrics():
+    """Span export counters (this worker)"""
+    return {"pid": os.getpid(), "enabled": tracer.enabled, **tracer.stats}
+
+@app.get("/metrics/singleflight", dependencies=[Depends(verify_metrics_access)])
+async def singleflight_metrics():
+    """Calls, executions and coalesced calls per singleflight group (this worker)"""
+    return {"pid": os.getpid(), "groups": singleflight_stats()}
+
 @app.get("/auth/verify")
 async def verify_auth(current_user = Depends(verify_token)):
     """Verify user authentication"""
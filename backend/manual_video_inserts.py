@@ -3,23 +3,20 @@
 Manual data insertion script for video_ads_v3_videos table
 """
 
-import os
 from datetime import datetime
 from dotenv import load_dotenv
 import uuid
-from supabase import create_client, Client
+from supabase import Client
+from supabase_client import get_supabase_client
 
 # Load environment variables
 load_dotenv()
 
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY")
-
 def insert_videos():
     """Insert manual video entries into video_ads_v3_videos table"""
 
     # Create Supabase client
-    supabase: Client = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
+    supabase: Client = get_supabase_client()
 
     try:
         # Video data to insert (matching the actual table structure)
@@ -76,10 +73,11 @@ def insert_videos():
             }
         ]
 
-        # Insert each video
+        # Insert all videos in one request
+        result = supabase.table('video_ads_v3_videos').upsert(videos).execute()
+        inserted_ids = {row['id'] for row in result.data or []}
         for video in videos:
-            result = supabase.table('video_ads_v3_videos').upsert(video).execute()
-            if result.data:
+            if video['id'] in inserted_ids:
                 print(f"✅ Inserted video for campaign {video['campaign_id']}")
                 print(f"   Video URL: {video['video_url']}")
                 print(f"   Video ID: {video['id']}")
@@ -92,13 +90,14 @@ def insert_videos():
             'cbe484dd-6d13-495f-ad10-47bb57123b0f'
         ]
 
-        for campaign_id in campaign_ids:
-            update_result = supabase.table('video_ads_v3_campaigns').update({
-                'current_step': 8,
-                'status': 'completed'
-            }).eq('campaign_id', campaign_id).execute()
+        update_result = supabase.table('video_ads_v3_campaigns').update({
+            'current_step': 8,
+            'status': 'completed'
+        }).in_('campaign_id', campaign_ids).execute()
+        updated_ids = {row['campaign_id'] for row in update_result.data or []}
 
-            if update_result.data:
+        for campaign_id in campaign_ids:
+            if campaign_id in updated_ids:
                 print(f"✅ Updated campaign {campaign_id} to step 8 with status completed")
             else:
                 print(f"⚠️  Could not update campaign {campaign_id} - it may not exist")
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Backfill per-item hook and script rows from the V3 content documents
+Run once after applying migrations/005_v3_campaign_items.sql; safe to re-run
+
+Usage (from backend/):
+    python migrate_v3_content_items.py [--batch-size 200] [--campaign-id <id>]
+"""
+
+import asyncio
+import argparse
+
+from video_ads_v3_database_service import v3_db_service, CONTENT_TABLE, SYNC_ITEMS_FUNCTION
+
+
+async def sync_campaign(campaign_id: str) -> int:
+    items = await v3_db_service.backend.rpc(SYNC_ITEMS_FUNCTION, {"p_campaign_id": campaign_id})
+    return items or 0
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=200, help="Content rows read per page")
+    parser.add_argument("--campaign-id", help="Only sync this campaign")
+    args = parser.parse_args()
+
+    if not v3_db_service.available:
+        print("❌ No database configured (SUPABASE_URL / DATABASE_URL)")
+        return
+
+    backend = v3_db_service.backend
+    try:
+        if args.campaign_id:
+            print(f"✅ {args.campaign_id}: {await sync_campaign(args.campaign_id)} items")
+            return
+
+        campaigns = items = offset = 0
+        while True:
+            rows = await backend.select(CONTENT_TABLE, "campaign_id", order_by="campaign_id",
+                                        limit=args.batch_size, offset=offset)
+            if not rows:
+                break
+            for row in rows:
+                try:
+                    items += await sync_campaign(row["campaign_id"])
+                    campaigns += 1
+                except Exception as e:
+                    print(f"❌ {row['campaign_id']}: {e}")
+            offset += len(rows)
+            print(f"📊 {campaigns} campaigns, {items} hook/script items synced")
+
+        print(f"✅ Backfill complete: {campaigns} campaigns, {items} items")
+    finally:
+        await backend.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,75 @@
+-- Single-round-trip content writes for the V3 campaign service
+--
+-- upsert_v3_campaign_content(campaign_id, content, current_step) replaces the
+-- get_campaign -> select id -> update/insert -> update_campaign sequence with one
+-- atomic call. Only the columns present in `content` are written; existing
+-- columns are kept. Returns false when the campaign does not exist.
+
+-- One content row per campaign: keep the most recently updated duplicate
+DELETE FROM video_ads_v3_campaign_content c
+USING video_ads_v3_campaign_content newer
+WHERE c.campaign_id = newer.campaign_id
+  AND (COALESCE(c.updated_at, '-infinity'), c.id) < (COALESCE(newer.updated_at, '-infinity'), newer.id);
+
+CREATE UNIQUE INDEX IF NOT EXISTS video_ads_v3_campaign_content_campaign_id_key
+    ON video_ads_v3_campaign_content (campaign_id);
+
+CREATE OR REPLACE FUNCTION upsert_v3_campaign_content(
+    p_campaign_id video_ads_v3_campaigns.campaign_id%TYPE,
+    p_content jsonb,
+    p_current_step integer DEFAULT NULL
+) RETURNS boolean
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_columns text[];
+    v_unknown text[];
+BEGIN
+    -- Lock the campaign row (and bump its step) so concurrent writers serialize per campaign
+    UPDATE video_ads_v3_campaigns
+       SET current_step = COALESCE(p_current_step, current_step),
+           updated_at = CASE WHEN p_current_step IS NULL THEN updated_at ELSE now() END
+     WHERE campaign_id = p_campaign_id;
+
+    IF NOT FOUND THEN
+        RETURN false;
+    END IF;
+
+    SELECT array_agg(a.attname::text ORDER BY a.attnum)
+      INTO v_columns
+      FROM pg_attribute a
+     WHERE a.attrelid = 'video_ads_v3_campaign_content'::regclass
+       AND a.attnum > 0
+       AND NOT a.attisdropped
+       AND a.attname NOT IN ('id', 'campaign_id', 'created_at', 'updated_at')
+       AND p_content ? a.attname;
+
+    SELECT array_agg(key)
+      INTO v_unknown
+      FROM jsonb_object_keys(p_content) AS key
+     WHERE key NOT IN ('id', 'campaign_id', 'created_at', 'updated_at')
+       AND key <> ALL (COALESCE(v_columns, '{}'));
+
+    IF v_unknown IS NOT NULL THEN
+        RAISE EXCEPTION 'Unknown video_ads_v3_campaign_content columns: %', array_to_string(v_unknown, ', ');
+    END IF;
+
+    IF v_columns IS NULL THEN
+        INSERT INTO video_ads_v3_campaign_content (campaign_id)
+        VALUES (p_campaign_id)
+        ON CONFLICT (campaign_id) DO UPDATE SET updated_at = now();
+        RETURN true;
+    END IF;
+
+    EXECUTE format(
+        'INSERT INTO video_ads_v3_campaign_content (campaign_id, %s, updated_at) '
+        'SELECT $1, %s, now() FROM jsonb_populate_record(NULL::video_ads_v3_campaign_content, $2) r '
+        'ON CONFLICT (campaign_id) DO UPDATE SET %s, updated_at = now()',
+        (SELECT string_agg(quote_ident(c), ', ') FROM unnest(v_columns) c),
+        (SELECT string_agg('r.' || quote_ident(c), ', ') FROM unnest(v_columns) c),
+        (SELECT string_agg(format('%1$I = EXCLUDED.%1$I', c), ', ') FROM unnest(v_columns) c)
+    ) USING p_campaign_id, p_content;
+
+    RETURN true;
+END;
+$$;
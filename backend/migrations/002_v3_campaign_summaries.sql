@@ -0,0 +1,72 @@
+-- Campaign listing in one query for the V3/V4 dashboards
+--
+-- list_v3_campaign_summaries returns one jsonb summary per campaign with the list
+-- columns, product_data, the selections, hook/script/angle counts and (for completed
+-- campaigns) their videos, replacing the per-campaign content/video lookups.
+-- p_counts_only leaves out product_data, the selections, has_content and videos for
+-- listings that only show the campaign columns and counts (V4).
+-- Pagination is keyset on (created_at, campaign_id), newest first; p_offset is only
+-- honoured when no cursor is given.
+
+CREATE INDEX IF NOT EXISTS video_ads_v3_campaigns_user_created_idx
+    ON video_ads_v3_campaigns (user_id, created_at DESC, campaign_id DESC);
+
+CREATE INDEX IF NOT EXISTS video_ads_v3_videos_campaign_idx
+    ON video_ads_v3_videos (campaign_id, video_number);
+
+-- Earlier version without p_counts_only; left in place it would make named calls ambiguous
+DROP FUNCTION IF EXISTS list_v3_campaign_summaries(
+    video_ads_v3_campaigns.user_id%TYPE, integer, timestamptz, video_ads_v3_campaigns.campaign_id%TYPE, text, integer
+);
+
+CREATE OR REPLACE FUNCTION list_v3_campaign_summaries(
+    p_user_id video_ads_v3_campaigns.user_id%TYPE,
+    p_limit integer DEFAULT 50,
+    p_cursor_created_at timestamptz DEFAULT NULL,
+    p_cursor_campaign_id video_ads_v3_campaigns.campaign_id%TYPE DEFAULT NULL,
+    p_status text DEFAULT NULL,
+    p_offset integer DEFAULT 0,
+    p_counts_only boolean DEFAULT false
+) RETURNS TABLE (summary jsonb)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT jsonb_build_object(
+               'campaign_id', c.campaign_id,
+               'campaign_name', c.campaign_name,
+               'current_step', c.current_step,
+               'status', c.status,
+               'created_at', c.created_at,
+               'updated_at', c.updated_at,
+               'angle_count', CASE WHEN jsonb_typeof(cc.hooks) = 'array' THEN jsonb_array_length(cc.hooks) ELSE 0 END,
+               -- strict: lax mode would unwrap the arrays before the type() filters see them
+               'hook_count', COALESCE(jsonb_array_length(jsonb_path_query_array(
+                   cc.hooks,
+                   'strict $[*] ? (@.hooks_by_category.type() == "object").hooks_by_category.* ? (@.type() == "array")[*]',
+                   '{}', true)), 0),
+               'script_count', COALESCE(jsonb_array_length(jsonb_path_query_array(
+                   cc.scripts,
+                   'strict $[0] ? (@.angles.type() == "array").angles[*] ? (@.hooks.type() == "array").hooks[*] ? (@.scripts.type() == "array").scripts[*]',
+                   '{}', true)), 0)
+           ) || CASE WHEN p_counts_only THEN '{}'::jsonb ELSE jsonb_build_object(
+               'product_data', cc.product_data,
+               'selected_hooks', cc.selected_hooks,
+               'selected_scripts', cc.selected_scripts,
+               'selected_angles', cc.selected_angles,
+               'has_content', cc.campaign_id IS NOT NULL,
+               'videos', CASE WHEN c.current_step = 8 AND c.status = 'completed' THEN (
+                   SELECT jsonb_agg(to_jsonb(v) ORDER BY v.video_number)
+                     FROM video_ads_v3_videos v
+                    WHERE v.campaign_id = c.campaign_id
+               ) END
+           ) END
+      FROM video_ads_v3_campaigns c
+      LEFT JOIN video_ads_v3_campaign_content cc ON cc.campaign_id = c.campaign_id
+     WHERE c.user_id = p_user_id
+       AND (p_status IS NULL OR c.status = p_status)
+       AND (p_cursor_created_at IS NULL
+            OR (c.created_at, c.campaign_id) < (p_cursor_created_at, p_cursor_campaign_id))
+     ORDER BY c.created_at DESC, c.campaign_id DESC
+     LIMIT p_limit
+    OFFSET CASE WHEN p_cursor_created_at IS NULL THEN p_offset ELSE 0 END
+$$;
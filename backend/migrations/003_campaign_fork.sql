@@ -0,0 +1,142 @@
+-- Atomic campaign forks
+--
+-- fork_v2_campaign and fork_v3_campaign copy a campaign and the content it has up
+-- to a step inside one function call (one transaction), so a failure leaves no
+-- partial copy behind. Both return the new campaign id, or NULL when the source
+-- campaign does not exist for that user.
+
+CREATE OR REPLACE FUNCTION fork_v2_campaign(
+    p_source_campaign_id uuid,
+    p_user_id uuid,
+    p_up_to_step integer,
+    p_conversation_id text,
+    p_campaign_name text DEFAULT NULL
+) RETURNS uuid
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_new_id uuid;
+BEGIN
+    INSERT INTO video_ads_v2_campaigns (user_id, conversation_id, parent_campaign_id, campaign_name, current_step, status)
+    SELECT user_id, p_conversation_id, id, COALESCE(p_campaign_name, campaign_name || ' (Copy)'), p_up_to_step, 'draft'
+      FROM video_ads_v2_campaigns
+     WHERE id = p_source_campaign_id AND user_id = p_user_id
+    RETURNING id INTO v_new_id;
+
+    IF v_new_id IS NULL THEN
+        RETURN NULL;
+    END IF;
+
+    -- Product info (step 2)
+    IF p_up_to_step >= 2 THEN
+        INSERT INTO video_ads_v2_product_info (campaign_id, url, product_data, source)
+        SELECT v_new_id, url, product_data, source
+          FROM video_ads_v2_product_info
+         WHERE campaign_id = p_source_campaign_id
+         ORDER BY updated_at DESC NULLS LAST
+         LIMIT 1;
+    END IF;
+
+    -- Marketing analysis (step 3)
+    IF p_up_to_step >= 3 THEN
+        INSERT INTO video_ads_v2_marketing_analysis (campaign_id, avatar_analysis, journey_mapping, objections_analysis,
+                                                     angles_generation, selected_angles, processing_time_ms, claude_model)
+        SELECT v_new_id, avatar_analysis, journey_mapping, objections_analysis,
+               angles_generation, selected_angles, processing_time_ms, claude_model
+          FROM video_ads_v2_marketing_analysis
+         WHERE campaign_id = p_source_campaign_id
+         ORDER BY updated_at DESC NULLS LAST
+         LIMIT 1;
+    END IF;
+
+    -- Hooks (step 4)
+    IF p_up_to_step >= 4 THEN
+        INSERT INTO video_ads_v2_hooks (campaign_id, hooks_data, selected_hooks, processing_time_ms)
+        SELECT v_new_id, hooks_data, selected_hooks, processing_time_ms
+          FROM video_ads_v2_hooks
+         WHERE campaign_id = p_source_campaign_id
+         ORDER BY updated_at DESC NULLS LAST
+         LIMIT 1;
+    END IF;
+
+    -- Scripts (step 5)
+    IF p_up_to_step >= 5 THEN
+        INSERT INTO video_ads_v2_scripts (campaign_id, scripts_data, selected_scripts, processing_time_ms)
+        SELECT v_new_id, scripts_data, selected_scripts, processing_time_ms
+          FROM video_ads_v2_scripts
+         WHERE campaign_id = p_source_campaign_id
+         ORDER BY updated_at DESC NULLS LAST
+         LIMIT 1;
+    END IF;
+
+    -- Voice and actor selections (step 6)
+    IF p_up_to_step >= 6 THEN
+        INSERT INTO video_ads_v2_selections (campaign_id, voice_data, actor_data)
+        SELECT v_new_id, voice_data, actor_data
+          FROM video_ads_v2_selections
+         WHERE campaign_id = p_source_campaign_id
+         ORDER BY updated_at DESC NULLS LAST
+         LIMIT 1;
+    END IF;
+
+    -- Media: audio from step 7, video as well from step 8
+    IF p_up_to_step >= 7 THEN
+        INSERT INTO video_ads_v2_media (campaign_id, media_type, script_id, file_url, file_metadata, processing_time_ms)
+        SELECT v_new_id, media_type, script_id, file_url, file_metadata, processing_time_ms
+          FROM video_ads_v2_media
+         WHERE campaign_id = p_source_campaign_id
+           AND (media_type = 'audio' OR p_up_to_step >= 8)
+         ORDER BY created_at;
+    END IF;
+
+    RETURN v_new_id;
+END;
+$$;
+
+
+CREATE OR REPLACE FUNCTION fork_v3_campaign(
+    p_source_campaign_id video_ads_v3_campaigns.campaign_id%TYPE,
+    p_user_id video_ads_v3_campaigns.user_id%TYPE,
+    p_fork_from_step integer,
+    p_campaign_name text
+) RETURNS video_ads_v3_campaigns.campaign_id%TYPE
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_new_id video_ads_v3_campaigns.campaign_id%TYPE := gen_random_uuid();
+BEGIN
+    INSERT INTO video_ads_v3_campaigns (user_id, campaign_id, campaign_name, product_url, status, current_step)
+    SELECT user_id, v_new_id, p_campaign_name, product_url, 'in_progress', p_fork_from_step
+      FROM video_ads_v3_campaigns
+     WHERE campaign_id = p_source_campaign_id AND user_id = p_user_id;
+
+    IF NOT FOUND THEN
+        RETURN NULL;
+    END IF;
+
+    -- Content columns become available step by step; later ones are left NULL
+    INSERT INTO video_ads_v3_campaign_content (
+        campaign_id, product_data,
+        avatar_analysis, journey_mapping, objections_analysis, angles,
+        selected_angles, hooks, selected_hooks, scripts, selected_scripts,
+        audio_data, video_data
+    )
+    SELECT v_new_id,
+           CASE WHEN p_fork_from_step >= 1 THEN product_data END,
+           CASE WHEN p_fork_from_step >= 3 THEN avatar_analysis END,
+           CASE WHEN p_fork_from_step >= 3 THEN journey_mapping END,
+           CASE WHEN p_fork_from_step >= 3 THEN objections_analysis END,
+           CASE WHEN p_fork_from_step >= 3 THEN angles END,
+           CASE WHEN p_fork_from_step >= 4 THEN selected_angles END,
+           CASE WHEN p_fork_from_step >= 4 THEN hooks END,
+           CASE WHEN p_fork_from_step >= 5 THEN selected_hooks END,
+           CASE WHEN p_fork_from_step >= 5 THEN scripts END,
+           CASE WHEN p_fork_from_step >= 6 THEN selected_scripts END,
+           CASE WHEN p_fork_from_step >= 7 THEN audio_data END,
+           CASE WHEN p_fork_from_step >= 8 THEN video_data END
+      FROM video_ads_v3_campaign_content
+     WHERE campaign_id = p_source_campaign_id;
+
+    RETURN v_new_id;
+END;
+$$;
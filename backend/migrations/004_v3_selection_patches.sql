@@ -0,0 +1,91 @@
+-- Delta updates for the selection columns of video_ads_v3_campaign_content
+--
+-- patch_v3_selection applies a small patch to selected_angles / selected_hooks /
+-- selected_scripts under a row lock, so a click sends only what changed and
+-- concurrent clicks no longer overwrite each other:
+--   p_remove  ids (or whole items) to drop; an item matches on its p_key field or by equality
+--   p_set     partial items merged into the item with the same p_key (e.g. {"id": 3, "selected": false})
+--   p_add     items appended unless an item with the same p_key (or an equal item) is present
+-- Returns the new number of selected items, or NULL when the campaign has no content row.
+
+CREATE OR REPLACE FUNCTION patch_v3_selection(
+    p_campaign_id video_ads_v3_campaign_content.campaign_id%TYPE,
+    p_column text,
+    p_add jsonb DEFAULT '[]'::jsonb,
+    p_remove jsonb DEFAULT '[]'::jsonb,
+    p_set jsonb DEFAULT '[]'::jsonb,
+    p_key text DEFAULT 'id'
+) RETURNS integer
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_current jsonb;
+    v_patched jsonb;
+    v_rows integer;
+BEGIN
+    IF p_column NOT IN ('selected_angles', 'selected_hooks', 'selected_scripts') THEN
+        RAISE EXCEPTION 'Not a selection column: %', p_column;
+    END IF;
+
+    EXECUTE format(
+        'SELECT COALESCE(%I, ''[]''::jsonb) FROM video_ads_v3_campaign_content WHERE campaign_id = $1 FOR UPDATE',
+        p_column
+    ) INTO v_current USING p_campaign_id;
+
+    -- EXECUTE does not set FOUND
+    GET DIAGNOSTICS v_rows = ROW_COUNT;
+    IF v_rows = 0 THEN
+        RETURN NULL;
+    END IF;
+
+    IF jsonb_typeof(v_current) <> 'array' THEN
+        v_current := '[]'::jsonb;
+    END IF;
+
+    -- Drop removed items and merge partial updates, keeping the original order
+    SELECT COALESCE(jsonb_agg(
+               CASE WHEN patch.value IS NOT NULL AND jsonb_typeof(item.value) = 'object'
+                    THEN item.value || patch.value
+                    ELSE item.value END
+               ORDER BY item.position), '[]'::jsonb)
+      INTO v_patched
+      FROM jsonb_array_elements(v_current) WITH ORDINALITY AS item(value, position)
+      LEFT JOIN LATERAL (
+          SELECT s.value
+            FROM jsonb_array_elements(COALESCE(p_set, '[]'::jsonb)) AS s(value)
+           WHERE s.value -> p_key = item.value -> p_key
+           LIMIT 1
+      ) AS patch ON true
+     WHERE NOT EXISTS (
+          SELECT 1
+            FROM jsonb_array_elements(COALESCE(p_remove, '[]'::jsonb)) AS r(value)
+           WHERE r.value = item.value
+              OR r.value = item.value -> p_key
+              OR (r.value -> p_key IS NOT NULL AND r.value -> p_key = item.value -> p_key)
+     );
+
+    -- Append new items that are not selected yet
+    SELECT v_patched || COALESCE(jsonb_agg(a.value ORDER BY a.position), '[]'::jsonb)
+      INTO v_patched
+      FROM jsonb_array_elements(COALESCE(p_add, '[]'::jsonb)) WITH ORDINALITY AS a(value, position)
+     WHERE NOT EXISTS (
+          SELECT 1
+            FROM jsonb_array_elements(v_patched) AS e(value)
+           WHERE e.value = a.value
+              OR (a.value -> p_key IS NOT NULL AND e.value -> p_key = a.value -> p_key)
+     )
+       AND NOT EXISTS (
+          SELECT 1
+            FROM jsonb_array_elements(p_add) WITH ORDINALITY AS b(value, position)
+           WHERE b.position < a.position
+             AND (b.value = a.value OR (a.value -> p_key IS NOT NULL AND b.value -> p_key = a.value -> p_key))
+     );
+
+    EXECUTE format(
+        'UPDATE video_ads_v3_campaign_content SET %I = $2, updated_at = now() WHERE campaign_id = $1',
+        p_column
+    ) USING p_campaign_id, v_patched;
+
+    RETURN jsonb_array_length(v_patched);
+END;
+$$;
@@ -0,0 +1,265 @@
+-- Per-item storage for V3 hooks and scripts
+--
+-- video_ads_v3_campaign_hooks / video_ads_v3_campaign_scripts hold one row per hook_id /
+-- script_id, so a single item can be read or edited without loading the whole
+-- hooks / scripts document. The JSON columns of video_ads_v3_campaign_content stay
+-- the complete copy that existing endpoints read:
+--   * writing hooks or scripts on the content row re-derives that campaign's item rows (trigger)
+--   * update_v3_campaign_item() edits one item row and patches the same item in the
+--     document in place, under the content row lock, so concurrent item edits do not
+--     overwrite each other; stale or missing item rows are re-synced first
+--
+-- Backfill existing campaigns after applying this file:
+--   python migrate_v3_content_items.py            (batched, from backend/)
+--   SELECT sync_v3_campaign_items(campaign_id) FROM video_ads_v3_campaign_content;   (small databases)
+
+DO $$
+DECLARE
+    v_campaign_id_type text;
+BEGIN
+    SELECT format_type(a.atttypid, a.atttypmod)
+      INTO v_campaign_id_type
+      FROM pg_attribute a
+     WHERE a.attrelid = 'video_ads_v3_campaign_content'::regclass
+       AND a.attname = 'campaign_id';
+
+    EXECUTE format($ddl$
+        CREATE TABLE IF NOT EXISTS video_ads_v3_campaign_hooks (
+            campaign_id %s NOT NULL,
+            hook_id text NOT NULL,
+            angle_id text,
+            category text NOT NULL,
+            angle_position integer NOT NULL,
+            position integer NOT NULL,
+            hook jsonb NOT NULL,
+            updated_at timestamptz NOT NULL DEFAULT now(),
+            PRIMARY KEY (campaign_id, hook_id)
+        )$ddl$, v_campaign_id_type);
+
+    EXECUTE format($ddl$
+        CREATE TABLE IF NOT EXISTS video_ads_v3_campaign_scripts (
+            campaign_id %s NOT NULL,
+            script_id text NOT NULL,
+            angle_id text,
+            hook_id text,
+            angle_position integer NOT NULL,
+            hook_position integer NOT NULL,
+            position integer NOT NULL,
+            script jsonb NOT NULL,
+            updated_at timestamptz NOT NULL DEFAULT now(),
+            PRIMARY KEY (campaign_id, script_id)
+        )$ddl$, v_campaign_id_type);
+END $$;
+
+CREATE INDEX IF NOT EXISTS video_ads_v3_campaign_scripts_hook_idx
+    ON video_ads_v3_campaign_scripts (campaign_id, hook_id);
+
+-- hooks document: [{angle_id, ..., hooks_by_category: {category: [{hook_id, ...}]}}]
+CREATE OR REPLACE FUNCTION sync_v3_campaign_hooks(
+    p_campaign_id video_ads_v3_campaign_content.campaign_id%TYPE,
+    p_hooks jsonb
+) RETURNS integer
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_count integer;
+BEGIN
+    DELETE FROM video_ads_v3_campaign_hooks WHERE campaign_id = p_campaign_id;
+
+    IF jsonb_typeof(p_hooks) IS DISTINCT FROM 'array' THEN
+        RETURN 0;
+    END IF;
+
+    INSERT INTO video_ads_v3_campaign_hooks (campaign_id, hook_id, angle_id, category, angle_position, position, hook)
+    SELECT p_campaign_id, h.value ->> 'hook_id', a.value ->> 'angle_id', c.key, a.position, h.position, h.value
+      FROM jsonb_array_elements(p_hooks) WITH ORDINALITY AS a(value, position)
+     CROSS JOIN LATERAL jsonb_each(
+               CASE WHEN jsonb_typeof(a.value -> 'hooks_by_category') = 'object'
+                    THEN a.value -> 'hooks_by_category' ELSE '{}'::jsonb END) AS c(key, value)
+     CROSS JOIN LATERAL jsonb_array_elements(
+               CASE WHEN jsonb_typeof(c.value) = 'array' THEN c.value ELSE '[]'::jsonb END)
+               WITH ORDINALITY AS h(value, position)
+     WHERE jsonb_typeof(h.value) = 'object'
+       AND h.value ->> 'hook_id' IS NOT NULL
+    ON CONFLICT (campaign_id, hook_id) DO NOTHING;
+
+    GET DIAGNOSTICS v_count = ROW_COUNT;
+    RETURN v_count;
+END;
+$$;
+
+-- scripts document: [{angles: [{angle_id, ..., hooks: [{selected_hook, scripts: [{script_id, ...}]}]}]}]
+CREATE OR REPLACE FUNCTION sync_v3_campaign_scripts(
+    p_campaign_id video_ads_v3_campaign_content.campaign_id%TYPE,
+    p_scripts jsonb
+) RETURNS integer
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_count integer;
+BEGIN
+    DELETE FROM video_ads_v3_campaign_scripts WHERE campaign_id = p_campaign_id;
+
+    IF jsonb_typeof(p_scripts #> '{0,angles}') IS DISTINCT FROM 'array' THEN
+        RETURN 0;
+    END IF;
+
+    INSERT INTO video_ads_v3_campaign_scripts
+           (campaign_id, script_id, angle_id, hook_id, angle_position, hook_position, position, script)
+    SELECT p_campaign_id, s.value ->> 'script_id', a.value ->> 'angle_id',
+           COALESCE(s.value ->> 'hook_id', hk.value #>> '{selected_hook,hook_id}'),
+           a.position, hk.position, s.position, s.value
+      FROM jsonb_array_elements(p_scripts #> '{0,angles}') WITH ORDINALITY AS a(value, position)
+     CROSS JOIN LATERAL jsonb_array_elements(
+               CASE WHEN jsonb_typeof(a.value -> 'hooks') = 'array' THEN a.value -> 'hooks' ELSE '[]'::jsonb END)
+               WITH ORDINALITY AS hk(value, position)
+     CROSS JOIN LATERAL jsonb_array_elements(
+               CASE WHEN jsonb_typeof(hk.value -> 'scripts') = 'array' THEN hk.value -> 'scripts' ELSE '[]'::jsonb END)
+               WITH ORDINALITY AS s(value, position)
+     WHERE jsonb_typeof(s.value) = 'object'
+       AND s.value ->> 'script_id' IS NOT NULL
+    ON CONFLICT (campaign_id, script_id) DO NOTHING;
+
+    GET DIAGNOSTICS v_count = ROW_COUNT;
+    RETURN v_count;
+END;
+$$;
+
+-- Re-derive one campaign's item rows from its documents; NULL when it has no content row
+CREATE OR REPLACE FUNCTION sync_v3_campaign_items(
+    p_campaign_id video_ads_v3_campaign_content.campaign_id%TYPE
+) RETURNS integer
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_hooks jsonb;
+    v_scripts jsonb;
+BEGIN
+    SELECT hooks, scripts
+      INTO v_hooks, v_scripts
+      FROM video_ads_v3_campaign_content
+     WHERE campaign_id = p_campaign_id
+       FOR UPDATE;
+
+    IF NOT FOUND THEN
+        RETURN NULL;
+    END IF;
+
+    RETURN sync_v3_campaign_hooks(p_campaign_id, v_hooks) + sync_v3_campaign_scripts(p_campaign_id, v_scripts);
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION sync_v3_campaign_items_trigger() RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    -- update_v3_campaign_item patches the documents itself
+    IF current_setting('video_ads.v3_item_sync', true) = 'off' THEN
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP = 'DELETE' THEN
+        DELETE FROM video_ads_v3_campaign_hooks WHERE campaign_id = OLD.campaign_id;
+        DELETE FROM video_ads_v3_campaign_scripts WHERE campaign_id = OLD.campaign_id;
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP = 'INSERT' OR NEW.hooks IS DISTINCT FROM OLD.hooks THEN
+        PERFORM sync_v3_campaign_hooks(NEW.campaign_id, NEW.hooks);
+    END IF;
+    IF TG_OP = 'INSERT' OR NEW.scripts IS DISTINCT FROM OLD.scripts THEN
+        PERFORM sync_v3_campaign_scripts(NEW.campaign_id, NEW.scripts);
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS video_ads_v3_campaign_content_items_sync ON video_ads_v3_campaign_content;
+CREATE TRIGGER video_ads_v3_campaign_content_items_sync
+    AFTER INSERT OR DELETE OR UPDATE OF hooks, scripts ON video_ads_v3_campaign_content
+    FOR EACH ROW EXECUTE FUNCTION sync_v3_campaign_items_trigger();
+
+-- Merge p_patch into one hook ('hook') or script ('script') and return the updated item,
+-- or NULL when the campaign or item does not exist. The item id itself cannot be changed.
+-- Item rows that are missing (campaign not backfilled) or no longer point at the item in
+-- the document are re-derived from the document and the edit is retried once.
+CREATE OR REPLACE FUNCTION update_v3_campaign_item(
+    p_campaign_id video_ads_v3_campaign_content.campaign_id%TYPE,
+    p_kind text,
+    p_item_id text,
+    p_patch jsonb
+) RETURNS jsonb
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_item jsonb;
+    v_path text[];
+    v_updated integer;
+BEGIN
+    IF p_kind NOT IN ('hook', 'script') THEN
+        RAISE EXCEPTION 'Unknown campaign item kind: %', p_kind;
+    END IF;
+
+    -- Serialize with every other writer of this campaign's documents
+    PERFORM 1 FROM video_ads_v3_campaign_content WHERE campaign_id = p_campaign_id FOR UPDATE;
+    IF NOT FOUND THEN
+        RETURN NULL;
+    END IF;
+
+    FOR v_attempt IN 1..2 LOOP
+        v_item := NULL;
+        IF p_kind = 'hook' THEN
+            UPDATE video_ads_v3_campaign_hooks
+               SET hook = hook || (p_patch - 'hook_id'),
+                   updated_at = now()
+             WHERE campaign_id = p_campaign_id AND hook_id = p_item_id
+            RETURNING hook, ARRAY[(angle_position - 1)::text, 'hooks_by_category', category, (position - 1)::text]
+              INTO v_item, v_path;
+        ELSE
+            UPDATE video_ads_v3_campaign_scripts
+               SET script = script || (p_patch - 'script_id'),
+                   updated_at = now()
+             WHERE campaign_id = p_campaign_id AND script_id = p_item_id
+            RETURNING script, ARRAY['0', 'angles', (angle_position - 1)::text, 'hooks', (hook_position - 1)::text,
+                                    'scripts', (position - 1)::text]
+              INTO v_item, v_path;
+        END IF;
+
+        IF v_item IS NOT NULL THEN
+            -- Same item in the document, without re-deriving every item row
+            PERFORM set_config('video_ads.v3_item_sync', 'off', true);
+            IF p_kind = 'hook' THEN
+                UPDATE video_ads_v3_campaign_content
+                   SET hooks = jsonb_set(hooks, v_path, v_item), updated_at = now()
+                 WHERE campaign_id = p_campaign_id
+                   AND hooks #>> (v_path || 'hook_id'::text) = p_item_id;
+            ELSE
+                UPDATE video_ads_v3_campaign_content
+                   SET scripts = jsonb_set(scripts, v_path, v_item), updated_at = now()
+                 WHERE campaign_id = p_campaign_id
+                   AND scripts #>> (v_path || 'script_id'::text) = p_item_id;
+            END IF;
+            GET DIAGNOSTICS v_updated = ROW_COUNT;
+            PERFORM set_config('video_ads.v3_item_sync', 'on', true);
+
+            IF v_updated = 1 THEN
+                RETURN v_item;
+            END IF;
+            IF v_attempt = 2 THEN
+                -- Never leave the item row edited without the document
+                RAISE EXCEPTION 'Campaign % % % not found at its item path after resync', p_campaign_id, p_kind, p_item_id;
+            END IF;
+        ELSIF v_attempt = 2
+           OR (p_kind = 'hook' AND EXISTS (SELECT 1 FROM video_ads_v3_campaign_hooks WHERE campaign_id = p_campaign_id))
+           OR (p_kind = 'script' AND EXISTS (SELECT 1 FROM video_ads_v3_campaign_scripts WHERE campaign_id = p_campaign_id)) THEN
+            -- The campaign's rows are in place and the item is not among them
+            RETURN NULL;
+        END IF;
+
+        -- Stale path or no rows yet: rebuild them from the documents (this also drops the row edit above)
+        PERFORM sync_v3_campaign_items(p_campaign_id);
+    END LOOP;
+
+    RETURN NULL;
+END;
+$$;
@@ -0,0 +1,308 @@
+-- Log analytics over simple_logs
+--
+-- simple_logs_rollup keeps one row per hour, event name and route: event / error counts
+-- and latency histograms of metadata.processing_time (seconds) and metadata.duration_ms.
+-- refresh_simple_logs_rollup() folds in the rows inserted since the previous refresh,
+-- tracked by ingested_at, so rows replayed late from the log spool still land in the
+-- hour they were logged. get_simple_logs_analytics() answers from the rollup only.
+--
+-- Counts are weighted by 1 / metadata.sample_rate (rows kept by a LOG_SAMPLE_RULES rate
+-- below 1). Histograms are sparse jsonb maps of bucket index -> count over log-spaced
+-- buckets (bucket i holds (1.1^(i-1), 1.1^i] ms), so percentiles are within ~5%.
+
+ALTER TABLE simple_logs ADD COLUMN IF NOT EXISTS ingested_at timestamptz DEFAULT now();
+
+CREATE INDEX IF NOT EXISTS simple_logs_ingested_at_idx
+    ON simple_logs USING brin (ingested_at);
+
+-- LoggingService.query_logs: newest first, optionally for one event name
+CREATE INDEX IF NOT EXISTS simple_logs_created_at_idx
+    ON simple_logs (created_at DESC);
+
+CREATE INDEX IF NOT EXISTS simple_logs_event_created_idx
+    ON simple_logs (event_name, created_at DESC);
+
+CREATE TABLE IF NOT EXISTS simple_logs_rollup (
+    bucket timestamptz NOT NULL,
+    event_name varchar(255) NOT NULL,
+    route text NOT NULL DEFAULT '',
+    phase text NOT NULL DEFAULT '',
+    events double precision NOT NULL DEFAULT 0,
+    errors double precision NOT NULL DEFAULT 0,
+    processing_count bigint NOT NULL DEFAULT 0,
+    processing_sum_ms double precision NOT NULL DEFAULT 0,
+    processing_hist jsonb NOT NULL DEFAULT '{}'::jsonb,
+    duration_count bigint NOT NULL DEFAULT 0,
+    duration_sum_ms double precision NOT NULL DEFAULT 0,
+    duration_hist jsonb NOT NULL DEFAULT '{}'::jsonb,
+    PRIMARY KEY (bucket, event_name, route)
+);
+
+CREATE INDEX IF NOT EXISTS simple_logs_rollup_phase_idx
+    ON simple_logs_rollup (phase, bucket) WHERE phase <> '';
+
+ALTER TABLE simple_logs_rollup ENABLE ROW LEVEL SECURITY;
+
+CREATE TABLE IF NOT EXISTS simple_logs_rollup_state (
+    id boolean PRIMARY KEY DEFAULT true CHECK (id),
+    refreshed_until timestamptz NOT NULL DEFAULT '-infinity',
+    refreshed_at timestamptz
+);
+
+INSERT INTO simple_logs_rollup_state (id) VALUES (true) ON CONFLICT (id) DO NOTHING;
+
+ALTER TABLE simple_logs_rollup_state ENABLE ROW LEVEL SECURITY;
+
+-- ==================== Histograms ====================
+
+CREATE OR REPLACE FUNCTION simple_logs_histogram_bucket(p_ms double precision) RETURNS integer
+LANGUAGE sql
+IMMUTABLE
+AS $$
+    SELECT CASE WHEN p_ms <= 1 THEN 0 ELSE ceil(ln(p_ms) / ln(1.1))::integer END
+$$;
+
+CREATE OR REPLACE FUNCTION simple_logs_histogram_add(p_hist jsonb, p_ms double precision) RETURNS jsonb
+LANGUAGE sql
+IMMUTABLE
+STRICT
+AS $$
+    SELECT jsonb_set(
+        p_hist,
+        ARRAY[simple_logs_histogram_bucket(p_ms)::text],
+        to_jsonb(COALESCE((p_hist->>simple_logs_histogram_bucket(p_ms)::text)::bigint, 0) + 1)
+    )
+$$;
+
+CREATE OR REPLACE FUNCTION simple_logs_merge_histograms(p_a jsonb, p_b jsonb) RETURNS jsonb
+LANGUAGE sql
+IMMUTABLE
+STRICT
+AS $$
+    SELECT COALESCE(jsonb_object_agg(key, total), '{}'::jsonb)
+      FROM (
+          SELECT key, sum(value::bigint) AS total
+            FROM (SELECT * FROM jsonb_each_text(p_a) UNION ALL SELECT * FROM jsonb_each_text(p_b)) h
+           GROUP BY key
+      ) merged
+$$;
+
+-- simple_logs_histogram(ms): histogram of a column; simple_logs_histogram_sum(hist): merged histograms
+CREATE OR REPLACE AGGREGATE simple_logs_histogram(double precision) (
+    SFUNC = simple_logs_histogram_add,
+    STYPE = jsonb,
+    INITCOND = '{}'
+);
+
+CREATE OR REPLACE AGGREGATE simple_logs_histogram_sum(jsonb) (
+    SFUNC = simple_logs_merge_histograms,
+    STYPE = jsonb,
+    INITCOND = '{}'
+);
+
+CREATE OR REPLACE FUNCTION simple_logs_histogram_percentile(p_hist jsonb, p_quantile double precision)
+RETURNS double precision
+LANGUAGE sql
+IMMUTABLE
+AS $$
+    SELECT CASE WHEN h.idx = 0 THEN 1 ELSE power(1.1, h.idx - 0.5) END
+      FROM (
+          SELECT key::integer AS idx,
+                 sum(value::bigint) OVER (ORDER BY key::integer) AS cumulative,
+                 sum(value::bigint) OVER () AS total
+            FROM jsonb_each_text(p_hist)
+      ) h
+     WHERE h.cumulative >= p_quantile * h.total
+     ORDER BY h.idx
+     LIMIT 1
+$$;
+
+CREATE OR REPLACE FUNCTION simple_logs_latency_summary(p_count bigint, p_sum_ms double precision, p_hist jsonb)
+RETURNS jsonb
+LANGUAGE sql
+IMMUTABLE
+AS $$
+    SELECT CASE WHEN COALESCE(p_count, 0) = 0 THEN NULL ELSE jsonb_build_object(
+               'count', p_count,
+               'avg_ms', round((p_sum_ms / p_count)::numeric, 1),
+               'p50_ms', round(simple_logs_histogram_percentile(p_hist, 0.5)::numeric, 1),
+               'p95_ms', round(simple_logs_histogram_percentile(p_hist, 0.95)::numeric, 1),
+               'p99_ms', round(simple_logs_histogram_percentile(p_hist, 0.99)::numeric, 1)
+           ) END
+$$;
+
+-- ==================== Refresh ====================
+
+-- Returns the number of rollup rows written, or NULL when another refresh holds the lock.
+-- Rows ingested in the last p_lag are left for the next run (inserts still committing);
+-- one run covers at most p_max_window of ingestion time so a long gap is caught up in steps.
+CREATE OR REPLACE FUNCTION refresh_simple_logs_rollup(
+    p_lag interval DEFAULT interval '1 minute',
+    p_max_window interval DEFAULT interval '6 hours'
+) RETURNS integer
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_from timestamptz;
+    v_to timestamptz;
+    v_rows integer;
+BEGIN
+    IF NOT pg_try_advisory_xact_lock(hashtext('refresh_simple_logs_rollup')) THEN
+        RETURN NULL;
+    END IF;
+
+    SELECT refreshed_until INTO v_from FROM simple_logs_rollup_state WHERE id FOR UPDATE;
+    v_to := now() - p_lag;
+    IF v_from > '-infinity' AND v_to > v_from + p_max_window THEN
+        v_to := v_from + p_max_window;
+    END IF;
+    IF v_to <= v_from THEN
+        RETURN 0;
+    END IF;
+
+    WITH facts AS (
+        SELECT date_trunc('hour', l.created_at) AS bucket,
+               l.event_name,
+               CASE WHEN l.event_name IN ('request.completed', 'request.failed')
+                    THEN COALESCE(l.metadata->>'route', l.metadata->>'path', '') ELSE '' END AS route,
+               CASE WHEN l.event_name ~ '\.(completed|complete|failed)$' AND l.event_name NOT LIKE 'request.%'
+                    THEN regexp_replace(l.event_name, '\.(completed|complete|failed)$', '') ELSE '' END AS phase,
+               CASE WHEN jsonb_typeof(l.metadata->'sample_rate') = 'number' AND (l.metadata->>'sample_rate')::float8 > 0
+                    THEN 1 / (l.metadata->>'sample_rate')::float8 ELSE 1 END AS weight,
+               (l.metadata->>'level' IN ('ERROR', 'CRITICAL')
+                OR l.event_name LIKE '%.failed'
+                OR (jsonb_typeof(l.metadata->'status_code') = 'number' AND (l.metadata->>'status_code')::float8 >= 500)
+               ) AS is_error,
+               CASE WHEN jsonb_typeof(l.metadata->'processing_time') = 'number'
+                    THEN (l.metadata->>'processing_time')::float8 * 1000 END AS processing_ms,
+               CASE WHEN jsonb_typeof(l.metadata->'duration_ms') = 'number'
+                    THEN (l.metadata->>'duration_ms')::float8 END AS duration_ms
+          FROM simple_logs l
+         WHERE l.ingested_at > v_from
+           AND l.ingested_at <= v_to
+           AND l.created_at IS NOT NULL
+    )
+    INSERT INTO simple_logs_rollup AS r (
+        bucket, event_name, route, phase, events, errors,
+        processing_count, processing_sum_ms, processing_hist,
+        duration_count, duration_sum_ms, duration_hist
+    )
+    SELECT bucket, event_name, route, phase,
+           sum(weight), COALESCE(sum(weight) FILTER (WHERE is_error), 0),
+           count(processing_ms), COALESCE(sum(processing_ms), 0), simple_logs_histogram(processing_ms),
+           count(duration_ms), COALESCE(sum(duration_ms), 0), simple_logs_histogram(duration_ms)
+      FROM facts
+     GROUP BY bucket, event_name, route, phase
+    ON CONFLICT (bucket, event_name, route) DO UPDATE SET
+        events = r.events + EXCLUDED.events,
+        errors = r.errors + EXCLUDED.errors,
+        processing_count = r.processing_count + EXCLUDED.processing_count,
+        processing_sum_ms = r.processing_sum_ms + EXCLUDED.processing_sum_ms,
+        processing_hist = simple_logs_merge_histograms(r.processing_hist, EXCLUDED.processing_hist),
+        duration_count = r.duration_count + EXCLUDED.duration_count,
+        duration_sum_ms = r.duration_sum_ms + EXCLUDED.duration_sum_ms,
+        duration_hist = simple_logs_merge_histograms(r.duration_hist, EXCLUDED.duration_hist);
+
+    GET DIAGNOSTICS v_rows = ROW_COUNT;
+    UPDATE simple_logs_rollup_state SET refreshed_until = v_to, refreshed_at = now() WHERE id;
+    RETURN v_rows;
+END;
+$$;
+
+-- ==================== Analytics ====================
+
+-- Aggregates for [p_start, p_end) at hour resolution. With p_granularity ('hour', 'day',
+-- 'week') every entry carries a period and the top p_limit are kept per period; without
+-- it the whole range is one period (null).
+CREATE OR REPLACE FUNCTION get_simple_logs_analytics(
+    p_start timestamptz,
+    p_end timestamptz,
+    p_granularity text DEFAULT NULL,
+    p_event_prefix text DEFAULT NULL,
+    p_limit integer DEFAULT 100
+) RETURNS jsonb
+LANGUAGE sql
+STABLE
+AS $$
+    WITH rollup AS (
+        SELECT r.*, CASE WHEN p_granularity IS NULL THEN NULL ELSE date_trunc(p_granularity, r.bucket) END AS period
+          FROM simple_logs_rollup r
+         WHERE r.bucket >= date_trunc('hour', p_start)
+           AND r.bucket < p_end
+           AND (p_event_prefix IS NULL OR left(r.event_name, length(p_event_prefix)) = p_event_prefix)
+    ),
+    events AS (
+        SELECT period, event_name, sum(events) AS events, sum(errors) AS errors,
+               sum(processing_count)::bigint AS processing_count, sum(processing_sum_ms) AS processing_sum_ms,
+               simple_logs_histogram_sum(processing_hist) AS processing_hist,
+               sum(duration_count)::bigint AS duration_count, sum(duration_sum_ms) AS duration_sum_ms,
+               simple_logs_histogram_sum(duration_hist) AS duration_hist,
+               row_number() OVER (PARTITION BY period ORDER BY sum(events) DESC) AS position
+          FROM rollup
+         GROUP BY period, event_name
+    ),
+    routes AS (
+        SELECT period, route, sum(events) AS requests, sum(errors) AS errors,
+               sum(processing_count)::bigint AS latency_count, sum(processing_sum_ms) AS latency_sum_ms,
+               simple_logs_histogram_sum(processing_hist) AS latency_hist,
+               row_number() OVER (PARTITION BY period ORDER BY sum(events) DESC) AS position
+          FROM rollup
+         WHERE route <> ''
+         GROUP BY period, route
+    ),
+    phases AS (
+        SELECT period, phase, sum(events) AS runs, sum(errors) AS failures,
+               (sum(processing_count) + sum(duration_count))::bigint AS latency_count,
+               sum(processing_sum_ms) + sum(duration_sum_ms) AS latency_sum_ms,
+               simple_logs_histogram_sum(simple_logs_merge_histograms(processing_hist, duration_hist)) AS latency_hist,
+               row_number() OVER (PARTITION BY period ORDER BY sum(events) DESC) AS position
+          FROM rollup
+         WHERE phase <> ''
+         GROUP BY period, phase
+    )
+    SELECT jsonb_build_object(
+        'start', p_start,
+        'end', p_end,
+        'granularity', p_granularity,
+        'refreshed_until', (SELECT refreshed_until FROM simple_logs_rollup_state WHERE id),
+        'events', COALESCE((
+            SELECT jsonb_agg(jsonb_build_object(
+                       'period', period,
+                       'event_name', event_name,
+                       'count', round(events::numeric),
+                       'errors', round(errors::numeric),
+                       'processing_time_ms', simple_logs_latency_summary(processing_count, processing_sum_ms, processing_hist),
+                       'duration_ms', simple_logs_latency_summary(duration_count, duration_sum_ms, duration_hist)
+                   ) ORDER BY period, position)
+              FROM events
+             WHERE position <= p_limit
+        ), '[]'::jsonb),
+        'routes', COALESCE((
+            SELECT jsonb_agg(jsonb_build_object(
+                       'period', period,
+                       'route', route,
+                       'requests', round(requests::numeric),
+                       'errors', round(errors::numeric),
+                       'error_rate', round((errors / NULLIF(requests, 0))::numeric, 4),
+                       'latency_ms', simple_logs_latency_summary(latency_count, latency_sum_ms, latency_hist)
+                   ) ORDER BY period, position)
+              FROM routes
+             WHERE position <= p_limit
+        ), '[]'::jsonb),
+        'phases', COALESCE((
+            SELECT jsonb_agg(jsonb_build_object(
+                       'period', period,
+                       'phase', phase,
+                       'runs', round(runs::numeric),
+                       'failures', round(failures::numeric),
+                       'error_rate', round((failures / NULLIF(runs, 0))::numeric, 4),
+                       'latency_ms', simple_logs_latency_summary(latency_count, latency_sum_ms, latency_hist)
+                   ) ORDER BY period, position)
+              FROM phases
+             WHERE position <= p_limit
+        ), '[]'::jsonb)
+    )
+$$;
+
+-- Existing rows share the ingested_at this migration gave them; roll them up now
+SELECT refresh_simple_logs_rollup(interval '0');
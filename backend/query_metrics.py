@@ -0,0 +1,222 @@
+"""
+Query Metrics for database calls
+Latency histograms, row counts, payload sizes and a slow-query log per table, operation and caller
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Optional, Tuple
+from dotenv import load_dotenv
+from tracing import tracer
+from app_metrics import app_metrics
+
+load_dotenv()
+
+# Upper bounds (ms) of the latency histogram buckets; everything slower lands in +Inf
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+# Frames from these modules are plumbing, not the caller we want to report
+_PLUMBING_FILES = ("query_metrics.py", "db_backends.py", "read_cache.py", "write_buffer.py", "singleflight.py")
+
+# Caller pinned by caller_scope() for loads that run in their own task (their stack starts there)
+_pinned_caller: ContextVar[Optional[str]] = ContextVar("query_caller", default=None)
+
+
+class QueryMetrics:
+    """
+    Aggregates every timed query in this worker process.
+
+    Callers wrap the actual round trip with run() (sync) or record() (already timed);
+    snapshot() returns the histograms for /metrics/db-queries.
+    """
+
+    def __init__(self, enabled: bool = True, slow_query_ms: float = 500, measure_payload: bool = False, slow_log_size: int = 100):
+        self.enabled = enabled
+        self.slow_query_ms = slow_query_ms
+        self.measure_payload = measure_payload
+        self._queries: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._callers: Dict[str, Dict[str, Any]] = {}
+        self._slow = deque(maxlen=slow_log_size)
+        self._lock = threading.Lock()
+
+    def caller(self) -> str:
+        """
+        Name of the first public function above the database plumbing on the current stack.
+
+        Private helpers (_select_first, _load_content, ...) are skipped so time is charged to
+        the method that asked for the data; the innermost helper is used when nothing public
+        is on the stack (e.g. a background flush). A caller pinned with caller_scope() wins.
+        """
+        pinned = _pinned_caller.get()
+        if pinned:
+            return pinned
+
+        fallback = None
+        frame = sys._getframe(1)
+        while frame is not None:
+            code = frame.f_code
+            name = code.co_name
+            if not name.startswith("<") and not code.co_filename.endswith(_PLUMBING_FILES):
+                qualified = getattr(code, "co_qualname", None) or f"{frame.f_globals.get('__name__', '?')}.{name}"
+                if not name.startswith("_") or name.startswith("__"):
+                    return qualified
+                fallback = fallback or qualified
+            frame = frame.f_back
+        return fallback or "unknown"
+
+    @contextmanager
+    def caller_scope(self, caller: str):
+        """Attribute queries started inside (including tasks created here) to caller"""
+        token = _pinned_caller.set(caller)
+        try:
+            yield
+        finally:
+            _pinned_caller.reset(token)
+
+    def run(self, table: str, operation: str, call: Callable[[], Any], caller: str = None, log_slow: bool = True) -> Any:
+        """Execute call() (e.g. a supabase-py builder's execute) and record it"""
+        if not self.enabled:
+            return call()
+
+        caller = caller or self.caller()
+        start = time.perf_counter()
+        try:
+            result = call()
+        except Exception:
+            self.record(table, operation, (time.perf_counter() - start) * 1000, caller=caller, error=True, log_slow=log_slow)
+            raise
+
+        data = getattr(result, "data", result)
+        self.record(table, operation, (time.perf_counter() - start) * 1000, data=data, caller=caller, log_slow=log_slow)
+        return result
+
+    def record(
+        self,
+        table: str,
+        operation: str,
+        duration_ms: float,
+        data: Any = None,
+        caller: str = None,
+        error: bool = False,
+        log_slow: bool = True
+    ):
+        """Add one finished query; data is the returned rows (counted and sized)"""
+        if not self.enabled:
+            return
+
+        rows = len(data) if isinstance(data, list) else (0 if data is None else 1)
+        payload = payload_bytes(data) if self.measure_payload and isinstance(data, (list, dict)) else 0
+        caller = caller or "unknown"
+        tracer.record_span(f"db.{operation} {table}", duration_ms, error=error,
+                           **{"db.table": table, "db.operation": operation, "db.rows": rows, "code.caller": caller})
+        app_metrics.observe("db_query_duration_seconds", duration_ms / 1000, table=table, operation=operation)
+        if error:
+            app_metrics.inc("db_query_errors_total", table=table, operation=operation)
+
+        with self._lock:
+            stats = self._queries.get((table, operation))
+            if stats is None:
+                stats = self._queries[(table, operation)] = {
+                    "count": 0, "errors": 0, "sum_ms": 0.0, "max_ms": 0.0, "rows": 0, "bytes": 0,
+                    "buckets": [0] * (len(LATENCY_BUCKETS_MS) + 1)
+                }
+            stats["count"] += 1
+            stats["errors"] += int(error)
+            stats["sum_ms"] += duration_ms
+            stats["max_ms"] = max(stats["max_ms"], duration_ms)
+            stats["rows"] += rows
+            stats["bytes"] += payload
+            stats["buckets"][_bucket_index(duration_ms)] += 1
+
+            by_caller = self._callers.get(caller)
+            if by_caller is None:
+                by_caller = self._callers[caller] = {"count": 0, "sum_ms": 0.0, "max_ms": 0.0}
+            by_caller["count"] += 1
+            by_caller["sum_ms"] += duration_ms
+            by_caller["max_ms"] = max(by_caller["max_ms"], duration_ms)
+
+            slow = duration_ms >= self.slow_query_ms
+            if slow:
+                self._slow.append({
+                    "table": table, "operation": operation, "caller": caller,
+                    "duration_ms": round(duration_ms, 2), "rows": rows, "bytes": payload,
+                    "error": error, "at": time.time()
+                })
+
+        if slow and log_slow:
+            # Imported here: logging_service itself reports its inserts through this module
+            from logging_service import logger
+            logger.warning("db.query.slow", f"Slow query: {operation} {table} took {duration_ms:.0f}ms ({caller})",
+                           table=table, operation=operation, caller=caller, duration_ms=round(duration_ms, 2),
+                           rows=rows, bytes=payload, error=error)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Cumulative histograms per table/operation, totals per caller and the recent slow queries"""
+        with self._lock:
+            queries = []
+            for (table, operation), stats in sorted(self._queries.items(), key=lambda item: -item[1]["sum_ms"]):
+                cumulative = 0
+                histogram = {}
+                for bound, count in zip(list(LATENCY_BUCKETS_MS) + ["+Inf"], stats["buckets"]):
+                    cumulative += count
+                    histogram[str(bound)] = cumulative
+                queries.append({
+                    "table": table,
+                    "operation": operation,
+                    "count": stats["count"],
+                    "errors": stats["errors"],
+                    "sum_ms": round(stats["sum_ms"], 2),
+                    "avg_ms": round(stats["sum_ms"] / stats["count"], 2),
+                    "max_ms": round(stats["max_ms"], 2),
+                    "rows": stats["rows"],
+                    "bytes": stats["bytes"],
+                    "histogram_ms": histogram
+                })
+
+            callers = [
+                {"caller": caller, "count": stats["count"], "sum_ms": round(stats["sum_ms"], 2),
+                 "avg_ms": round(stats["sum_ms"] / stats["count"], 2), "max_ms": round(stats["max_ms"], 2)}
+                for caller, stats in sorted(self._callers.items(), key=lambda item: -item[1]["sum_ms"])
+            ]
+
+            return {
+                "slow_query_ms": self.slow_query_ms,
+                "queries": queries,
+                "callers": callers,
+                "slow_queries": list(self._slow)
+            }
+
+    def reset(self):
+        with self._lock:
+            self._queries.clear()
+            self._callers.clear()
+            self._slow.clear()
+
+
+def payload_bytes(data: Any) -> int:
+    """Approximate size of a result as JSON"""
+    try:
+        return len(json.dumps(data, default=str, separators=(",", ":")))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _bucket_index(duration_ms: float) -> int:
+    for index, bound in enumerate(LATENCY_BUCKETS_MS):
+        if duration_ms <= bound:
+            return index
+    return len(LATENCY_BUCKETS_MS)
+
+
+# Global instance; DB_QUERY_PAYLOAD_BYTES=true also sizes results (one JSON encode per query, so off by default)
+query_metrics = QueryMetrics(
+    enabled=os.getenv("DB_QUERY_METRICS", "true").lower() == "true",
+    slow_query_ms=float(os.getenv("DB_SLOW_QUERY_MS", "500")),
+    measure_payload=os.getenv("DB_QUERY_PAYLOAD_BYTES", "false").lower() == "true"
+)
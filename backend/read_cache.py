@@ -0,0 +1,214 @@
+"""
+Read-Through Cache for database rows
+Per-request memoization plus an optional short-TTL tier shared by requests in the same worker
+"""
+
+import copy
+import time
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Optional, Tuple
+from singleflight import SingleFlight
+from query_metrics import query_metrics
+
+_MISSING = object()
+
+
+class _RequestMemo:
+    """Rows read during one request; closed when the request ends"""
+
+    __slots__ = ("rows", "active")
+
+    def __init__(self):
+        self.rows: Dict[Hashable, Any] = {}
+        self.active = True
+
+
+_request_memo: ContextVar[Optional[_RequestMemo]] = ContextVar("db_request_memo", default=None)
+
+
+@contextmanager
+def request_cache_scope():
+    """
+    Memoize reads for the duration of a request.
+
+    Tasks spawned by the request inherit the memo; it is deactivated on exit so
+    long-running background work goes back to reading through.
+    """
+    memo = _RequestMemo()
+    token = _request_memo.set(memo)
+    try:
+        yield memo
+    finally:
+        memo.active = False
+        memo.rows.clear()
+        _request_memo.reset(token)
+
+
+def _current_memo() -> Optional[_RequestMemo]:
+    memo = _request_memo.get()
+    return memo if memo is not None and memo.active else None
+
+
+class ReadThroughCache:
+    """
+    Keys are tuples whose second element is the owning group (e.g. a campaign_id),
+    so every row of a campaign can be dropped with one invalidate() call.
+    Cached values are deep-copied on the way out; callers may mutate what they get.
+    Concurrent misses for the same key (e.g. parallel requests on page load) share one load.
+    A load that was running when its group got invalidated is returned but not cached.
+    """
+
+    def __init__(self, ttl_seconds: float = 0, max_entries: int = 1024, name: str = "read_cache"):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[Tuple, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"request_hits": 0, "ttl_hits": 0, "misses": 0, "invalidations": 0, "stale_loads": 0}
+        # Invalidation counter and the value it had at each group's last invalidate(); groups
+        # pruned from the map are treated as invalidated at _pruned_generation
+        self._generation = 0
+        self._invalidated_at: "OrderedDict[Hashable, int]" = OrderedDict()
+        self._pruned_generation = 0
+        # Loaded values are only stored and deep-copied on the way out, so sharing them is safe
+        self.loads = SingleFlight(name, copy_results=False)
+
+    async def get_or_load(self, key: Tuple, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the cached row for key, or await loader() and cache a non-None result"""
+        memo = _current_memo()
+        if memo is not None and key in memo.rows:
+            self.stats["request_hits"] += 1
+            return copy.deepcopy(memo.rows[key])
+
+        value = self._get_ttl(key)
+        if value is not _MISSING:
+            self.stats["ttl_hits"] += 1
+        else:
+            self.stats["misses"] += 1
+            generation = self._generation
+            # The load runs in its own task; keep its queries charged to the method that asked
+            with query_metrics.caller_scope(query_metrics.caller()):
+                value = await self.loads.do(key, loader)
+            if value is None:
+                return None
+            if self._invalidated_since(key[1], generation):
+                return copy.deepcopy(value)
+            self._set_ttl(key, value)
+
+        if memo is not None:
+            memo.rows[key] = value
+        return copy.deepcopy(value)
+
+    async def get_or_load_fields(
+        self,
+        kind: str,
+        group: Hashable,
+        fields: Iterable[str],
+        loader: Callable[[list], Awaitable[Optional[Dict[str, Any]]]]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Per-field variant of get_or_load for wide rows.
+        
+        Each field is cached under (kind, group, field); only the fields not cached yet are
+        passed to loader(missing), which returns them as a dict, or None when the row is absent.
+        """
+        memo = _current_memo()
+        found: Dict[str, Any] = {}
+        missing = []
+        ttl_hit = False
+
+        for field in fields:
+            key = (kind, group, field)
+            if memo is not None and key in memo.rows:
+                found[field] = memo.rows[key]
+                continue
+            value = self._get_ttl(key)
+            if value is _MISSING:
+                missing.append(field)
+            else:
+                found[field] = value
+                ttl_hit = True
+                if memo is not None:
+                    memo.rows[key] = value
+
+        if missing:
+            self.stats["misses"] += 1
+            generation = self._generation
+            with query_metrics.caller_scope(query_metrics.caller()):
+                row = await self.loads.do((kind, group, tuple(missing)), lambda: loader(missing))
+            if row is None:
+                return None
+            if self._invalidated_since(group, generation):
+                found.update({field: row.get(field) for field in missing})
+                return copy.deepcopy(found)
+            for field in missing:
+                key = (kind, group, field)
+                value = row.get(field)
+                found[field] = value
+                self._set_ttl(key, value)
+                if memo is not None:
+                    memo.rows[key] = value
+        else:
+            self.stats["ttl_hits" if ttl_hit else "request_hits"] += 1
+
+        return copy.deepcopy(found)
+
+    def invalidate(self, group: Hashable):
+        """Drop every cached row belonging to group from both tiers"""
+        self.stats["invalidations"] += 1
+        # Loads already running may have read the old row; later callers must not join them,
+        # and their results must not be cached
+        self.loads.forget(lambda key: key[1] == group)
+        with self._lock:
+            self._generation += 1
+            self._invalidated_at[group] = self._generation
+            self._invalidated_at.move_to_end(group)
+            while len(self._invalidated_at) > self.max_entries:
+                _, self._pruned_generation = self._invalidated_at.popitem(last=False)
+
+        memo = _current_memo()
+        if memo is not None:
+            for key in [key for key in memo.rows if key[1] == group]:
+                del memo.rows[key]
+
+        if self.ttl_seconds > 0:
+            with self._lock:
+                for key in [key for key in self._entries if key[1] == group]:
+                    del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _invalidated_since(self, group: Hashable, generation: int) -> bool:
+        """Whether group was invalidated after the counter read generation"""
+        with self._lock:
+            stale = self._invalidated_at.get(group, self._pruned_generation) > generation
+        if stale:
+            self.stats["stale_loads"] += 1
+        return stale
+
+    def _get_ttl(self, key: Tuple) -> Any:
+        if self.ttl_seconds <= 0:
+            return _MISSING
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return _MISSING
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return _MISSING
+            self._entries.move_to_end(key)
+            return value
+
+    def _set_ttl(self, key: Tuple, value: Any):
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
@@ -0,0 +1,68 @@
+"""
+Request Context
+Per-request logging context and trace id held in a contextvar, inherited by tasks and threads the request starts
+"""
+
+import re
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Mapping
+
+TRACE_HEADER = "X-Request-ID"
+
+# The dict is replaced, never mutated, so contexts copied into tasks are unaffected by later updates
+_context: ContextVar[Dict[str, Any]] = ContextVar("request_context", default={})
+
+_TRACEPARENT = re.compile(r"^[0-9a-f]{2}-([0-9a-f]{32})-[0-9a-f]{16}-[0-9a-f]{2}$")
+_TRACE_ID = re.compile(r"^[A-Za-z0-9._-]{8,128}$")
+
+
+def get_context() -> Dict[str, Any]:
+    return _context.get()
+
+
+def update_context(**fields):
+    """Add fields to the current request's context (and to tasks it starts afterwards)"""
+    _context.set({**_context.get(), **fields})
+
+
+def clear_context():
+    """Drop fields set during the request; the trace id stays"""
+    trace_id = _context.get().get("trace_id")
+    _context.set({"trace_id": trace_id} if trace_id else {})
+
+
+@contextmanager
+def context_scope(**fields):
+    """Context for the duration of a block, restored afterwards"""
+    token = _context.set({**_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+def new_trace_id() -> str:
+    return uuid.uuid4().hex
+
+
+def current_trace_id() -> str:
+    return _context.get().get("trace_id")
+
+
+def incoming_trace_id(headers: Mapping[str, str]) -> str:
+    """Trace id sent by the caller (X-Request-ID or W3C traceparent), or a new one"""
+    value = headers.get(TRACE_HEADER.lower()) or headers.get(TRACE_HEADER)
+    if value and _TRACE_ID.match(value):
+        return value
+    match = _TRACEPARENT.match(headers.get("traceparent") or "")
+    if match:
+        return match.group(1)
+    return new_trace_id()
+
+
+def trace_headers() -> Dict[str, str]:
+    """Headers that carry the current trace id to an outbound call"""
+    trace_id = current_trace_id()
+    return {TRACE_HEADER: trace_id} if trace_id else {}
@@ -12,6 +12,7 @@ import mimetypes
 from datetime import datetime
 import logging
 from dotenv import load_dotenv
+from tracing import traced, Tracer
 
 # Load environment variables from .env file
 load_dotenv()
@@ -57,6 +58,7 @@ class S3Service:
             self.enabled = False
             self.s3_client = None
     
+    @traced("s3.upload_file", kind=Tracer.CLIENT)
     def upload_file(
         self, 
         file_path: str, 
@@ -147,6 +149,7 @@ class S3Service:
             logger.error(f"Unexpected error during S3 upload: {e}")
             return None
     
+    @traced("s3.upload_file_object", kind=Tracer.CLIENT)
     def upload_file_object(
         self,
         file_obj,
@@ -213,6 +216,7 @@ class S3Service:
             logger.error(f"Unexpected error during S3 file object upload: {e}")
             return None, None
     
+    @traced("s3.upload_file_from_bytes", kind=Tracer.CLIENT)
     def upload_file_from_bytes(
         self,
         file_content: bytes,
@@ -260,6 +264,32 @@ class S3Service:
             logger.error(f"Unexpected error during S3 bytes upload: {e}")
             return None
 
+    @traced("s3.get_file_bytes", kind=Tracer.CLIENT)
+    def get_file_bytes(self, s3_key: str) -> Optional[bytes]:
+        """
+        Download a file's content from S3
+
+        Args:
+            s3_key: The S3 key of the file
+
+        Returns:
+            File content as bytes or None if the download fails
+        """
+        if not self.enabled or not self.s3_client:
+            logger.warning("S3 service is not enabled")
+            return None
+
+        try:
+            response = self.s3_client.get_object(Bucket=self.bucket_name, Key=s3_key)
+            return response['Body'].read()
+
+        except ClientError as e:
+            logger.error(f"S3 download error: {e}")
+            return None
+        except Exception as e:
+            logger.error(f"Unexpected error during S3 download: {e}")
+            return None
+
     def delete_file(self, s3_key: str) -> bool:
         """
         Delete a file from S3
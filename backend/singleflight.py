@@ -0,0 +1,58 @@
+"""
+Singleflight for async lookups
+Concurrent calls with the same key share one in-flight execution instead of each hitting the upstream
+"""
+
+import copy
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+_registry: Dict[str, "SingleFlight"] = {}
+
+
+def singleflight_stats() -> Dict[str, Dict[str, int]]:
+    """Counters of every SingleFlight in this worker, by name"""
+    return {name: dict(flight.stats) for name, flight in _registry.items()}
+
+
+class SingleFlight:
+    """
+    The first caller for a key starts fn() as a task; callers arriving while it runs
+    await the same task and get its result (deep-copied unless copy_results is False)
+    or its exception. Nothing is cached once the task finishes.
+
+    The work runs in its own task so a cancelled caller (e.g. a client disconnect)
+    does not cancel it for the others.
+    """
+
+    def __init__(self, name: str, copy_results: bool = True):
+        self.name = name
+        self.copy_results = copy_results
+        self._flights: Dict[Hashable, asyncio.Task] = {}
+        self.stats = {"calls": 0, "executions": 0, "coalesced": 0, "errors": 0}
+        _registry[name] = self
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        self.stats["calls"] += 1
+        task = self._flights.get(key)
+        if task is not None:
+            self.stats["coalesced"] += 1
+            result = await asyncio.shield(task)
+            return copy.deepcopy(result) if self.copy_results else result
+
+        self.stats["executions"] += 1
+        task = asyncio.ensure_future(fn())
+        self._flights[key] = task
+        task.add_done_callback(lambda done: self._finished(key, done))
+        return await asyncio.shield(task)
+
+    def forget(self, predicate: Callable[[Hashable], bool]):
+        """Stop sharing in-flight calls whose key matches (e.g. after a write made them stale)"""
+        for key in [key for key in self._flights if predicate(key)]:
+            del self._flights[key]
+
+    def _finished(self, key: Hashable, task: asyncio.Task):
+        if self._flights.get(key) is task:
+            del self._flights[key]
+        if not task.cancelled() and task.exception() is not None:
+            self.stats["errors"] += 1
@@ -0,0 +1,110 @@
+"""
+Shared Supabase Clients
+One pooled keep-alive client per key per worker process, shared by every module that talks to Supabase
+"""
+
+import os
+import asyncio
+import threading
+from typing import Dict, Optional, Tuple
+from supabase import create_client, Client
+from supabase.lib.client_options import ClientOptions
+from dotenv import load_dotenv
+from query_metrics import query_metrics
+
+load_dotenv()
+
+# Which environment variable holds the key for each role
+KEY_ENV = {
+    "anon": "SUPABASE_ANON_KEY",
+    "service": "SUPABASE_SERVICE_KEY",
+}
+
+_clients: Dict[Tuple[str, str], Client] = {}
+_lock = threading.Lock()
+
+
+def get_supabase_client(role: str = "anon") -> Optional[Client]:
+    """
+    Shared client for SUPABASE_URL with the anon or service key; None when not configured.
+
+    Clients are created once per (url, key); every caller using the same key shares the
+    same PostgREST connection pool.
+    """
+    url = os.getenv("SUPABASE_URL")
+    key = os.getenv(KEY_ENV[role])
+    if not url or not key:
+        return None
+
+    with _lock:
+        client = _clients.get((url, key))
+        if client is None:
+            client = create_client(url, key, options=ClientOptions(
+                postgrest_client_timeout=float(os.getenv("SUPABASE_HTTP_TIMEOUT", "30"))
+            ))
+            try:
+                _configure_http_pool(client)
+            except Exception as e:
+                print(f"⚠️ Could not configure the Supabase HTTP pool, using library defaults: {e}")
+            _clients[(url, key)] = client
+            print(f"✅ Supabase client created ({role})")
+        return client
+
+
+def _configure_http_pool(client: Client):
+    """
+    Replace the PostgREST session with one using our pool limits and keep-alive.
+
+    Base URL, default headers, timeout and redirect following are kept from postgrest's
+    own session. SUPABASE_HTTP_MAX_CONNECTIONS bounds the open sockets per worker (more
+    concurrent to_thread calls wait for a free connection); SUPABASE_HTTP_MAX_KEEPALIVE
+    and SUPABASE_HTTP_KEEPALIVE_SECONDS keep idle connections warm between requests.
+    """
+    import httpx
+
+    postgrest = client.postgrest
+    session = postgrest.session
+    postgrest.session = type(session)(
+        base_url=session.base_url,
+        headers=session.headers,
+        timeout=session.timeout,
+        follow_redirects=True,
+        http2=os.getenv("SUPABASE_HTTP2", "false").lower() == "true",
+        limits=httpx.Limits(
+            max_connections=int(os.getenv("SUPABASE_HTTP_MAX_CONNECTIONS", "20")),
+            max_keepalive_connections=int(os.getenv("SUPABASE_HTTP_MAX_KEEPALIVE", "10")),
+            keepalive_expiry=float(os.getenv("SUPABASE_HTTP_KEEPALIVE_SECONDS", "60"))
+        )
+    )
+    session.close()
+
+
+async def validate_supabase_clients() -> bool:
+    """
+    Run one cheap query per shared client (called once at startup); this also opens the
+    first pooled connection so the first request does not pay the TLS handshake.
+    """
+    table = os.getenv("SUPABASE_HEALTHCHECK_TABLE", "video_ads_v3_campaigns")
+    healthy = True
+    for (url, _), client in list(_clients.items()):
+        try:
+            await asyncio.to_thread(
+                query_metrics.run, table, "healthcheck",
+                client.table(table).select("*").limit(1).execute, "startup"
+            )
+            print(f"✅ Supabase connection validated ({url})")
+        except Exception as e:
+            healthy = False
+            print(f"❌ Supabase connection check failed ({url}): {e}")
+    return healthy
+
+
+def close_supabase_clients():
+    """Close pooled connections (called on application shutdown)"""
+    with _lock:
+        for client in _clients.values():
+            try:
+                client.postgrest.session.close()
+            except Exception:
+                pass
+        _clients.clear()
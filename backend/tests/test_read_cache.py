@@ -0,0 +1,67 @@
+"""
+Tests for read_cache.ReadThroughCache
+Invalidation racing an in-flight load must not leave the pre-write row cached
+"""
+
+import asyncio
+from read_cache import ReadThroughCache, request_cache_scope
+
+
+def test_load_in_flight_during_invalidate_is_not_cached():
+    async def run():
+        cache = ReadThroughCache(ttl_seconds=60)
+        row = {"status": "processing"}
+
+        async def load():
+            value = dict(row)
+            await asyncio.sleep(0.05)
+            return value
+
+        with request_cache_scope():
+            reader = asyncio.create_task(cache.get_or_load(("campaign", "c1"), load))
+            await asyncio.sleep(0.01)
+            row["status"] = "completed"
+            cache.invalidate("c1")
+
+            assert (await reader)["status"] == "processing"
+            assert (await cache.get_or_load(("campaign", "c1"), load))["status"] == "completed"
+
+    asyncio.run(run())
+
+
+def test_fields_load_in_flight_during_invalidate_is_not_cached():
+    async def run():
+        cache = ReadThroughCache(ttl_seconds=60)
+        row = {"audio_data": "old"}
+
+        async def load(missing):
+            value = {field: row[field] for field in missing}
+            await asyncio.sleep(0.05)
+            return value
+
+        reader = asyncio.create_task(cache.get_or_load_fields("content", "c1", ["audio_data"], load))
+        await asyncio.sleep(0.01)
+        row["audio_data"] = "new"
+        cache.invalidate("c1")
+
+        assert (await reader)["audio_data"] == "old"
+        assert (await cache.get_or_load_fields("content", "c1", ["audio_data"], load))["audio_data"] == "new"
+
+    asyncio.run(run())
+
+
+def test_ttl_hit_without_invalidation():
+    async def run():
+        cache = ReadThroughCache(ttl_seconds=60)
+        loads = []
+
+        async def load():
+            loads.append(1)
+            return {"status": "pending"}
+
+        await cache.get_or_load(("campaign", "c1"), load)
+        await cache.get_or_load(("campaign", "c1"), load)
+        assert len(loads) == 1
+        assert cache.stats["ttl_hits"] == 1
+
+    asyncio.run(run())
@@ -0,0 +1,37 @@
+"""
+Tests for token_cache.TokenCache
+Revocation rounds only pick tokens used since their last check, newest first, up to the limit
+"""
+
+import time
+from token_cache import TokenCache
+
+
+def _cache_with(count: int) -> TokenCache:
+    cache = TokenCache()
+    for index in range(count):
+        cache.put(f"token-{index}", {"user_id": str(index)}, time.time() + 3600)
+    return cache
+
+
+def test_fresh_tokens_are_not_due():
+    assert _cache_with(3).claim_for_check(10) == []
+
+
+def test_used_tokens_are_claimed_once_newest_first():
+    cache = _cache_with(5)
+    time.sleep(0.01)
+    for index in (1, 3, 4):
+        cache.get(f"token-{index}")
+
+    assert cache.claim_for_check(2) == ["token-4", "token-3"]
+    assert cache.claim_for_check(2) == ["token-1"]
+    assert cache.claim_for_check(2) == []
+
+
+def test_expired_tokens_are_not_claimed():
+    cache = TokenCache()
+    cache.put("token", {"user_id": "1"}, time.time() + 0.02)
+    cache.get("token")
+    time.sleep(0.03)
+    assert cache.claim_for_check(10) == []
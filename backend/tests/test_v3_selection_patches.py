@@ -0,0 +1,89 @@
+"""
+SQL tests for migrations/004_v3_selection_patches.sql
+Run against a scratch schema in TEST_DATABASE_URL (any Postgres); skipped when it is not set
+"""
+
+import os
+import json
+import uuid
+import asyncio
+import pytest
+
+asyncpg = pytest.importorskip("asyncpg")
+
+DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+MIGRATION = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "migrations", "004_v3_selection_patches.sql")
+
+pytestmark = pytest.mark.skipif(not DATABASE_URL, reason="TEST_DATABASE_URL not set")
+
+CAMPAIGN_ID = uuid.UUID("00000000-0000-0000-0000-000000000001")
+
+
+async def _with_schema(test):
+    """Run test(conn) with the migration applied in a throwaway schema"""
+    conn = await asyncpg.connect(DATABASE_URL)
+    schema = f"test_selection_{uuid.uuid4().hex[:12]}"
+    try:
+        await conn.execute(f"CREATE SCHEMA {schema}; SET search_path TO {schema}")
+        await conn.execute(
+            "CREATE TABLE video_ads_v3_campaign_content ("
+            "campaign_id uuid PRIMARY KEY, selected_angles jsonb, selected_hooks jsonb, "
+            "selected_scripts jsonb, updated_at timestamptz)"
+        )
+        with open(MIGRATION) as f:
+            await conn.execute(f.read())
+        await test(conn)
+    finally:
+        await conn.execute(f"DROP SCHEMA {schema} CASCADE")
+        await conn.close()
+
+
+async def _patch(conn, column, add=(), remove=(), set_items=(), campaign_id=CAMPAIGN_ID):
+    return await conn.fetchval(
+        "SELECT patch_v3_selection($1, $2, $3::jsonb, $4::jsonb, $5::jsonb)",
+        campaign_id, column, json.dumps(list(add)), json.dumps(list(remove)), json.dumps(list(set_items))
+    )
+
+
+async def _selection(conn, column):
+    return json.loads(await conn.fetchval(
+        f"SELECT {column}::text FROM video_ads_v3_campaign_content WHERE campaign_id = $1", CAMPAIGN_ID
+    ))
+
+
+def test_patch_existing_row():
+    async def test(conn):
+        await conn.execute(
+            "INSERT INTO video_ads_v3_campaign_content (campaign_id, selected_hooks) VALUES ($1, $2::jsonb)",
+            CAMPAIGN_ID, json.dumps([{"id": 1, "selected": True}, {"id": 2}])
+        )
+        count = await _patch(conn, "selected_hooks", add=[{"id": 3}, {"id": 1}], remove=[2],
+                             set_items=[{"id": 1, "selected": False}])
+        assert count == 2
+        assert await _selection(conn, "selected_hooks") == [{"id": 1, "selected": False}, {"id": 3}]
+
+    asyncio.run(_with_schema(test))
+
+
+def test_patch_null_column():
+    async def test(conn):
+        await conn.execute("INSERT INTO video_ads_v3_campaign_content (campaign_id) VALUES ($1)", CAMPAIGN_ID)
+        assert await _patch(conn, "selected_angles", add=["a1", "a2", "a1"]) == 2
+        assert await _selection(conn, "selected_angles") == ["a1", "a2"]
+
+    asyncio.run(_with_schema(test))
+
+
+def test_missing_campaign_returns_null():
+    async def test(conn):
+        assert await _patch(conn, "selected_scripts", add=[{"id": 1}], campaign_id=uuid.uuid4()) is None
+
+    asyncio.run(_with_schema(test))
+
+
+def test_rejects_other_columns():
+    async def test(conn):
+        with pytest.raises(asyncpg.RaiseError):
+            await _patch(conn, "hooks", add=[{"id": 1}])
+
+    asyncio.run(_with_schema(test))
@@ -0,0 +1,109 @@
+"""
+Verified Token Cache
+LRU of authenticated users keyed by token hash, each entry valid until the token's exp
+"""
+
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+
+def token_hash(token: str) -> str:
+    """Cache key for a bearer token (raw tokens are only kept for revocation checks)"""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class _Entry:
+    """One cached token; used_at / checked_at drive the revocation checks"""
+
+    __slots__ = ("expires_at", "token", "user", "used_at", "checked_at")
+
+    def __init__(self, expires_at: float, token: str, user: Dict[str, Any], now: float):
+        self.expires_at = expires_at
+        self.token = token
+        self.user = user
+        self.used_at = now
+        self.checked_at = now
+
+
+class TokenCache:
+    """
+    Holds the user returned by verify_token for tokens whose signature and claims were
+    already checked. Entries expire at the token's exp claim, or after max_ttl_seconds
+    when that is set (0 = trust the token for its whole lifetime).
+    """
+
+    def __init__(self, max_entries: int = 4096, max_ttl_seconds: float = 0):
+        self.max_entries = max(1, max_entries)
+        self.max_ttl_seconds = max_ttl_seconds
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "revoked": 0}
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        """Cached user for token (a copy), or None"""
+        key = token_hash(token)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            if entry.expires_at <= now:
+                del self._entries[key]
+                self.stats["expired"] += 1
+                return None
+            entry.used_at = now
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return dict(entry.user)
+
+    def put(self, token: str, user: Dict[str, Any], exp: Optional[float]):
+        """Cache user until exp; tokens without exp are only cached with max_ttl_seconds set"""
+        now = time.time()
+        expires_at = exp or 0
+        if self.max_ttl_seconds > 0:
+            ttl_bound = now + self.max_ttl_seconds
+            expires_at = min(expires_at, ttl_bound) if expires_at else ttl_bound
+        if expires_at <= now:
+            return
+        with self._lock:
+            self._entries[token_hash(token)] = _Entry(expires_at, token, dict(user), now)
+            self._entries.move_to_end(token_hash(token))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def claim_for_check(self, limit: int) -> List[str]:
+        """
+        Up to limit unexpired tokens used since they were last verified, most recently used
+        first, marked as checked now. Tokens left over stay due for the next round.
+        """
+        now = time.time()
+        tokens = []
+        with self._lock:
+            # LRU order: the most recently used entries are at the end
+            for entry in reversed(self._entries.values()):
+                if len(tokens) >= limit:
+                    break
+                if entry.expires_at > now and entry.used_at > entry.checked_at:
+                    entry.checked_at = now
+                    tokens.append(entry.token)
+        return tokens
+
+    def revoke(self, token: str):
+        with self._lock:
+            if self._entries.pop(token_hash(token), None) is not None:
+                self.stats["revoked"] += 1
+
+    def prune(self):
+        """Drop expired entries"""
+        now = time.time()
+        with self._lock:
+            for key in [key for key, entry in self._entries.items() if entry.expires_at <= now]:
+                del self._entries[key]
+                self.stats["expired"] += 1
+
+    def size(self) -> int:
+        return len(self._entries)
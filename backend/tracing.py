@@ -0,0 +1,300 @@
+"""
+Tracing for the generation pipeline
+Nested spans (request, phase, Claude call, DB query, S3 upload, Hedra poll) exported as OTLP/JSON
+"""
+
+import os
+import json
+import time
+import atexit
+import random
+import hashlib
+import asyncio
+import functools
+import threading
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+from dotenv import load_dotenv
+import request_context
+from app_metrics import app_metrics
+
+load_dotenv()
+
+# Request-context fields copied onto every span, so traces can be filtered per campaign / user
+CONTEXT_ATTRIBUTES = {"campaign_id": "campaign.id", "user_id": "user.id"}
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+class Span:
+    """One timed operation; parent/child links come from the span current when it started"""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_span_id", "kind", "start_ns", "end_ns",
+                 "attributes", "error", "sampled")
+
+    def __init__(self, name: str, trace_id: str, parent_span_id: Optional[str], kind: int,
+                 attributes: Dict[str, Any], sampled: bool):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_span_id = parent_span_id
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = attributes
+        self.error = None
+        self.sampled = sampled
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def set_attributes(self, **attributes):
+        self.attributes.update(attributes)
+
+    def record_error(self, error: BaseException):
+        self.error = f"{type(error).__name__}: {error}"
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_otlp_attribute(key, value) for key, value in self.attributes.items() if value is not None],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        if self.parent_span_id:
+            span["parentSpanId"] = self.parent_span_id
+        return span
+
+
+class Tracer:
+    """
+    span() is a context manager usable in sync and async code; children started inside it
+    (including in tasks and asyncio.to_thread calls) are linked to it. Spans only start a
+    new trace when root=True (the request middleware, background jobs); otherwise they are
+    recorded only under an existing span. Sampling is decided once per trace.
+    CLIENT spans (outbound calls) are also timed into app_metrics, traced or not.
+
+    Finished spans are batched by a background thread and written as OTLP/JSON
+    (ExportTraceServiceRequest) lines to export_file and/or POSTed to otlp_endpoint
+    (e.g. http://collector:4318/v1/traces). Tracing is off when neither is configured.
+    """
+
+    # OTLP span kinds
+    INTERNAL, SERVER, CLIENT = 1, 2, 3
+
+    def __init__(self, service_name: str, export_file: str = None, otlp_endpoint: str = None,
+                 sample_rate: float = 1.0, batch_size: int = 256, flush_interval: float = 5, max_queue: int = 20000):
+        self.service_name = service_name
+        self.export_file = export_file
+        self.otlp_endpoint = otlp_endpoint
+        self.sample_rate = sample_rate
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enabled = bool(export_file or otlp_endpoint)
+        self.stats = {"spans": 0, "exported": 0, "dropped": 0, "export_errors": 0}
+
+        self._finished: deque = deque(maxlen=max_queue)
+        self._wake = threading.Event()
+        self._stopping = False
+        self._http = None
+        if self.enabled:
+            self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    @contextmanager
+    def span(self, name: str, kind: int = INTERNAL, root: bool = False, **attributes):
+        if kind != Tracer.CLIENT:
+            with self._span(name, kind, root, attributes) as span:
+                yield span
+            return
+
+        # Outbound calls also feed the /metrics latency histograms, whether or not they are traced
+        start = time.perf_counter()
+        error = False
+        try:
+            with self._span(name, kind, root, attributes) as span:
+                yield span
+        except BaseException:
+            error = True
+            raise
+        finally:
+            app_metrics.observe_external_call(name, time.perf_counter() - start, error=error)
+
+    @contextmanager
+    def _span(self, name: str, kind: int, root: bool, attributes: Dict[str, Any]):
+        parent = _current_span.get()
+        if not self.enabled or (parent is None and not root) or (parent is not None and not parent.sampled):
+            yield _NOOP_SPAN
+            return
+
+        if parent is not None:
+            trace_id, parent_id, sampled = parent.trace_id, parent.span_id, True
+        else:
+            trace_id, parent_id = _otlp_trace_id(request_context.current_trace_id()), None
+            sampled = random.random() < self.sample_rate
+
+        context = request_context.get_context()
+        for field, key in CONTEXT_ATTRIBUTES.items():
+            if context.get(field) and key not in attributes:
+                attributes[key] = context[field]
+
+        span = Span(name, trace_id, parent_id, kind, attributes, sampled)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_error(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            self._finish(span)
+
+    def record_span(self, name: str, duration_ms: float, error: bool = False, kind: int = CLIENT, **attributes):
+        """Add an already-timed child span that ended now (e.g. a database query)"""
+        parent = _current_span.get()
+        if not self.enabled or parent is None or not parent.sampled:
+            return
+        span = Span(name, parent.trace_id, parent.span_id, kind, attributes, True)
+        span.end_ns = time.time_ns()
+        span.start_ns = span.end_ns - int(duration_ms * 1_000_000)
+        if error:
+            span.error = "error"
+        self._finish(span, ended=True)
+
+    def current_span(self) -> Optional[Span]:
+        return _current_span.get()
+
+    def backlog(self) -> int:
+        """Finished spans waiting for export"""
+        return len(self._finished)
+
+    def close(self):
+        """Export everything still queued (application shutdown)"""
+        if not self.enabled or self._stopping:
+            return
+        self._stopping = True
+        self._wake.set()
+        self._thread.join(10)
+
+    def _finish(self, span: Span, ended: bool = False):
+        if not ended:
+            span.end_ns = time.time_ns()
+        if not span.sampled:
+            return
+        self.stats["spans"] += 1
+        if len(self._finished) == self._finished.maxlen:
+            self.stats["dropped"] += 1
+        self._finished.append(span)
+        if len(self._finished) >= self.batch_size:
+            self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            while self._finished:
+                batch = []
+                while self._finished and len(batch) < self.batch_size:
+                    batch.append(self._finished.popleft())
+                self._export(batch)
+            if self._stopping:
+                return
+
+    def _export(self, spans: List[Span]):
+        request = {
+            "resourceSpans": [{
+                "resource": {"attributes": [
+                    _otlp_attribute("service.name", self.service_name),
+                    _otlp_attribute("process.pid", os.getpid()),
+                ]},
+                "scopeSpans": [{"scope": {"name": "audiencelab.tracing"}, "spans": [span.to_otlp() for span in spans]}],
+            }]
+        }
+        try:
+            body = json.dumps(request, default=str)
+            if self.export_file:
+                with open(self.export_file, "a", encoding="utf-8") as f:
+                    f.write(body + "\n")
+            if self.otlp_endpoint:
+                if self._http is None:
+                    import httpx
+                    self._http = httpx.Client(timeout=10)
+                self._http.post(self.otlp_endpoint, content=body, headers={"Content-Type": "application/json"}).raise_for_status()
+            self.stats["exported"] += len(spans)
+        except Exception as e:
+            self.stats["export_errors"] += 1
+            print(f"⚠️ Trace export failed ({len(spans)} spans): {e}")
+
+
+class _NoopSpan:
+    """Returned when a span is not recorded; accepts and ignores attributes"""
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def set_attributes(self, **attributes):
+        pass
+
+    def record_error(self, error: BaseException):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def traced(name: str = None, kind: int = Tracer.INTERNAL):
+    """Decorator: run the function (sync or async) inside a child span"""
+    def decorator(fn):
+        span_name = name or fn.__qualname__
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with tracer.span(span_name, kind=kind):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with tracer.span(span_name, kind=kind):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _otlp_trace_id(trace_id: Optional[str]) -> str:
+    """OTLP needs 32 hex chars; reuse the request's trace id when it has that form"""
+    if trace_id and len(trace_id) == 32:
+        try:
+            int(trace_id, 16)
+            return trace_id.lower()
+        except ValueError:
+            pass
+    if trace_id:
+        return hashlib.sha256(trace_id.encode()).hexdigest()[:32]
+    return os.urandom(16).hex()
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+tracer = Tracer(
+    os.getenv("TRACE_SERVICE_NAME", "audiencelab-backend"),
+    export_file=os.getenv("TRACE_EXPORT_FILE") or None,
+    otlp_endpoint=os.getenv("TRACE_OTLP_ENDPOINT") or None,
+    sample_rate=float(os.getenv("TRACE_SAMPLE_RATE", "1.0")),
+    flush_interval=float(os.getenv("TRACE_FLUSH_SECONDS", "5"))
+)
@@ -942,6 +942,11 @@ async def create_scripts(
 # ElevenLabs Integration
 import base64
 from actor_images_config import ACTOR_IMAGES
+from singleflight import SingleFlight
+from tracing import tracer, traced, Tracer
+
+# Voice-list lookups arriving together (e.g. several tabs on the voice step) share one fetch
+voice_flights = SingleFlight("elevenlabs_voices")
 
 # ElevenLabs API configuration
 ELEVENLABS_API_URL = "https://api.elevenlabs.io/v1"
@@ -953,7 +958,7 @@ supabase_error = None
 
 try:
     print("🔍 Starting Supabase initialization for voice caching...")
-    from supabase import create_client
+    from supabase_client import get_supabase_client
     
     supabase_url = os.getenv("SUPABASE_URL")
     supabase_key = os.getenv("SUPABASE_SERVICE_KEY")
@@ -972,7 +977,7 @@ try:
         print("🔄 Attempting to create Supabase client...")
         try:
             # Try simple client creation first
-            supabase = create_client(supabase_url, supabase_key)
+            supabase = get_supabase_client("service")
             print("✅ Supabase client created successfully")
             
             # Test the connection by attempting a simple query
@@ -1239,6 +1244,10 @@ def get_mock_voices():
     return mock_voices
 
 async def fetch_elevenlabs_voices():
+    """Voice list; concurrent callers share one fetch"""
+    return await voice_flights.do("voices", _fetch_elevenlabs_voices)
+
+async def _fetch_elevenlabs_voices():
     """Database-first voice fetching - get from DB, fallback to API if needed"""
     # Always get fresh API key
     api_key = os.getenv("ELEVENLABS_API_KEY")
@@ -1272,10 +1281,11 @@ async def fetch_elevenlabs_voices():
         }
         
         print("🔄 Fetching fresh voices from ElevenLabs API...")
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f"{ELEVENLABS_API_URL}/voices", headers=headers, timeout=aiohttp.ClientTimeout(total=30)) as response:
-                response.raise_for_status()
-                voices_data = await response.json()
+        with tracer.span("elevenlabs.list_voices", kind=Tracer.CLIENT):
+            async with aiohttp.ClientSession() as session:
+                async with session.get(f"{ELEVENLABS_API_URL}/voices", headers=headers, timeout=aiohttp.ClientTimeout(total=30)) as response:
+                    response.raise_for_status()
+                    voices_data = await response.json()
         voices = []
         current_voice_ids = []
         
@@ -1446,6 +1456,7 @@ async def fetch_elevenlabs_voices():
         # Always fallback to mock voices if there's any error
         return get_mock_voices()
 
+@traced("elevenlabs.voice_preview", kind=Tracer.CLIENT)
 async def generate_voice_preview(voice_id: str, text: str = "Hello, this is a preview of my voice") -> bytes:
     """Generate voice preview using ElevenLabs TTS with timeout"""
     # Always get fresh API key
@@ -1692,28 +1703,29 @@ async def generate_audio_with_elevenlabs(text: str, voice_id: str, audio_type: s
         print(f"🔄 Calling ElevenLabs API for {audio_type}...")
         
         # Call ElevenLabs TTS API - ASYNC VERSION
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                f"{ELEVENLABS_API_URL}/text-to-speech/{voice_id}",
-                headers=headers,
-                json=data,
-                timeout=aiohttp.ClientTimeout(total=30)
-            ) as response:
-                if response.status != 200:
-                    error_text = await response.text()
-                    print(f"❌ ElevenLabs API error: {response.status}")
-                    print(f"❌ Error details: {error_text}")
-                    print(f"❌ Voice ID used: {voice_id}")
-                    print(f"❌ API key used: ***{api_key[-8:]}")
+        with tracer.span("elevenlabs.text_to_speech", kind=Tracer.CLIENT, audio_type=audio_type):
+            async with aiohttp.ClientSession() as session:
+                async with session.post(
+                    f"{ELEVENLABS_API_URL}/text-to-speech/{voice_id}",
+                    headers=headers,
+                    json=data,
+                    timeout=aiohttp.ClientTimeout(total=30)
+                ) as response:
+                    if response.status != 200:
+                        error_text = await response.text()
+                        print(f"❌ ElevenLabs API error: {response.status}")
+                        print(f"❌ Error details: {error_text}")
+                        print(f"❌ Voice ID used: {voice_id}")
+                        print(f"❌ API key used: ***{api_key[-8:]}")
                     
-                    if response.status == 401:
-                        raise HTTPException(status_code=401, detail=f"ElevenLabs authentication failed. Check API key. Voice ID: {voice_id}")
-                    elif response.status == 422:
-                        raise HTTPException(status_code=422, detail=f"Voice ID {voice_id} not found in your ElevenLabs account")
-                    else:
-                        raise HTTPException(status_code=response.status, detail=f"ElevenLabs API error: {error_text}")
+                        if response.status == 401:
+                            raise HTTPException(status_code=401, detail=f"ElevenLabs authentication failed. Check API key. Voice ID: {voice_id}")
+                        elif response.status == 422:
+                            raise HTTPException(status_code=422, detail=f"Voice ID {voice_id} not found in your ElevenLabs account")
+                        else:
+                            raise HTTPException(status_code=response.status, detail=f"ElevenLabs API error: {error_text}")
                 
-                audio_content = await response.read()
+                    audio_content = await response.read()
         
         # Save audio to cache temporarily
         with open(cached_audio_path, 'wb') as f:
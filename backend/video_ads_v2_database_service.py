@@ -10,6 +10,7 @@ from typing import Optional, Dict, List, Any
 from supabase import Client
 import os
 from dotenv import load_dotenv
+from db_backends import create_db_backend
 
 load_dotenv()
 
@@ -17,6 +18,13 @@ class VideoAdsV2DatabaseService:
     def __init__(self, supabase_client: Client):
         """Initialize the database service with a Supabase client"""
         self.db = supabase_client
+        # Async table access: supabase-py off the event loop, or asyncpg when DB_BACKEND=asyncpg
+        self.backend = create_db_backend(supabase_client)
+    
+    async def _select_one(self, table: str, filters: Dict[str, Any]) -> Optional[Dict]:
+        """Select a single row (None when missing)"""
+        result = await self.backend.select(table, "*", filters, limit=1)
+        return result[0] if result else None
     
     # ==================== Campaign Management ====================
     
@@ -30,20 +38,18 @@ class VideoAdsV2DatabaseService:
             "status": "draft"
         }
         
-        result = self.db.table("video_ads_v2_campaigns").insert(data).execute()
-        return result.data[0] if result.data else None
+        result = await self.backend.insert("video_ads_v2_campaigns", data)
+        return result[0] if result else None
     
     async def get_campaign_by_conversation(self, conversation_id: str, user_id: str) -> Optional[Dict]:
         """Get campaign by conversation ID"""
-        result = self.db.table("video_ads_v2_campaigns")\
-            .select("*")\
-            .eq("conversation_id", conversation_id)\
-            .eq("user_id", user_id)\
-            .execute()
+        result = await self.backend.select(
+            "video_ads_v2_campaigns", "*", {"conversation_id": conversation_id, "user_id": user_id}
+        )
         
         # Return first result if exists, otherwise None
-        if result.data and len(result.data) > 0:
-            return result.data[0]
+        if result and len(result) > 0:
+            return result[0]
         return None
     
     async def update_campaign_step(self, campaign_id: str, step: int, status: str = "in_progress") -> Dict:
@@ -53,23 +59,31 @@ class VideoAdsV2DatabaseService:
             "status": status
         }
         
-        result = self.db.table("video_ads_v2_campaigns")\
-            .update(data)\
-            .eq("id", campaign_id)\
-            .execute()
+        result = await self.backend.update("video_ads_v2_campaigns", data, {"id": campaign_id})
         
-        return result.data[0] if result.data else None
+        return result[0] if result else None
     
     async def get_user_campaigns(self, user_id: str, limit: int = 50, offset: int = 0) -> List[Dict]:
         """Get all campaigns for a user"""
-        result = self.db.table("video_ads_v2_campaigns")\
-            .select("*, video_ads_v2_product_info(product_data)")\
-            .eq("user_id", user_id)\
-            .order("created_at", desc=True)\
-            .range(offset, offset + limit - 1)\
-            .execute()
-        
-        return result.data if result.data else []
+        campaigns = await self.backend.select(
+            "video_ads_v2_campaigns", "*", {"user_id": user_id},
+            order_by="created_at", desc=True, limit=limit, offset=offset
+        )
+        if not campaigns:
+            return []
+        
+        # Attach product info in the same nested shape PostgREST embedding returned
+        product_rows = await self.backend.select(
+            "video_ads_v2_product_info", "campaign_id, product_data",
+            in_filters={"campaign_id": [campaign["id"] for campaign in campaigns]}
+        )
+        products_by_campaign = {}
+        for row in product_rows:
+            products_by_campaign.setdefault(row["campaign_id"], []).append({"product_data": row["product_data"]})
+        for campaign in campaigns:
+            campaign["video_ads_v2_product_info"] = products_by_campaign.get(campaign["id"], [])
+        
+        return campaigns
     
     # ==================== Product Info (Step 1-2) ====================
     
@@ -83,25 +97,19 @@ class VideoAdsV2DatabaseService:
         }
         
         # Upsert (insert or update based on campaign_id)
-        result = self.db.table("video_ads_v2_product_info")\
-            .upsert(data, on_conflict="campaign_id")\
-            .execute()
+        result = await self.backend.upsert("video_ads_v2_product_info", data, on_conflict="campaign_id")
         
-        return result.data[0] if result.data else None
+        return result[0] if result else None
     
     async def get_product_info(self, campaign_id: str) -> Optional[Dict]:
         """Get product info for a campaign"""
-        result = self.db.table("video_ads_v2_product_info")\
-            .select("*")\
-            .eq("campaign_id", campaign_id)\
-            .single()\
-            .execute()
+        result = await self.backend.select("video_ads_v2_product_info", "*", {"campaign_id": campaign_id})
         
-        if result.data:
+        if result:
             return {
-                "url": result.data.get("url"),
-                "source": result.data.get("source"),
-                **result.data.get("product_data", {})
+                "url": result[0].get("url"),
+                "source": result[0].get("source"),
+                **(result[0].get("product_data") or {})
             }
         return None
     
@@ -123,32 +131,23 @@ class VideoAdsV2DatabaseService:
             "claude_model": claude_model
         }
         
-        result = self.db.table("video_ads_v2_marketing_analysis")\
-            .upsert(data, on_conflict="campaign_id")\
-            .execute()
+        result = await self.backend.upsert("video_ads_v2_marketing_analysis", data, on_conflict="campaign_id")
         
-        return result.data[0] if result.data else None
+        return result[0] if result else None
     
     async def get_marketing_analysis(self, campaign_id: str) -> Optional[Dict]:
         """Get marketing analysis for a campaign"""
-        result = self.db.table("video_ads_v2_marketing_analysis")\
-            .select("*")\
-            .eq("campaign_id", campaign_id)\
-            .single()\
-            .execute()
+        result = await self.backend.select("video_ads_v2_marketing_analysis", "*", {"campaign_id": campaign_id})
         
-        return result.data if result.data else None
+        return result[0] if result else None
     
     async def update_selected_angles(self, campaign_id: str, selected_angles: List[Dict]) -> Dict:
         """Update only the selected angles"""
         data = {"selected_angles": selected_angles}
         
-        result = self.db.table("video_ads_v2_marketing_analysis")\
-            .update(data)\
-            .eq("campaign_id", campaign_id)\
-            .execute()
+        result = await self.backend.update("video_ads_v2_marketing_analysis", data, {"campaign_id": campaign_id})
         
-        return result.data[0] if result.data else None
+        return result[0] if result else None
     
     # ==================== Hooks (Step 4) ====================
     
@@ -163,32 +162,23 @@ class VideoAdsV2DatabaseService:
             "processing_time_ms": processing_time_ms
         }
         
-        result = self.db.table("video_ads_v2_hooks")\
-            .upsert(data, on_conflict="campaign_id")\
-            .execute()
+        result = await self.backend.upsert("video_ads_v2_hooks", data, on_conflict="campaign_id")
         
-        return result.data[0] if result.data else None
+        return result[0] if result else None
     
     async def get_hooks(self, campaign_id: str) -> Optional[Dict]:
         """Get hooks for a campaign"""
-        result = self.db.table("video_ads_v2_hooks")\
-            .select("*")\
-            .eq("campaign_id", campaign_id)\
-            .single()\
-            .execute()
+        result = await self.backend.select("video_ads_v2_hooks", "*", {"campaign_id": campaign_id})
         
-        return result.data if result.data else None
+        return result[0] if result else None
     
     async def update_selected_hooks(self, campaign_id: str, selected_hooks: List[Dict]) -> Dict:
         """Update only the selected hooks"""
         data = {"selected_hooks": selected_hooks}
         
-        result = self.db.table("video_ads_v2_hooks")\
-            .update(data)\
-            .eq("campaign_id", campaign_id)\
-            .execute()
+        result = await self.backend.update("video_ads_v2_hooks", data, {"campaign_id": campaign_id})
         
-        return result.data[0] if result.data else None
+        return result[0] if result else None
     
     # ==================== Scripts (Step 5) ====================
     
@@ -203,32 +193,23 @@ class VideoAdsV2DatabaseService:
             "processing_time_ms": processing_time_ms
         }
         
-        result = self.db.table("video_ads_v2_scripts")\
-            .upsert(data, on_conflict="campaign_id")\
-            .execute()
+        result = await self.backend.upsert("video_ads_v2_scripts", data, on_conflict="campaign_id")
         
-        return result.data[0] if result.data else None
+        return result[0] if result else None
     
     async def get_scripts(self, campaign_id: str) -> Optional[Dict]:
         """Get scripts for a campaign"""
-        result = self.db.table("video_ads_v2_scripts")\
-            .select("*")\
-            .eq("campaign_id", campaign_id)\
-            .single()\
-            .execute()
+        result = await self.backend.select("video_ads_v2_scripts", "*", {"campaign_id": campaign_id})
         
-        return result.data if result.data else None
+        return result[0] if result else None
     
     async def update_selected_scripts(self, campaign_id: str, selected_scripts: List[Dict]) -> Dict:
         """Update only the selected scripts"""
         data = {"selected_scripts": selected_scripts}
         
-        result = self.db.table("video_ads_v2_scripts")\
-            .update(data)\
-            .eq("campaign_id", campaign_id)\
-            .execute()
+        result = await self.backend.update("video_ads_v2_scripts", data, {"campaign_id": campaign_id})
         
-        return result.data[0] if result.data else None
+        return result[0] if result else None
     
     # ==================== Voice/Actor Selection (Step 6) ====================
     
@@ -240,21 +221,15 @@ class VideoAdsV2DatabaseService:
             "actor_data": actor_data
         }
         
-        result = self.db.table("video_ads_v2_selections")\
-            .upsert(data, on_conflict="campaign_id")\
-            .execute()
+        result = await self.backend.upsert("video_ads_v2_selections", data, on_conflict="campaign_id")
         
-        return result.data[0] if result.data else None
+        return result[0] if result else None
     
     async def get_selections(self, campaign_id: str) -> Optional[Dict]:
         """Get voice and actor selections for a campaign"""
-        result = self.db.table("video_ads_v2_selections")\
-            .select("*")\
-            .eq("campaign_id", campaign_id)\
-            .single()\
-            .execute()
+        result = await self.backend.select("video_ads_v2_selections", "*", {"campaign_id": campaign_id})
         
-        return result.data if result.data else None
+        return result[0] if result else None
     
     # ==================== Media (Steps 7-8) ====================
     
@@ -271,20 +246,39 @@ class VideoAdsV2DatabaseService:
             "processing_time_ms": processing_time_ms
         }
         
-        result = self.db.table("video_ads_v2_media").insert(data).execute()
-        return result.data[0] if result.data else None
+        result = await self.backend.insert("video_ads_v2_media", data)
+        return result[0] if result else None
+    
+    async def save_media_batch(self, campaign_id: str, media_type: str, media: List[Dict]) -> List[Dict]:
+        """
+        Save several audio or video files with one insert
+        Each item has script_id and file_url, optionally file_metadata and processing_time_ms
+        """
+        if not media:
+            return []
+        
+        rows = [
+            {
+                "campaign_id": campaign_id,
+                "media_type": media_type,
+                "script_id": item["script_id"],
+                "file_url": item["file_url"],
+                "file_metadata": item.get("file_metadata") or {},
+                "processing_time_ms": item.get("processing_time_ms")
+            }
+            for item in media
+        ]
+        
+        return await self.backend.insert("video_ads_v2_media", rows)
     
     async def get_media(self, campaign_id: str, media_type: Optional[str] = None) -> List[Dict]:
         """Get media files for a campaign"""
-        query = self.db.table("video_ads_v2_media")\
-            .select("*")\
-            .eq("campaign_id", campaign_id)
+        filters = {"campaign_id": campaign_id}
         
         if media_type:
-            query = query.eq("media_type", media_type)
+            filters["media_type"] = media_type
         
-        result = query.order("created_at").execute()
-        return result.data if result.data else []
+        return await self.backend.select("video_ads_v2_media", "*", filters, order_by="created_at")
     
     # ==================== Campaign Forking ====================
     
@@ -293,141 +287,21 @@ class VideoAdsV2DatabaseService:
         """
         Fork a campaign up to a specific step
         Returns: (new_conversation_id, new_campaign_id)
-        """
-        # 1. Get source campaign
-        source_campaign = self.db.table("video_ads_v2_campaigns")\
-            .select("*")\
-            .eq("id", source_campaign_id)\
-            .eq("user_id", user_id)\
-            .single()\
-            .execute()
-        
-        if not source_campaign.data:
-            raise ValueError("Source campaign not found")
         
-        # 2. Create new campaign
+        The copy runs inside fork_v2_campaign (migrations/003_campaign_fork.sql), so it is
+        a single round trip and either fully happens or not at all.
+        """
         new_conversation_id = str(uuid.uuid4())
-        new_campaign_data = {
-            "user_id": user_id,
-            "conversation_id": new_conversation_id,
-            "parent_campaign_id": source_campaign_id,
-            "campaign_name": new_campaign_name or f"{source_campaign.data['campaign_name']} (Copy)",
-            "current_step": up_to_step,
-            "status": "draft"
-        }
-        
-        new_campaign = self.db.table("video_ads_v2_campaigns")\
-            .insert(new_campaign_data)\
-            .execute()
-        
-        if not new_campaign.data:
-            raise ValueError("Failed to create new campaign")
-        
-        new_campaign_id = new_campaign.data[0]["id"]
-        
-        # 3. Copy data based on up_to_step
-        
-        # Copy product info (step 2)
-        if up_to_step >= 2:
-            product_info = self.db.table("video_ads_v2_product_info")\
-                .select("*")\
-                .eq("campaign_id", source_campaign_id)\
-                .single()\
-                .execute()
-            
-            if product_info.data:
-                self.db.table("video_ads_v2_product_info").insert({
-                    "campaign_id": new_campaign_id,
-                    "url": product_info.data["url"],
-                    "product_data": product_info.data["product_data"],
-                    "source": product_info.data["source"]
-                }).execute()
-        
-        # Copy marketing analysis (step 3)
-        if up_to_step >= 3:
-            marketing = self.db.table("video_ads_v2_marketing_analysis")\
-                .select("*")\
-                .eq("campaign_id", source_campaign_id)\
-                .single()\
-                .execute()
-            
-            if marketing.data:
-                self.db.table("video_ads_v2_marketing_analysis").insert({
-                    "campaign_id": new_campaign_id,
-                    "avatar_analysis": marketing.data["avatar_analysis"],
-                    "journey_mapping": marketing.data["journey_mapping"],
-                    "objections_analysis": marketing.data["objections_analysis"],
-                    "angles_generation": marketing.data["angles_generation"],
-                    "selected_angles": marketing.data.get("selected_angles"),
-                    "processing_time_ms": marketing.data.get("processing_time_ms"),
-                    "claude_model": marketing.data.get("claude_model")
-                }).execute()
-        
-        # Copy hooks (step 4)
-        if up_to_step >= 4:
-            hooks = self.db.table("video_ads_v2_hooks")\
-                .select("*")\
-                .eq("campaign_id", source_campaign_id)\
-                .single()\
-                .execute()
-            
-            if hooks.data:
-                self.db.table("video_ads_v2_hooks").insert({
-                    "campaign_id": new_campaign_id,
-                    "hooks_data": hooks.data["hooks_data"],
-                    "selected_hooks": hooks.data.get("selected_hooks"),
-                    "processing_time_ms": hooks.data.get("processing_time_ms")
-                }).execute()
-        
-        # Copy scripts (step 5)
-        if up_to_step >= 5:
-            scripts = self.db.table("video_ads_v2_scripts")\
-                .select("*")\
-                .eq("campaign_id", source_campaign_id)\
-                .single()\
-                .execute()
-            
-            if scripts.data:
-                self.db.table("video_ads_v2_scripts").insert({
-                    "campaign_id": new_campaign_id,
-                    "scripts_data": scripts.data["scripts_data"],
-                    "selected_scripts": scripts.data.get("selected_scripts"),
-                    "processing_time_ms": scripts.data.get("processing_time_ms")
-                }).execute()
-        
-        # Copy selections (step 6)
-        if up_to_step >= 6:
-            selections = self.db.table("video_ads_v2_selections")\
-                .select("*")\
-                .eq("campaign_id", source_campaign_id)\
-                .single()\
-                .execute()
-            
-            if selections.data:
-                self.db.table("video_ads_v2_selections").insert({
-                    "campaign_id": new_campaign_id,
-                    "voice_data": selections.data.get("voice_data"),
-                    "actor_data": selections.data.get("actor_data")
-                }).execute()
-        
-        # Copy media (steps 7-8)
-        if up_to_step >= 7:
-            media = self.db.table("video_ads_v2_media")\
-                .select("*")\
-                .eq("campaign_id", source_campaign_id)\
-                .execute()
-            
-            for media_item in (media.data or []):
-                # Only copy audio for step 7, include video for step 8
-                if media_item["media_type"] == "audio" or up_to_step >= 8:
-                    self.db.table("video_ads_v2_media").insert({
-                        "campaign_id": new_campaign_id,
-                        "media_type": media_item["media_type"],
-                        "script_id": media_item["script_id"],
-                        "file_url": media_item["file_url"],
-                        "file_metadata": media_item.get("file_metadata"),
-                        "processing_time_ms": media_item.get("processing_time_ms")
-                    }).execute()
+        new_campaign_id = await self.backend.rpc("fork_v2_campaign", {
+            "p_source_campaign_id": source_campaign_id,
+            "p_user_id": user_id,
+            "p_up_to_step": up_to_step,
+            "p_conversation_id": new_conversation_id,
+            "p_campaign_name": new_campaign_name
+        })
+        
+        if not new_campaign_id:
+            raise ValueError("Source campaign not found")
         
         return new_conversation_id, new_campaign_id
     
@@ -436,16 +310,12 @@ class VideoAdsV2DatabaseService:
     async def get_complete_campaign_data(self, campaign_id: str) -> Dict:
         """Get all data for a campaign across all tables"""
         # Get campaign
-        campaign = self.db.table("video_ads_v2_campaigns")\
-            .select("*")\
-            .eq("id", campaign_id)\
-            .single()\
-            .execute()
+        campaign = await self._select_one("video_ads_v2_campaigns", {"id": campaign_id})
         
-        if not campaign.data:
+        if not campaign:
             return None
         
-        result = {"campaign": campaign.data}
+        result = {"campaign": campaign}
         
         # Get product info
         product_info = await self.get_product_info(campaign_id)
@@ -70,6 +70,7 @@ router = APIRouter(prefix="/video-ads-v2", tags=["video-ads-v2"])
 
 # Import database service
 from video_ads_v2_database_service import VideoAdsV2DatabaseService
+from video_ads_v3_database_service import v3_db_service
 
 # Initialize workflow manager
 workflow_manager = VideoAdsV2WorkflowManager()
@@ -432,17 +433,14 @@ async def create_marketing_analysis_v2(
         
         # Find conversation ID from active conversations
         conversation_id = None
-        if not request.force_new_conversation:
-            # Only reuse existing conversation if not forcing new one
-            for conv_id, conv_data in workflow_manager.active_conversations.items():
-                if conv_data["state"].user_id == user_id:
-                    conversation_id = conv_id
-                    break
-        else:
-            # For manual uploads, find the most recent conversation (the new one we just created)
-            for conv_id, conv_data in workflow_manager.active_conversations.items():
-                if conv_data["state"].user_id == user_id:
-                    conversation_id = conv_id  # Take the last one found (most recent)
+        user_conversations = workflow_manager.active_conversations.find_by_user(user_id)
+        if user_conversations:
+            if not request.force_new_conversation:
+                # Only reuse existing conversation if not forcing new one
+                conversation_id = user_conversations[0]
+            else:
+                # For manual uploads, take the most recent conversation (the new one we just created)
+                conversation_id = user_conversations[-1]
         
         logger.debug(
             "api.marketing_analysis.conversation_id",
@@ -518,17 +516,14 @@ async def create_marketing_angles_v2(
         
         # Find conversation ID from active conversations
         conversation_id = None
-        if not request.force_new_conversation:
-            # Only reuse existing conversation if not forcing new one
-            for conv_id, conv_data in workflow_manager.active_conversations.items():
-                if conv_data["state"].user_id == user_id:
-                    conversation_id = conv_id
-                    break
-        else:
-            # For manual uploads, find the most recent conversation (the new one we just created)
-            for conv_id, conv_data in workflow_manager.active_conversations.items():
-                if conv_data["state"].user_id == user_id:
-                    conversation_id = conv_id  # Take the last one found (most recent)
+        user_conversations = workflow_manager.active_conversations.find_by_user(user_id)
+        if user_conversations:
+            if not request.force_new_conversation:
+                # Only reuse existing conversation if not forcing new one
+                conversation_id = user_conversations[0]
+            else:
+                # For manual uploads, take the most recent conversation (the new one we just created)
+                conversation_id = user_conversations[-1]
         
         # Save to database if service is available
         if db_service and conversation_id:
@@ -975,37 +970,17 @@ async def save_selected_voice_actor_v2(
         if not voice_info:
             raise HTTPException(status_code=400, detail="voice_info is required")
         
-        # Use supabase directly to update the V3 campaign content table
-        # Store in audio_data column as voice_info
+        # Merge into the existing audio_data through the V3 service: it may be stored
+        # offloaded, and writes must invalidate the V3 row cache
         try:
-            # First check if campaign exists in v3 table
-            result = supabase.table('video_ads_v3_campaign_content').select('*').eq('campaign_id', campaign_id).execute()
+            content = await v3_db_service.get_campaign_content(campaign_id, fields=["audio_data"])
+            audio_data = (content or {}).get("audio_data") or {}
+            audio_data['voice_info'] = voice_info
             
-            if result.data:
-                # Update existing record - merge with existing audio_data
-                existing_audio_data = result.data[0].get('audio_data', {}) or {}
-                existing_audio_data['voice_info'] = voice_info
-                
-                update_result = supabase.table('video_ads_v3_campaign_content').update({
-                    'audio_data': existing_audio_data,
-                    'updated_at': 'now()'
-                }).eq('campaign_id', campaign_id).execute()
-                
-                if update_result.data:
-                    logger.info("voice_actor.save.v2.success", 
-                               f"Updated voice/actor selection in V3 table for campaign: {campaign_id}")
-            else:
-                # Create new record
-                insert_result = supabase.table('video_ads_v3_campaign_content').insert({
-                    'campaign_id': campaign_id,
-                    'audio_data': {'voice_info': voice_info},
-                    'created_at': 'now()',
-                    'updated_at': 'now()'
-                }).execute()
-                
-                if insert_result.data:
-                    logger.info("voice_actor.save.v2.success", 
-                               f"Created new V3 record with voice/actor selection for campaign: {campaign_id}")
+            if not await v3_db_service.update_campaign_content(campaign_id, {'audio_data': audio_data}):
+                raise Exception("V3 campaign content update failed")
+            logger.info("voice_actor.save.v2.success", 
+                       f"Saved voice/actor selection in V3 table for campaign: {campaign_id}")
         except Exception as db_error:
             logger.error("voice_actor.save.v2.db_error", 
                         f"Database error: {db_error}")
@@ -1154,19 +1129,23 @@ async def generate_audio_v2(
                     )
                     
                     # Save audio files
-                    for script_audio in scripts_with_audio:
-                        if script_audio.combined_audio:
-                            await db_service.save_media(
-                                campaign_id=campaign['id'],
-                                media_type='audio',
-                                script_id=script_audio.script_id,
-                                file_url=script_audio.combined_audio.audio_url,
-                                file_metadata={
+                    await db_service.save_media_batch(
+                        campaign_id=campaign['id'],
+                        media_type='audio',
+                        media=[
+                            {
+                                'script_id': script_audio.script_id,
+                                'file_url': script_audio.combined_audio.audio_url,
+                                'file_metadata': {
                                     'duration': script_audio.combined_audio.duration,
                                     'file_size': script_audio.combined_audio.file_size,
                                     'voice_settings': script_audio.combined_audio.voice_settings
                                 }
-                            )
+                            }
+                            for script_audio in scripts_with_audio
+                            if script_audio.combined_audio
+                        ]
+                    )
                     
                     # Update selected scripts in database
                     selected_scripts = []
@@ -1322,21 +1301,25 @@ async def generate_video_v2(
                 
                 if campaign:
                     # Save video files
-                    for video in generated_videos:
-                        await db_service.save_media(
-                            campaign_id=campaign['id'],
-                            media_type='video',
-                            script_id=video.script_id,
-                            file_url=video.video_url,
-                            file_metadata={
-                                'thumbnail_url': video.thumbnail_url,
-                                'duration': video.duration,
-                                'file_size': video.file_size,
-                                'status': video.status,
-                                'processing_time': video.processing_time
-                            },
-                            processing_time_ms=int(video.processing_time * 1000) if video.processing_time else None
-                        )
+                    await db_service.save_media_batch(
+                        campaign_id=campaign['id'],
+                        media_type='video',
+                        media=[
+                            {
+                                'script_id': video.script_id,
+                                'file_url': video.video_url,
+                                'file_metadata': {
+                                    'thumbnail_url': video.thumbnail_url,
+                                    'duration': video.duration,
+                                    'file_size': video.file_size,
+                                    'status': video.status,
+                                    'processing_time': video.processing_time
+                                },
+                                'processing_time_ms': int(video.processing_time * 1000) if video.processing_time else None
+                            }
+                            for video in generated_videos
+                        ]
+                    )
                     
                     # Update campaign step to completed
                     await db_service.update_campaign_step(campaign['id'], 8, status='completed')
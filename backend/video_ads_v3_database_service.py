@@ -5,16 +5,63 @@ Handles all database operations for V3 tables with stateless design
 
 import json
 import uuid
-from typing import Optional, Dict, Any, List
+import base64
+from typing import Optional, Dict, Any, List, Tuple
 from datetime import datetime
-import asyncpg
-import asyncio
-from supabase import create_client, Client
+from supabase import Client
 import os
 from dotenv import load_dotenv
+from db_backends import create_db_backend
+from supabase_client import get_supabase_client
+from read_cache import ReadThroughCache
+from write_buffer import WriteBehindBuffer
+from content_offload import ContentOffloader
+from s3_service import s3_service
 
 load_dotenv()
 
+CAMPAIGNS_TABLE = "video_ads_v3_campaigns"
+CONTENT_TABLE = "video_ads_v3_campaign_content"
+VIDEOS_TABLE = "video_ads_v3_videos"
+HOOKS_TABLE = "video_ads_v3_campaign_hooks"
+SCRIPTS_TABLE = "video_ads_v3_campaign_scripts"
+
+# Postgres functions (see backend/migrations)
+UPSERT_CONTENT_FUNCTION = "upsert_v3_campaign_content"
+CAMPAIGN_SUMMARIES_FUNCTION = "list_v3_campaign_summaries"
+PATCH_SELECTION_FUNCTION = "patch_v3_selection"
+SYNC_ITEMS_FUNCTION = "sync_v3_campaign_items"
+UPDATE_ITEM_FUNCTION = "update_v3_campaign_item"
+
+LIST_COLUMNS = "campaign_id, campaign_name, current_step, status, created_at, updated_at"
+
+# Campaign columns whose updates may be buffered and merged (progress bookkeeping only);
+# status changes are phase boundaries and are always written right away
+DEFERRABLE_CAMPAIGN_FIELDS = {"current_step", "error_message", "updated_at"}
+
+CONTENT_FIELDS = (
+    "id", "campaign_id", "product_data", "avatar_analysis", "journey_mapping", "objections_analysis",
+    "angles", "selected_angles", "hooks", "selected_hooks", "scripts", "selected_scripts",
+    "audio_data", "video_data", "created_at", "updated_at"
+)
+CONTENT_COLUMNS = ", ".join(CONTENT_FIELDS)
+
+# User selections; updated in place by patch_selection()
+SELECTION_FIELDS = ("selected_angles", "selected_hooks", "selected_scripts")
+
+# Per-item rows of the hooks / scripts documents: kind -> (table, id column, item column, document column, order)
+CONTENT_ITEMS = {
+    "hook": (HOOKS_TABLE, "hook_id", "hook", "hooks", ["angle_position", "category", "position"]),
+    "script": (SCRIPTS_TABLE, "script_id", "script", "scripts", ["angle_position", "hook_position", "position"]),
+}
+
+# Multi-hundred-KB JSON columns; only fetched when a caller asks for them
+HEAVY_CONTENT_FIELDS = ("hooks", "scripts", "audio_data", "video_data")
+
+# Columns that may be stored in S3 behind a pointer when large; none of them is read by SQL
+# (hooks/scripts feed the counts and item rows, product_data the campaign summaries)
+OFFLOADABLE_CONTENT_FIELDS = ("avatar_analysis", "journey_mapping", "objections_analysis", "angles", "audio_data", "video_data")
+
 
 class VideoAdsV3DatabaseService:
     """Service for managing V3 video ads campaign data in Supabase"""
@@ -22,19 +69,56 @@ class VideoAdsV3DatabaseService:
     def __init__(self):
         self.supabase_url = os.getenv("SUPABASE_URL")
         self.supabase_key = os.getenv("SUPABASE_ANON_KEY")
+        self.supabase: Optional[Client] = get_supabase_client()
+        
+        # Async table access: supabase-py off the event loop, or asyncpg when DB_BACKEND=asyncpg
+        self.backend = create_db_backend(self.supabase)
+        self._content_upsert_rpc = os.getenv("V3_CONTENT_UPSERT_RPC", "true").lower() == "true"
+        self._summaries_rpc = os.getenv("V3_CAMPAIGN_SUMMARIES_RPC", "true").lower() == "true"
+        self._selection_patch_rpc = os.getenv("V3_SELECTION_PATCH_RPC", "true").lower() == "true"
+        self._content_items = os.getenv("V3_CONTENT_ITEMS", "true").lower() == "true"
+        
+        # Campaign/content rows: memoized per request; V3_CACHE_TTL_SECONDS > 0 also shares them across requests
+        self.cache = ReadThroughCache(
+            ttl_seconds=float(os.getenv("V3_CACHE_TTL_SECONDS", "0")),
+            max_entries=int(os.getenv("V3_CACHE_MAX_ENTRIES", "1024")),
+            name="v3_rows"
+        )
         
-        if not self.supabase_url or not self.supabase_key:
+        # Step updates issued within the window are merged into one UPDATE, or into the next
+        # status write (0 = write-through); writes that raise are retried a few times
+        self.campaign_writes = WriteBehindBuffer(
+            self._write_campaign,
+            window_seconds=float(os.getenv("V3_CAMPAIGN_WRITE_WINDOW_SECONDS", "0.5"))
+        )
+        
+        # Generated documents of V3_OFFLOAD_THRESHOLD_KB or more go to S3 (0 = always inline)
+        self.offloader = ContentOffloader(
+            s3_service,
+            threshold_bytes=int(float(os.getenv("V3_OFFLOAD_THRESHOLD_KB", "256")) * 1024),
+            compression=os.getenv("V3_OFFLOAD_COMPRESSION", "zstd"),
+            cache_max_bytes=int(float(os.getenv("V3_OFFLOAD_CACHE_MB", "64")) * 1024 * 1024)
+        )
+        
+        if not self.backend:
             print("⚠️ Warning: Supabase credentials not found. Database operations will be disabled.")
-            self.supabase = None
         else:
-            self.supabase: Client = create_client(self.supabase_url, self.supabase_key)
-            print("✅ V3 Database service initialized")
+            print(f"✅ V3 Database service initialized ({self.backend.name})")
+    
+    @property
+    def available(self) -> bool:
+        """Whether a database backend is configured"""
+        return self.backend is not None
+    
+    async def _select_first(self, table: str, columns: str, filters: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        result = await self.backend.select(table, columns, filters)
+        return result[0] if result else None
     
     # ==================== Campaign Management ====================
     
     async def create_campaign(self, user_id: str, campaign_name: str = None, product_url: str = None) -> Dict[str, Any]:
         """Create a new campaign"""
-        if not self.supabase:
+        if not self.backend:
             return None
         
         try:
@@ -49,11 +133,11 @@ class VideoAdsV3DatabaseService:
                 "current_step": 1
             }
             
-            result = self.supabase.table("video_ads_v3_campaigns").insert(data).execute()
+            result = await self.backend.insert(CAMPAIGNS_TABLE, data)
             
-            if result.data:
+            if result:
                 print(f"✅ Created V3 campaign: {campaign_id}")
-                return result.data[0]
+                return result[0]
             
             return None
             
@@ -63,21 +147,24 @@ class VideoAdsV3DatabaseService:
     
     async def get_campaign(self, campaign_id: str, user_id: str = None) -> Optional[Dict[str, Any]]:
         """Get campaign by campaign_id"""
-        if not self.supabase:
+        if not self.backend:
             return None
         
         try:
-            query = self.supabase.table("video_ads_v3_campaigns").select("*").eq("campaign_id", campaign_id)
+            campaign = await self.cache.get_or_load(
+                ("campaign", campaign_id),
+                lambda: self._select_first(CAMPAIGNS_TABLE, "*", {"campaign_id": campaign_id})
+            )
             
-            if user_id:
-                query = query.eq("user_id", user_id)
+            if campaign and user_id and campaign.get("user_id") != user_id:
+                return None
             
-            result = query.execute()
+            # Read-your-writes for buffered status/step updates
+            pending = self.campaign_writes.pending(campaign_id)
+            if campaign and pending:
+                campaign.update(pending)
             
-            if result.data and len(result.data) > 0:
-                return result.data[0]
-            
-            return None
+            return campaign
             
         except Exception as e:
             print(f"❌ Error getting V3 campaign: {e}")
@@ -85,49 +172,210 @@ class VideoAdsV3DatabaseService:
     
     async def get_user_campaigns(self, user_id: str, limit: int = 10) -> List[Dict[str, Any]]:
         """Get user's campaigns, ordered by most recent (optimized for list view)"""
-        if not self.supabase:
+        if not self.backend:
             return []
         
         try:
             # Only select fields needed for the campaigns list view
-            result = self.supabase.table("video_ads_v3_campaigns") \
-                .select("campaign_id, campaign_name, current_step, status, created_at, updated_at") \
-                .eq("user_id", user_id) \
-                .order("created_at", desc=True) \
-                .limit(limit) \
-                .execute()
+            result = await self.backend.select(
+                CAMPAIGNS_TABLE,
+                LIST_COLUMNS,
+                {"user_id": user_id},
+                order_by="created_at",
+                desc=True,
+                limit=limit
+            )
             
-            return result.data if result.data else []
+            return result
             
         except Exception as e:
             print(f"❌ Error getting user campaigns: {e}")
             return []
     
+    async def list_campaign_summaries(
+        self,
+        user_id: str,
+        limit: int = 50,
+        cursor: str = None,
+        offset: int = 0,
+        status: str = None,
+        counts_only: bool = False
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        One page of a user's campaigns for the dashboard listings, newest first.
+        
+        Each summary carries the list columns plus product_data, selections, hook/script/angle
+        counts and (for completed campaigns) videos; with counts_only just the list columns
+        and counts. Returns (summaries, next_cursor); pass next_cursor back to get the
+        following page. Raises ValueError on a malformed cursor.
+        """
+        if not self.backend:
+            return [], None
+        
+        after = decode_campaign_cursor(cursor) if cursor else None
+        
+        summaries = None
+        if self._summaries_rpc:
+            try:
+                rows = await self.backend.rpc(CAMPAIGN_SUMMARIES_FUNCTION, {
+                    "p_user_id": user_id,
+                    "p_limit": limit,
+                    "p_cursor_created_at": after[0] if after else None,
+                    "p_cursor_campaign_id": after[1] if after else None,
+                    "p_status": status,
+                    "p_offset": offset,
+                    "p_counts_only": counts_only
+                })
+                summaries = [row["summary"] for row in rows or []]
+            except Exception as e:
+                if CAMPAIGN_SUMMARIES_FUNCTION not in str(e):
+                    raise
+                print(f"⚠️ {CAMPAIGN_SUMMARIES_FUNCTION} not installed, using batched listing queries")
+                self._summaries_rpc = False
+        
+        if summaries is None:
+            summaries = await self._list_campaign_summaries_batched(user_id, limit, after, offset, status, counts_only)
+        
+        next_cursor = encode_campaign_cursor(summaries[-1]) if len(summaries) == limit else None
+        return summaries, next_cursor
+    
+    async def _list_campaign_summaries_batched(
+        self,
+        user_id: str,
+        limit: int,
+        after: Optional[Tuple[str, str]],
+        offset: int,
+        status: str,
+        counts_only: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Pre-migration path: three batched queries instead of the summaries function"""
+        filters = {"user_id": user_id}
+        if status:
+            filters["status"] = status
+        
+        campaigns = await self.backend.select(
+            CAMPAIGNS_TABLE, LIST_COLUMNS, filters,
+            order_by=["created_at", "campaign_id"], desc=True,
+            limit=limit, offset=None if after else offset, after=after
+        )
+        
+        campaign_ids = [c["campaign_id"] for c in campaigns]
+        if not campaign_ids:
+            return []
+        
+        contents = await self.backend.select(
+            CONTENT_TABLE,
+            "campaign_id, hooks, scripts" if counts_only else
+            "campaign_id, product_data, selected_hooks, selected_scripts, selected_angles, hooks, scripts",
+            in_filters={"campaign_id": campaign_ids}
+        )
+        content_map = {content["campaign_id"]: content for content in contents}
+        
+        if counts_only:
+            return [{**campaign, **count_campaign_content(content_map.get(campaign["campaign_id"]))} for campaign in campaigns]
+        
+        completed_ids = [c["campaign_id"] for c in campaigns if c.get("current_step") == 8 and c.get("status") == "completed"]
+        videos_map: Dict[str, List[Dict[str, Any]]] = {}
+        if completed_ids:
+            videos = await self.backend.select(VIDEOS_TABLE, "*", in_filters={"campaign_id": completed_ids}, order_by="video_number")
+            for video in videos:
+                videos_map.setdefault(video["campaign_id"], []).append(video)
+        
+        summaries = []
+        for campaign in campaigns:
+            content = content_map.get(campaign["campaign_id"])
+            summaries.append({
+                **campaign,
+                "product_data": content.get("product_data") if content else None,
+                "selected_hooks": content.get("selected_hooks") if content else None,
+                "selected_scripts": content.get("selected_scripts") if content else None,
+                "selected_angles": content.get("selected_angles") if content else None,
+                "has_content": content is not None,
+                **count_campaign_content(content),
+                "videos": videos_map.get(campaign["campaign_id"]) if campaign["campaign_id"] in completed_ids else None
+            })
+        return summaries
+    
+    async def fork_campaign(self, source_campaign_id: str, user_id: str, fork_from_step: int, campaign_name: str) -> Optional[str]:
+        """
+        Copy a campaign and its content up to fork_from_step in one transaction
+        (fork_v3_campaign, migrations/003_campaign_fork.sql). Returns the new campaign_id,
+        or None when the source campaign does not exist for this user.
+        """
+        if not self.backend:
+            return None
+        
+        # Buffered status/step updates of the source belong in the copy
+        await self.campaign_writes.flush(source_campaign_id)
+        
+        new_campaign_id = await self.backend.rpc("fork_v3_campaign", {
+            "p_source_campaign_id": source_campaign_id,
+            "p_user_id": user_id,
+            "p_fork_from_step": fork_from_step,
+            "p_campaign_name": campaign_name
+        })
+        
+        if new_campaign_id:
+            print(f"✅ Forked V3 campaign {source_campaign_id} -> {new_campaign_id} at step {fork_from_step}")
+        return new_campaign_id
+    
     async def update_campaign(self, campaign_id: str, updates: Dict[str, Any]) -> bool:
-        """Update campaign details"""
-        if not self.supabase:
+        """Update campaign details (status/step-only updates are buffered briefly and merged)"""
+        if not self.backend:
             return False
         
         try:
             updates["updated_at"] = datetime.utcnow().isoformat()
             
-            result = self.supabase.table("video_ads_v3_campaigns").update(updates).eq("campaign_id", campaign_id).execute()
-            
-            return bool(result.data)
+            deferrable = set(updates) <= DEFERRABLE_CAMPAIGN_FIELDS
+            return await self.campaign_writes.submit(campaign_id, updates, flush=not deferrable)
             
         except Exception as e:
             print(f"❌ Error updating V3 campaign: {e}")
             return False
     
+    async def _write_campaign(self, campaign_id: str, updates: Dict[str, Any]) -> bool:
+        """Apply (merged) campaign updates as a single UPDATE"""
+        result = await self.backend.update(CAMPAIGNS_TABLE, updates, {"campaign_id": campaign_id})
+        self.cache.invalidate(campaign_id)
+        return bool(result)
+    
+    async def flush_campaign_writes(self, campaign_id: str = None):
+        """Write buffered status/step updates now (one campaign, or all on shutdown)"""
+        if campaign_id:
+            await self.campaign_writes.flush(campaign_id)
+        else:
+            await self.campaign_writes.flush_all()
+    
+    async def rename_campaign(self, campaign_id: str, user_id: str, campaign_name: str) -> bool:
+        """Rename a campaign owned by user_id"""
+        if not self.backend:
+            return False
+        
+        try:
+            await self.campaign_writes.flush(campaign_id)
+            result = await self.backend.update(
+                CAMPAIGNS_TABLE,
+                {"campaign_name": campaign_name, "updated_at": datetime.utcnow().isoformat()},
+                {"campaign_id": campaign_id, "user_id": user_id}
+            )
+            self.cache.invalidate(campaign_id)
+            
+            return bool(result)
+            
+        except Exception as e:
+            print(f"❌ Error renaming V3 campaign: {e}")
+            raise
+    
     async def list_campaigns(self, user_id: str) -> List[Dict[str, Any]]:
         """List all campaigns for a user"""
-        if not self.supabase:
+        if not self.backend:
             return []
         
         try:
-            result = self.supabase.table("video_ads_v3_campaigns").select("*").eq("user_id", user_id).order("created_at", desc=True).execute()
+            result = await self.backend.select(CAMPAIGNS_TABLE, "*", {"user_id": user_id}, order_by="created_at", desc=True)
             
-            return result.data or []
+            return result
             
         except Exception as e:
             print(f"❌ Error listing V3 campaigns: {e}")
@@ -135,7 +383,7 @@ class VideoAdsV3DatabaseService:
 
     async def update_campaign_status(self, campaign_id: str, status: str, error_message: str = None) -> bool:
         """Update campaign status and optional error message"""
-        if not self.supabase:
+        if not self.backend:
             return False
 
         try:
@@ -147,10 +395,11 @@ class VideoAdsV3DatabaseService:
             if error_message is not None:
                 updates["error_message"] = error_message
 
-            result = self.supabase.table("video_ads_v3_campaigns").update(updates).eq("campaign_id", campaign_id).execute()
+            # Each status is a phase boundary: write it (with any buffered step updates) now
+            result = await self.campaign_writes.submit(campaign_id, updates, flush=True)
 
             print(f"✅ Updated campaign status: {campaign_id} -> {status}")
-            return bool(result.data)
+            return result
 
         except Exception as e:
             print(f"❌ Error updating campaign status: {e}")
@@ -161,57 +410,15 @@ class VideoAdsV3DatabaseService:
     async def save_product_info(self, campaign_id: str, product_data: Dict[str, Any]) -> bool:
         """Save or update product info for a campaign"""
         print(f"📊 save_product_info called: campaign_id={campaign_id}")
-        if not self.supabase:
+        if not self.backend:
             print(f"❌ No Supabase client")
             return False
         
         try:
-            # Get the campaign first
-            campaign = await self.get_campaign(campaign_id)
-            print(f"📊 Campaign lookup result: found={bool(campaign)}")
-            if campaign:
-                print(f"📊 Campaign details: id={campaign.get('id')}, campaign_id={campaign.get('campaign_id')}")
-            if not campaign:
+            result = await self._upsert_content(campaign_id, {"product_data": product_data}, current_step=2)
+            if not result:
                 print(f"❌ Campaign not found: {campaign_id}")
-                return False
-            
-            # Check if content already exists
-            print(f"📊 Checking for existing content with campaign_id={campaign['campaign_id']}")
-            existing = self.supabase.table("video_ads_v3_campaign_content").select("id").eq("campaign_id", campaign["campaign_id"]).execute()
-            print(f"📊 Existing content check result: {existing}")
-            print(f"📊 Existing content found: {bool(existing.data)}")
-            
-            if existing.data:
-                # Update existing
-                print(f"📊 Updating existing content...")
-                update_data = {
-                    "product_data": product_data,
-                    "updated_at": datetime.utcnow().isoformat()
-                }
-                print(f"📊 Update data: {update_data}")
-                result = self.supabase.table("video_ads_v3_campaign_content").update(update_data).eq("campaign_id", campaign["campaign_id"]).execute()
-                print(f"📊 Update result: {result}")
-                print(f"📊 Update result data: {result.data}")
-            else:
-                # Create new
-                print(f"📊 Creating new content with campaign_id={campaign['campaign_id']}")
-                insert_data = {
-                    "campaign_id": campaign["campaign_id"],
-                    "product_data": product_data
-                }
-                print(f"📊 Insert data: {insert_data}")
-                result = self.supabase.table("video_ads_v3_campaign_content").insert(insert_data).execute()
-                print(f"📊 Insert result: {result}")
-                print(f"📊 Insert result data: {result.data}")
-                if result.data:
-                    print(f"📊 Inserted record ID: {result.data[0].get('id')}")
-            
-            # Update campaign step
-            print(f"📊 Updating campaign step to 2...")
-            step_update = await self.update_campaign(campaign_id, {"current_step": 2})
-            print(f"📊 Campaign step update result: {step_update}")
-            
-            return bool(result.data)
+            return result
             
         except Exception as e:
             print(f"❌ Error saving V3 product info: {e}")
@@ -222,46 +429,21 @@ class VideoAdsV3DatabaseService:
     async def save_marketing_analysis(self, campaign_id: str, analysis_data: Dict[str, Any]) -> bool:
         """Save marketing analysis (avatars, journey, objections, angles)"""
         print(f"📊 save_marketing_analysis called: campaign_id={campaign_id}")
-        if not self.supabase:
+        if not self.backend:
             print(f"❌ No Supabase client")
             return False
         
         try:
-            campaign = await self.get_campaign(campaign_id)
-            print(f"📊 Campaign lookup result: found={bool(campaign)}")
-            if not campaign:
-                print(f"❌ Campaign not found: {campaign_id}")
-                return False
-            
-            # Check if content exists
-            print(f"📊 Checking for existing content with campaign_id={campaign['campaign_id']}")
-            existing = self.supabase.table("video_ads_v3_campaign_content").select("id").eq("campaign_id", campaign["campaign_id"]).execute()
-            print(f"📊 Existing content found: {bool(existing.data)}")
-            
-            update_data = {
+            content = {
                 "avatar_analysis": analysis_data.get("avatars"),
                 "journey_mapping": analysis_data.get("journey"),
                 "objections_analysis": analysis_data.get("objections"),
-                "angles": analysis_data.get("angles"),
-                "updated_at": datetime.utcnow().isoformat()
+                "angles": analysis_data.get("angles")
             }
-            print(f"📊 Update data keys: {update_data.keys()}")
-            
-            if existing.data:
-                print(f"📊 Updating existing content...")
-                result = self.supabase.table("video_ads_v3_campaign_content").update(update_data).eq("campaign_id", campaign["campaign_id"]).execute()
-                print(f"📊 Update result: {result}")
-            else:
-                print(f"📊 Creating new content...")
-                update_data["campaign_id"] = campaign["campaign_id"]
-                result = self.supabase.table("video_ads_v3_campaign_content").insert(update_data).execute()
-                print(f"📊 Insert result: {result}")
-            
-            # Update campaign step
-            print(f"📊 Updating campaign step to 3...")
-            await self.update_campaign(campaign_id, {"current_step": 3})
-            
-            return bool(result.data)
+            result = await self._upsert_content(campaign_id, content, current_step=3)
+            if not result:
+                print(f"❌ Campaign not found: {campaign_id}")
+            return result
             
         except Exception as e:
             print(f"❌ Error saving V3 marketing analysis: {e}")
@@ -272,7 +454,7 @@ class VideoAdsV3DatabaseService:
     async def save_hooks(self, campaign_id: str, hooks_data: List[Any]) -> bool:
         """Save generated hooks"""
         print(f"📊 save_hooks called: campaign_id={campaign_id}, hooks_count={len(hooks_data)}")
-        if not self.supabase:
+        if not self.backend:
             print(f"❌ No Supabase client")
             return False
         
@@ -288,14 +470,15 @@ class VideoAdsV3DatabaseService:
                 "updated_at": datetime.utcnow().isoformat()
             }
             print(f"📊 Updating hooks for campaign_id={campaign['campaign_id']}")
-            result = self.supabase.table("video_ads_v3_campaign_content").update(update_data).eq("campaign_id", campaign["campaign_id"]).execute()
+            result = await self.backend.update(CONTENT_TABLE, update_data, {"campaign_id": campaign["campaign_id"]})
+            self.cache.invalidate(campaign_id)
             print(f"📊 Hooks update result: {result}")
             
             # Update campaign step
             print(f"📊 Updating campaign step to 4...")
             await self.update_campaign(campaign_id, {"current_step": 4})
             
-            return bool(result.data)
+            return bool(result)
             
         except Exception as e:
             print(f"❌ Error saving V3 hooks: {e}")
@@ -318,7 +501,7 @@ class VideoAdsV3DatabaseService:
             scripts_to_save = scripts_data if isinstance(scripts_data, list) else [scripts_data]
             print(f"📊 save_scripts called: campaign_id={campaign_id}, scripts_count={len(scripts_to_save)}")
 
-        if not self.supabase:
+        if not self.backend:
             print(f"❌ No Supabase client")
             return False
 
@@ -334,14 +517,15 @@ class VideoAdsV3DatabaseService:
                 "updated_at": datetime.utcnow().isoformat()
             }
             print(f"📊 Updating scripts for campaign_id={campaign['campaign_id']}")
-            result = self.supabase.table("video_ads_v3_campaign_content").update(update_data).eq("campaign_id", campaign["campaign_id"]).execute()
+            result = await self.backend.update(CONTENT_TABLE, update_data, {"campaign_id": campaign["campaign_id"]})
+            self.cache.invalidate(campaign_id)
             print(f"📊 Scripts update result: {result}")
 
             # Update campaign step
             print(f"📊 Updating campaign step to 5...")
             await self.update_campaign(campaign_id, {"current_step": 5})
 
-            return bool(result.data)
+            return bool(result)
 
         except Exception as e:
             print(f"❌ Error saving V3 scripts: {e}")
@@ -352,7 +536,7 @@ class VideoAdsV3DatabaseService:
     async def save_selected_angles(self, campaign_id: str, selected_angles: List[Any]) -> bool:
         """Save user's selected angles"""
         print(f"📊 save_selected_angles called: campaign_id={campaign_id}, angles_count={len(selected_angles)}")
-        if not self.supabase:
+        if not self.backend:
             print(f"❌ No Supabase client")
             return False
         
@@ -368,10 +552,11 @@ class VideoAdsV3DatabaseService:
                 "updated_at": datetime.utcnow().isoformat()
             }
             print(f"📊 Updating selected angles for campaign_id={campaign['campaign_id']}")
-            result = self.supabase.table("video_ads_v3_campaign_content").update(update_data).eq("campaign_id", campaign["campaign_id"]).execute()
+            result = await self.backend.update(CONTENT_TABLE, update_data, {"campaign_id": campaign["campaign_id"]})
+            self.cache.invalidate(campaign_id)
             print(f"📊 Selected angles update result: {result}")
             
-            return bool(result.data)
+            return bool(result)
             
         except Exception as e:
             print(f"❌ Error saving V3 selected angles: {e}")
@@ -382,7 +567,7 @@ class VideoAdsV3DatabaseService:
     async def save_selected_hooks(self, campaign_id: str, selected_hooks: List[Any]) -> bool:
         """Save user's selected hooks"""
         print(f"📊 save_selected_hooks called: campaign_id={campaign_id}, hooks_count={len(selected_hooks)}")
-        if not self.supabase:
+        if not self.backend:
             print(f"❌ No Supabase client")
             return False
         
@@ -398,10 +583,11 @@ class VideoAdsV3DatabaseService:
                 "updated_at": datetime.utcnow().isoformat()
             }
             print(f"📊 Updating selected hooks for campaign_id={campaign['campaign_id']}")
-            result = self.supabase.table("video_ads_v3_campaign_content").update(update_data).eq("campaign_id", campaign["campaign_id"]).execute()
+            result = await self.backend.update(CONTENT_TABLE, update_data, {"campaign_id": campaign["campaign_id"]})
+            self.cache.invalidate(campaign_id)
             print(f"📊 Selected hooks update result: {result}")
             
-            return bool(result.data)
+            return bool(result)
             
         except Exception as e:
             print(f"❌ Error saving V3 selected hooks: {e}")
@@ -409,23 +595,177 @@ class VideoAdsV3DatabaseService:
             print(f"❌ Traceback: {traceback.format_exc()}")
             return False
     
+    async def patch_selection(
+        self,
+        campaign_id: str,
+        field: str,
+        add: List[Any] = None,
+        remove: List[Any] = None,
+        set_items: List[Dict[str, Any]] = None,
+        key: str = "id"
+    ) -> Optional[int]:
+        """
+        Apply a delta to one selection column instead of rewriting it.
+        
+        remove drops items by key value (or whole item), set_items merges partial items
+        (e.g. {"id": 3, "selected": False}) into the item with the same key, and add appends
+        items not selected yet. Runs under a row lock in the database
+        (migrations/004_v3_selection_patches.sql). Returns the new selection count, or
+        None when the campaign has no content.
+        """
+        if field not in SELECTION_FIELDS:
+            raise ValueError(f"Not a selection field: {field}")
+        if not self.backend:
+            return None
+        
+        add, remove, set_items = add or [], remove or [], set_items or []
+        
+        if self._selection_patch_rpc:
+            try:
+                result = await self.backend.rpc(PATCH_SELECTION_FUNCTION, {
+                    "p_campaign_id": campaign_id,
+                    "p_column": field,
+                    "p_add": add,
+                    "p_remove": remove,
+                    "p_set": set_items,
+                    "p_key": key
+                })
+                self.cache.invalidate(campaign_id)
+                return result
+            except Exception as e:
+                if PATCH_SELECTION_FUNCTION not in str(e):
+                    raise
+                # Migration not applied yet on this database
+                print(f"⚠️ {PATCH_SELECTION_FUNCTION} not installed, rewriting selection columns")
+                self._selection_patch_rpc = False
+        
+        content = await self.get_campaign_content(campaign_id, fields=[field])
+        if not content:
+            return None
+        selection = apply_selection_patch(content.get(field), add, remove, set_items, key)
+        if not await self._upsert_content(campaign_id, {field: selection}):
+            return None
+        return len(selection)
+    
+    # ==================== Hook & Script Items ====================
+    
+    async def get_hook_items(self, campaign_id: str, hook_ids: List[str] = None, angle_id: str = None) -> List[Dict[str, Any]]:
+        """Individual hooks, optionally limited to the given ids or one angle"""
+        return await self._get_content_items(campaign_id, "hook", hook_ids, {"angle_id": angle_id} if angle_id else {})
+    
+    async def get_script_items(self, campaign_id: str, script_ids: List[str] = None, hook_id: str = None) -> List[Dict[str, Any]]:
+        """Individual scripts, optionally limited to the given ids or one hook"""
+        return await self._get_content_items(campaign_id, "script", script_ids, {"hook_id": hook_id} if hook_id else {})
+    
+    async def get_selected_script_items(self, campaign_id: str) -> List[Dict[str, Any]]:
+        """Just the scripts the user selected (for the audio and video steps)"""
+        content = await self.get_campaign_content(campaign_id, fields=["selected_scripts"])
+        selected = (content or {}).get("selected_scripts") or []
+        script_ids = [
+            item.get("script_id") or item.get("id") if isinstance(item, dict) else item
+            for item in selected
+        ]
+        return await self.get_script_items(campaign_id, [script_id for script_id in script_ids if isinstance(script_id, str)])
+    
+    async def update_hook_item(self, campaign_id: str, hook_id: str, updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Merge updates into one hook; returns the updated hook, or None when it does not exist"""
+        return await self._update_content_item(campaign_id, "hook", hook_id, updates)
+    
+    async def update_script_item(self, campaign_id: str, script_id: str, updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Merge updates into one script; returns the updated script, or None when it does not exist"""
+        return await self._update_content_item(campaign_id, "script", script_id, updates)
+    
+    async def _get_content_items(
+        self,
+        campaign_id: str,
+        kind: str,
+        item_ids: Optional[List[str]],
+        filters: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        """
+        Read item rows (migrations/005_v3_campaign_items.sql). Campaigns without rows
+        (not backfilled yet) and databases without the tables are served from the document.
+        """
+        if not self.backend or item_ids == []:
+            return []
+        
+        table, id_column, item_column, document_column, order = CONTENT_ITEMS[kind]
+        
+        if self._content_items:
+            try:
+                rows = await self.backend.select(
+                    table, item_column, {"campaign_id": campaign_id, **filters},
+                    in_filters={id_column: item_ids} if item_ids else None,
+                    order_by=order
+                )
+                if rows:
+                    return [row[item_column] for row in rows]
+            except Exception as e:
+                if table not in str(e):
+                    raise
+                # Migration not applied yet on this database
+                print(f"⚠️ {table} not installed, reading {document_column} documents")
+                self._content_items = False
+        
+        content = await self.get_campaign_content(campaign_id, fields=[document_column])
+        wanted = set(item_ids) if item_ids else None
+        return [
+            item for item_id, parents, item in iter_content_items(kind, (content or {}).get(document_column))
+            if (wanted is None or item_id in wanted)
+            and all(parents.get(column) == value for column, value in filters.items())
+        ]
+    
+    async def _update_content_item(self, campaign_id: str, kind: str, item_id: str, updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Merge updates into one item row and the same item in its document, under the
+        content row lock (update_v3_campaign_item). The function itself re-syncs campaigns
+        not backfilled yet and item rows whose document path went stale.
+        """
+        if not self.backend:
+            return None
+        
+        document_column = CONTENT_ITEMS[kind][3]
+        
+        if self._content_items:
+            params = {"p_campaign_id": campaign_id, "p_kind": kind, "p_item_id": item_id, "p_patch": updates}
+            try:
+                item = await self.backend.rpc(UPDATE_ITEM_FUNCTION, params)
+                self.cache.invalidate(campaign_id)
+                return item
+            except Exception as e:
+                if UPDATE_ITEM_FUNCTION not in str(e):
+                    raise
+                # Migration not applied yet on this database
+                print(f"⚠️ {UPDATE_ITEM_FUNCTION} not installed, rewriting {document_column} documents")
+                self._content_items = False
+        
+        content = await self.get_campaign_content(campaign_id, fields=[document_column])
+        document = (content or {}).get(document_column)
+        for current_id, _, item in iter_content_items(kind, document):
+            if current_id == item_id:
+                item.update({key: value for key, value in updates.items() if key != CONTENT_ITEMS[kind][1]})
+                if not await self._upsert_content(campaign_id, {document_column: document}):
+                    return None
+                return item
+        return None
+    
     # ==================== Campaign Content Retrieval ====================
     
     async def get_campaigns_product_info_batch(self, campaign_ids: List[str]) -> Dict[str, Dict[str, Any]]:
         """Get product info for multiple campaigns in a single query (batch optimization)"""
-        if not self.supabase or not campaign_ids:
+        if not self.backend or not campaign_ids:
             return {}
         
         try:
             # Fetch all product data in one query
-            result = self.supabase.table("video_ads_v3_campaign_content").select(
-                "campaign_id, product_data"
-            ).in_("campaign_id", campaign_ids).execute()
+            result = await self.backend.select(
+                CONTENT_TABLE, "campaign_id, product_data", in_filters={"campaign_id": campaign_ids}
+            )
             
             # Return as a dictionary keyed by campaign_id
             product_info_map = {}
-            if result.data:
-                for item in result.data:
+            if result:
+                for item in result:
                     campaign_id = item.get("campaign_id")
                     if campaign_id:
                         product_info_map[campaign_id] = item.get("product_data")
@@ -438,44 +778,44 @@ class VideoAdsV3DatabaseService:
     
     async def get_campaign_product_info(self, campaign_id: str) -> Optional[Dict[str, Any]]:
         """Get just the product info for a campaign (lightweight for listings)"""
-        if not self.supabase:
+        if not self.backend:
             return None
         
         try:
-            # Direct query without getting full campaign first
-            result = self.supabase.table("video_ads_v3_campaign_content").select(
-                "product_data"
-            ).eq("campaign_id", campaign_id).execute()
+            content = await self.get_campaign_content(campaign_id, fields=["product_data"])
             
-            if result.data and len(result.data) > 0:
-                return result.data[0].get("product_data")
-            
-            return None
+            return content.get("product_data") if content else None
             
         except Exception as e:
             print(f"❌ Error getting product info: {e}")
             return None
     
-    async def get_campaign_content(self, campaign_id: str) -> Optional[Dict[str, Any]]:
-        """Get all campaign content"""
-        if not self.supabase:
+    async def get_campaign_content(self, campaign_id: str, fields: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Get campaign content, optionally projected to the given fields.
+        
+        Columns are cached individually, so asking for further fields later in the same
+        request only fetches the ones not loaded yet. Without fields the whole row is read;
+        prefer an explicit list, the HEAVY_CONTENT_FIELDS are large.
+        """
+        if not self.backend:
             return None
         
+        requested = list(fields) if fields else list(CONTENT_FIELDS)
+        unknown = [field for field in requested if field not in CONTENT_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown campaign content fields: {unknown}")
+        if "campaign_id" not in requested:
+            requested.append("campaign_id")
+        
         try:
-            campaign = await self.get_campaign(campaign_id)
-            if not campaign:
-                return None
-            
-            # Explicitly select all columns including the new selected_scripts, audio_data, and video_data columns
-            result = self.supabase.table("video_ads_v3_campaign_content").select(
-                "id, campaign_id, product_data, avatar_analysis, journey_mapping, objections_analysis, "
-                "angles, selected_angles, hooks, selected_hooks, scripts, selected_scripts, audio_data, video_data, created_at, updated_at"
-            ).eq("campaign_id", campaign["campaign_id"]).execute()
+            content = await self.cache.get_or_load_fields(
+                "content", campaign_id, requested,
+                lambda missing: self._load_content(campaign_id, missing)
+            )
             
-            if result.data and len(result.data) > 0:
-                content = result.data[0]
+            if content:
                 print(f"📚 Retrieved content keys: {list(content.keys())}")
-                print(f"📚 Has selected_scripts: {'selected_scripts' in content}, value: {content.get('selected_scripts', 'NOT FOUND')}")
                 return content
             
             return None
@@ -484,44 +824,97 @@ class VideoAdsV3DatabaseService:
             print(f"❌ Error getting V3 campaign content: {e}")
             return None
     
+    async def _load_content(self, campaign_id: str, fields: List[str]) -> Optional[Dict[str, Any]]:
+        """Select content columns, replacing offload pointers with the stored documents"""
+        row = await self._select_first(CONTENT_TABLE, ", ".join(fields), {"campaign_id": campaign_id})
+        if row:
+            for field in OFFLOADABLE_CONTENT_FIELDS:
+                if field in row:
+                    row[field] = await self.offloader.resolve(row[field])
+        return row
+    
+    async def _offload_content(self, content: Dict[str, Any]) -> Dict[str, Any]:
+        """Swap large offloadable columns for S3 pointers before they are written"""
+        if not self.offloader.enabled:
+            return content
+        offloaded = dict(content)
+        for field in OFFLOADABLE_CONTENT_FIELDS:
+            if field in offloaded:
+                offloaded[field] = await self.offloader.offload(offloaded[field])
+        return offloaded
+    
     async def update_campaign_content(self, campaign_id: str, updates: Dict[str, Any]) -> bool:
         """Update campaign content with new data"""
-        if not self.supabase:
+        if not self.backend:
             return False
         
         try:
-            campaign = await self.get_campaign(campaign_id)
-            if not campaign:
-                return False
-            
-            # Check if content exists - use campaign_id, not id
-            existing = self.supabase.table("video_ads_v3_campaign_content").select("id").eq("campaign_id", campaign["campaign_id"]).execute()
-            
-            update_data = {
-                **updates,
-                "updated_at": datetime.utcnow().isoformat()
-            }
-            
-            if existing.data:
-                print(f"📝 Updating existing content for campaign: {campaign['campaign_id']}")
-                result = self.supabase.table("video_ads_v3_campaign_content").update(update_data).eq("campaign_id", campaign["campaign_id"]).execute()
-                print(f"📝 Update result: {bool(result.data)}")
-            else:
-                update_data["campaign_id"] = campaign["campaign_id"]  # Use campaign_id, not id
-                print(f"📝 Inserting new content for campaign: {campaign['campaign_id']}")
-                result = self.supabase.table("video_ads_v3_campaign_content").insert(update_data).execute()
-                print(f"📝 Insert result: {bool(result.data)}")
-            
-            print(f"📝 Campaign content saved: {campaign['campaign_id']}, data keys: {list(update_data.keys())}")
-            return bool(result.data)
+            result = await self._upsert_content(campaign_id, updates)
+            print(f"📝 Campaign content saved: {campaign_id}, data keys: {list(updates.keys())}")
+            return result
             
         except Exception as e:
             print(f"❌ Error updating V3 campaign content: {e}")
             return False
     
+    async def _upsert_content(self, campaign_id: str, content: Dict[str, Any], current_step: int = None) -> bool:
+        """
+        Insert or update content columns and optionally set the campaign step in one
+        round trip (migrations/001_v3_campaign_content_upsert.sql). Returns False when
+        the campaign does not exist.
+        """
+        content = await self._offload_content(content)
+        
+        if self._content_upsert_rpc:
+            try:
+                # The function writes current_step; earlier buffered updates must land first
+                if current_step is not None:
+                    await self.campaign_writes.flush(campaign_id)
+                result = await self.backend.rpc(UPSERT_CONTENT_FUNCTION, {
+                    "p_campaign_id": campaign_id,
+                    "p_content": content,
+                    "p_current_step": current_step
+                })
+                self.cache.invalidate(campaign_id)
+                return bool(result)
+            except Exception as e:
+                if UPSERT_CONTENT_FUNCTION not in str(e):
+                    raise
+                # Migration not applied yet on this database
+                print(f"⚠️ {UPSERT_CONTENT_FUNCTION} not installed, using read-then-write content saves")
+                self._content_upsert_rpc = False
+        
+        return await self._upsert_content_legacy(campaign_id, content, current_step)
+    
+    async def _upsert_content_legacy(self, campaign_id: str, content: Dict[str, Any], current_step: int = None) -> bool:
+        """Pre-migration path: campaign lookup, existence check, update or insert, step update"""
+        campaign = await self.get_campaign(campaign_id)
+        if not campaign:
+            return False
+        
+        # Check if content exists - use campaign_id, not id
+        existing = await self.backend.select(CONTENT_TABLE, "id", {"campaign_id": campaign["campaign_id"]})
+        
+        data = {
+            **content,
+            "updated_at": datetime.utcnow().isoformat()
+        }
+        
+        if existing:
+            result = await self.backend.update(CONTENT_TABLE, data, {"campaign_id": campaign["campaign_id"]})
+        else:
+            data["campaign_id"] = campaign["campaign_id"]
+            result = await self.backend.insert(CONTENT_TABLE, data)
+        
+        self.cache.invalidate(campaign_id)
+        if current_step is not None:
+            await self.update_campaign(campaign_id, {"current_step": current_step})
+        
+        return bool(result)
+    
     async def get_complete_campaign(self, campaign_id: str) -> Optional[Dict[str, Any]]:
         """Get complete campaign data including all content and videos"""
-        if not self.supabase:
+        if not self.backend:
             return None
         
         try:
@@ -549,50 +942,60 @@ class VideoAdsV3DatabaseService:
     
     async def create_video(self, campaign_id: str, video_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Create a new video for a campaign"""
-        if not self.supabase:
-            return None
+        videos = await self.create_videos(campaign_id, [video_data])
+        return videos[0] if videos else None
+    
+    async def create_videos(self, campaign_id: str, videos_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Create several videos for a campaign with one insert, numbered after the existing ones"""
+        if not self.backend or not videos_data:
+            return []
         
         try:
             campaign = await self.get_campaign(campaign_id)
             if not campaign:
-                return None
+                return []
             
             # Get next video number
-            existing_videos = await self.get_campaign_videos(campaign_id)
-            video_number = len(existing_videos) + 1
-            
-            data = {
-                "campaign_id": campaign["campaign_id"],
-                "video_number": video_number,
-                "angle_data": video_data.get("angle_data"),
-                "hook_data": video_data.get("hook_data"),
-                "script_data": video_data.get("script_data"),
-                "voice_data": video_data.get("voice_data"),
-                "actor_data": video_data.get("actor_data"),
-                "status": "draft"
-            }
+            last_video = await self.backend.select(
+                VIDEOS_TABLE, "video_number", {"campaign_id": campaign["campaign_id"]},
+                order_by="video_number", desc=True, limit=1
+            )
+            first_number = (last_video[0].get("video_number") or 0) + 1 if last_video else 1
+            
+            rows = [
+                {
+                    "campaign_id": campaign["campaign_id"],
+                    "video_number": first_number + index,
+                    "angle_data": video_data.get("angle_data"),
+                    "hook_data": video_data.get("hook_data"),
+                    "script_data": video_data.get("script_data"),
+                    "voice_data": video_data.get("voice_data"),
+                    "actor_data": video_data.get("actor_data"),
+                    "status": "draft"
+                }
+                for index, video_data in enumerate(videos_data)
+            ]
             
-            result = self.supabase.table("video_ads_v3_videos").insert(data).execute()
+            result = await self.backend.insert(VIDEOS_TABLE, rows)
             
-            if result.data:
-                print(f"✅ Created V3 video #{video_number} for campaign {campaign_id}")
-                return result.data[0]
+            if result:
+                print(f"✅ Created {len(result)} V3 videos (#{first_number}-#{first_number + len(result) - 1}) for campaign {campaign_id}")
             
-            return None
+            return result
             
         except Exception as e:
-            print(f"❌ Error creating V3 video: {e}")
-            return None
+            print(f"❌ Error creating V3 videos: {e}")
+            return []
     
     async def update_video(self, video_id: str, updates: Dict[str, Any]) -> bool:
         """Update video details"""
-        if not self.supabase:
+        if not self.backend:
             return False
         
         try:
-            result = self.supabase.table("video_ads_v3_videos").update(updates).eq("id", video_id).execute()
+            result = await self.backend.update(VIDEOS_TABLE, updates, {"id": video_id})
             
-            return bool(result.data)
+            return bool(result)
             
         except Exception as e:
             print(f"❌ Error updating V3 video: {e}")
@@ -600,7 +1003,7 @@ class VideoAdsV3DatabaseService:
     
     async def get_campaign_videos(self, campaign_id: str) -> List[Dict[str, Any]]:
         """Get all videos for a campaign"""
-        if not self.supabase:
+        if not self.backend:
             return []
         
         try:
@@ -608,9 +1011,9 @@ class VideoAdsV3DatabaseService:
             if not campaign:
                 return []
             
-            result = self.supabase.table("video_ads_v3_videos").select("*").eq("campaign_id", campaign["campaign_id"]).order("video_number").execute()
+            result = await self.backend.select(VIDEOS_TABLE, "*", {"campaign_id": campaign["campaign_id"]}, order_by="video_number")
             
-            return result.data or []
+            return result
             
         except Exception as e:
             print(f"❌ Error getting V3 campaign videos: {e}")
@@ -619,7 +1022,7 @@ class VideoAdsV3DatabaseService:
     async def save_video_generation(self, video_id: str, audio_url: str = None, video_url: str = None, 
                                    hedra_job_id: str = None, status: str = None) -> bool:
         """Update video with generation results"""
-        if not self.supabase:
+        if not self.backend:
             return False
         
         try:
@@ -639,9 +1042,9 @@ class VideoAdsV3DatabaseService:
             elif video_url:
                 updates["status"] = "completed"
             
-            result = self.supabase.table("video_ads_v3_videos").update(updates).eq("id", video_id).execute()
+            result = await self.backend.update(VIDEOS_TABLE, updates, {"id": video_id})
             
-            return bool(result.data)
+            return bool(result)
             
         except Exception as e:
             print(f"❌ Error saving V3 video generation: {e}")
@@ -649,39 +1052,14 @@ class VideoAdsV3DatabaseService:
     
     async def save_campaign_content(self, campaign_id: str, content_data: Dict[str, Any]) -> bool:
         """Save or update campaign content"""
-        if not self.supabase:
+        if not self.backend:
             return False
         
         try:
-            # Check if campaign exists
-            campaign = await self.get_campaign(campaign_id)
-            if not campaign:
+            result = await self._upsert_content(campaign_id, content_data)
+            if not result:
                 print(f"❌ Campaign not found: {campaign_id}")
-                return False
-            
-            # Check if content entry exists
-            existing = self.supabase.table("video_ads_v3_campaign_content") \
-                .select("campaign_id") \
-                .eq("campaign_id", campaign["campaign_id"]) \
-                .execute()
-            
-            content_data["updated_at"] = datetime.utcnow().isoformat()
-            
-            if existing.data:
-                # Update existing content
-                result = self.supabase.table("video_ads_v3_campaign_content") \
-                    .update(content_data) \
-                    .eq("campaign_id", campaign["campaign_id"]) \
-                    .execute()
-            else:
-                # Create new content entry
-                content_data["campaign_id"] = campaign["campaign_id"]
-                content_data["created_at"] = datetime.utcnow().isoformat()
-                result = self.supabase.table("video_ads_v3_campaign_content") \
-                    .insert(content_data) \
-                    .execute()
-            
-            return bool(result.data)
+            return result
             
         except Exception as e:
             print(f"❌ Error saving campaign content: {e}")
@@ -699,7 +1077,7 @@ class VideoAdsV3DatabaseService:
         batch_error: str = None
     ) -> bool:
         """Update batch processing information for a campaign"""
-        if not self.supabase:
+        if not self.backend:
             return False
 
         try:
@@ -725,12 +1103,8 @@ class VideoAdsV3DatabaseService:
 
             update_data["updated_at"] = datetime.utcnow().isoformat()
 
-            result = self.supabase.table("video_ads_v3_campaigns") \
-                .update(update_data) \
-                .eq("campaign_id", campaign_id) \
-                .execute()
-
-            return bool(result.data)
+            # Merged with any buffered status/step update into one UPDATE
+            return await self.campaign_writes.submit(campaign_id, update_data, flush=True)
 
         except Exception as e:
             print(f"❌ Error updating batch info: {e}")
@@ -738,17 +1112,18 @@ class VideoAdsV3DatabaseService:
 
     async def get_batch_info(self, campaign_id: str) -> Optional[Dict[str, Any]]:
         """Get batch processing information for a campaign"""
-        if not self.supabase:
+        if not self.backend:
             return None
 
         try:
-            result = self.supabase.table("video_ads_v3_campaigns") \
-                .select("hooks_batch_id, scripts_batch_id, batch_status, batch_created_at, batch_completed_at, batch_error") \
-                .eq("campaign_id", campaign_id) \
-                .execute()
+            result = await self.backend.select(
+                CAMPAIGNS_TABLE,
+                "hooks_batch_id, scripts_batch_id, batch_status, batch_created_at, batch_completed_at, batch_error",
+                {"campaign_id": campaign_id}
+            )
 
-            if result.data:
-                return result.data[0]
+            if result:
+                return result[0]
             return None
 
         except Exception as e:
@@ -757,21 +1132,133 @@ class VideoAdsV3DatabaseService:
 
     async def get_campaigns_by_batch_status(self, status: str) -> List[Dict[str, Any]]:
         """Get all campaigns with a specific batch status"""
-        if not self.supabase:
+        if not self.backend:
             return []
 
         try:
-            result = self.supabase.table("video_ads_v3_campaigns") \
-                .select("campaign_id, campaign_name, batch_status, hooks_batch_id, scripts_batch_id, batch_created_at") \
-                .eq("batch_status", status) \
-                .execute()
+            result = await self.backend.select(
+                CAMPAIGNS_TABLE,
+                "campaign_id, campaign_name, batch_status, hooks_batch_id, scripts_batch_id, batch_created_at",
+                {"batch_status": status}
+            )
 
-            return result.data if result.data else []
+            return result
 
         except Exception as e:
             print(f"❌ Error getting campaigns by batch status: {e}")
             return []
 
 
+# ==================== Listing Helpers ====================
+
+def encode_campaign_cursor(summary: Dict[str, Any]) -> str:
+    """Opaque keyset cursor for the row after which the next page starts"""
+    raw = json.dumps([summary["created_at"], summary["campaign_id"]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_campaign_cursor(cursor: str) -> Tuple[str, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, campaign_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return str(created_at), str(campaign_id)
+    except Exception:
+        raise ValueError("Invalid campaigns cursor")
+
+
+def count_campaign_content(content: Optional[Dict[str, Any]]) -> Dict[str, int]:
+    """Angle/hook/script counts shown on the campaign cards (mirrors list_v3_campaign_summaries)"""
+    counts = {"angle_count": 0, "hook_count": 0, "script_count": 0}
+    if not content:
+        return counts
+    
+    hooks = content.get("hooks")
+    if isinstance(hooks, list):
+        counts["angle_count"] = len(hooks)
+        for angle in hooks:
+            hooks_by_category = angle.get("hooks_by_category") if isinstance(angle, dict) else None
+            if isinstance(hooks_by_category, dict):
+                for category_hooks in hooks_by_category.values():
+                    if isinstance(category_hooks, list):
+                        counts["hook_count"] += len(category_hooks)
+    
+    scripts = content.get("scripts")
+    if isinstance(scripts, list) and scripts and isinstance(scripts[0], dict):
+        for angle in scripts[0].get("angles") or []:
+            for hook in (angle.get("hooks") or []) if isinstance(angle, dict) else []:
+                if isinstance(hook, dict) and isinstance(hook.get("scripts"), list):
+                    counts["script_count"] += len(hook["scripts"])
+    
+    return counts
+
+
+def apply_selection_patch(
+    selection: Optional[List[Any]],
+    add: List[Any],
+    remove: List[Any],
+    set_items: List[Dict[str, Any]],
+    key: str = "id"
+) -> List[Any]:
+    """Python equivalent of patch_v3_selection, for databases without the function"""
+    def item_key(item):
+        return item.get(key) if isinstance(item, dict) else None
+    
+    def removed(item):
+        return any(
+            target == item
+            or (target is not None and target == item_key(item))
+            or (isinstance(target, dict) and item_key(target) is not None and item_key(target) == item_key(item))
+            for target in remove
+        )
+    
+    patches = {}
+    for patch in set_items:
+        if isinstance(patch, dict) and patch.get(key) is not None:
+            patches.setdefault(json.dumps(patch[key], sort_keys=True), patch)
+    
+    result = []
+    for item in selection if isinstance(selection, list) else []:
+        if removed(item):
+            continue
+        patch = patches.get(json.dumps(item_key(item), sort_keys=True)) if item_key(item) is not None else None
+        result.append({**item, **patch} if patch and isinstance(item, dict) else item)
+    
+    for item in add:
+        if any(existing == item or (item_key(item) is not None and item_key(existing) == item_key(item)) for existing in result):
+            continue
+        result.append(item)
+    
+    return result
+
+def iter_content_items(kind: str, document: Any):
+    """
+    Yield (item_id, parents, item) for each hook or script in a hooks / scripts document,
+    in the order sync_v3_campaign_hooks / sync_v3_campaign_scripts store them.
+    Items are yielded by reference, so callers can edit the document through them.
+    """
+    if kind == "hook":
+        for angle in document if isinstance(document, list) else []:
+            if not isinstance(angle, dict) or not isinstance(angle.get("hooks_by_category"), dict):
+                continue
+            for category, hooks in angle["hooks_by_category"].items():
+                for hook in hooks if isinstance(hooks, list) else []:
+                    if isinstance(hook, dict) and hook.get("hook_id"):
+                        yield hook["hook_id"], {"angle_id": angle.get("angle_id"), "category": category}, hook
+        return
+    
+    if not isinstance(document, list) or not document or not isinstance(document[0], dict):
+        return
+    for angle in document[0].get("angles") or []:
+        if not isinstance(angle, dict):
+            continue
+        for hook in angle.get("hooks") or []:
+            if not isinstance(hook, dict):
+                continue
+            for script in hook.get("scripts") or []:
+                if isinstance(script, dict) and script.get("script_id"):
+                    hook_id = script.get("hook_id") or (hook.get("selected_hook") or {}).get("hook_id")
+                    yield script["script_id"], {"angle_id": angle.get("angle_id"), "hook_id": hook_id}, script
+
+
 # Initialize the V3 database service
 v3_db_service = VideoAdsV3DatabaseService()
\ No newline at end of file
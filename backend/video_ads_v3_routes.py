@@ -9,7 +9,7 @@ import openai
 import aiohttp
 import uuid
 from pathlib import Path
-from datetime import datetime, timezone
+from datetime import datetime
 from fastapi import APIRouter, HTTPException, Depends, Body, UploadFile, File, Form
 from pydantic import BaseModel, ValidationError
 from typing import Optional, Dict, List, Any, Union
@@ -22,7 +22,7 @@ from video_ads_v3_database_service import v3_db_service
 from actor_image_handler import actor_image_handler
 from campaign_v3_manager import campaign_v3_manager
 from claude_service import ClaudeService
-from logging_service import logger
+from logging_service import logger, Lazy
 
 # Import models (reuse V2 models for now)
 from video_ads_v2_models import (
@@ -79,7 +79,10 @@ async def video_ads_v3_health():
         },
         "claude_available": claude_service.client.client is not None,
         "openai_available": openai_client is not None,
-        "database_available": v3_db_service.supabase is not None
+        "database_available": v3_db_service.available,
+        "read_cache": v3_db_service.cache.stats,
+        "campaign_writes": v3_db_service.campaign_writes.stats,
+        "content_offload": v3_db_service.offloader.stats
     }
 
 # ==================== Campaign Management ====================
@@ -187,7 +190,7 @@ async def parse_url_v3(
             )
             
             raw_info = json.loads(response.choices[0].message.content)
-            logger.debug("parse_url.openai.response", f"OpenAI parsed info: {raw_info}")
+            logger.debug("parse_url.openai.response", Lazy(lambda: f"OpenAI parsed info: {raw_info}"))
             
             # Handle additional_information which might be a dict or string
             additional_info = raw_info.get("additional_information", "")
@@ -221,9 +224,9 @@ async def parse_url_v3(
             }
         
         # Save to database
-        if v3_db_service.supabase:
+        if v3_db_service.available:
             success = await v3_db_service.save_product_info(campaign_id, product_info)
-            logger.debug("parse_url.product_info.saved", f"Saved parsed product info for campaign: {campaign_id}, product_info: {product_info}, success: {success}")
+            logger.debug("parse_url.product_info.saved", Lazy(lambda: f"Saved parsed product info for campaign: {campaign_id}, product_info: {product_info}, success: {success}"))
         
         # Return in the format expected by URLParseV2Response
         return URLParseV2Response(
@@ -292,7 +295,7 @@ async def save_product_info_v3(
         if not success:
             raise HTTPException(status_code=500, detail="Failed to save product info")
         
-        logger.debug("product.info.save", f"saved product info for campaign: {campaign_id}, product_data:{product_data}")
+        logger.debug("product.info.save", Lazy(lambda: f"saved product info for campaign: {campaign_id}, product_data:{product_data}"))
         
         return {
             "campaign_id": campaign_id,
@@ -589,7 +592,7 @@ async def create_marketing_analysis_v3(
         product_info = request.product_info.dict() if request.product_info else {}
         
         # Save product info to database
-        if product_info and v3_db_service.supabase:
+        if product_info and v3_db_service.available:
             await v3_db_service.save_product_info(campaign_id, product_info)
         
         # Generate marketing analysis using Claude
@@ -688,7 +691,7 @@ async def create_marketing_angles_v3(
         
         # Save product info
         success = await v3_db_service.save_product_info(campaign_id, product_info)
-        logger.debug("marketing.angles.product_info.saved", f"Saved product info: campaign_id: {campaign_id}, product_info: {product_info}, success: {success}")
+        logger.debug("marketing.angles.product_info.saved", Lazy(lambda: f"Saved product info: campaign_id: {campaign_id}, product_info: {product_info}, success: {success}"))
         
         # Generate marketing analysis using Claude
         logger.info("marketing.angles.start", f"Generating angles for campaign: {campaign_id}")
@@ -699,19 +702,19 @@ async def create_marketing_angles_v3(
         
         # Phase 1: Avatar Analysis
         avatars = await claude_service.generate_avatar_analysis(product_model)
-        logger.debug("marketing.angles.avatars.generated", f"Generated avatars for campaign: {campaign_id}, avatars: {avatars}")
+        logger.debug("marketing.angles.avatars.generated", Lazy(lambda: f"Generated avatars for campaign: {campaign_id}, avatars: {avatars}"))
         
         # Phase 2: Journey Mapping
         journey = await claude_service.generate_journey_mapping(product_model, avatars)
-        logger.debug("marketing.angles.journey.generated", f"Generated journey for campaign: {campaign_id}, journey: {journey}")
+        logger.debug("marketing.angles.journey.generated", Lazy(lambda: f"Generated journey for campaign: {campaign_id}, journey: {journey}"))
         
         # Phase 3: Objections Analysis
         objections = await claude_service.generate_objections_analysis(product_model, avatars, journey)
-        logger.debug("marketing.angles.objections.generated", f"Generated objections for campaign: {campaign_id}, objections: {objections}")
+        logger.debug("marketing.angles.objections.generated", Lazy(lambda: f"Generated objections for campaign: {campaign_id}, objections: {objections}"))
         
         # Phase 4: Angles Generation
         angles = await claude_service.generate_angles(product_model, avatars, journey, objections)
-        logger.debug("marketing.angles.angles.generated", f"Generated angles for campaign: {campaign_id}, angles: {angles}")
+        logger.debug("marketing.angles.angles.generated", Lazy(lambda: f"Generated angles for campaign: {campaign_id}, angles: {angles}"))
         
         # Save to database (ensure all are dicts for consistency)
         analysis_data = {
@@ -722,7 +725,7 @@ async def create_marketing_angles_v3(
         }
         
         success = await v3_db_service.save_marketing_analysis(campaign_id, analysis_data)
-        logger.debug("marketing.angles.analysis.saved", f"Saved marketing analysis for campaign: {campaign_id}, analysis_data: {analysis_data}, success: {success}")
+        logger.debug("marketing.angles.analysis.saved", Lazy(lambda: f"Saved marketing analysis for campaign: {campaign_id}, analysis_data: {analysis_data}, success: {success}"))
         
         # Return in the format MarketingAngles.tsx expects
         # Convert angles from Pydantic model to dict format
@@ -770,7 +773,7 @@ async def create_marketing_research_v3(
 
         # Save product info
         success = await v3_db_service.save_product_info(campaign_id, product_info)
-        logger.debug("marketing.angles.product_info.saved", f"Saved product info: campaign_id: {campaign_id}, product_info: {product_info}, success: {success}")
+        logger.debug("marketing.angles.product_info.saved", Lazy(lambda: f"Saved product info: campaign_id: {campaign_id}, product_info: {product_info}, success: {success}"))
         
         # Generate marketing analysis using Claude
         logger.info("marketing.angles.start", f"Generating angles for campaign: {campaign_id}")
@@ -781,19 +784,19 @@ async def create_marketing_research_v3(
         
         # Phase 1: Avatar Analysis
         avatars = await claude_service.generate_avatar_analysis(product_model)
-        logger.debug("marketing.angles.avatars.generated", f"Generated avatars for campaign: {campaign_id}, avatars: {avatars}")
+        logger.debug("marketing.angles.avatars.generated", Lazy(lambda: f"Generated avatars for campaign: {campaign_id}, avatars: {avatars}"))
         
         # Phase 2: Journey Mapping
         journey = await claude_service.generate_journey_mapping(product_model, avatars)
-        logger.debug("marketing.angles.journey.generated", f"Generated journey for campaign: {campaign_id}, journey: {journey}")
+        logger.debug("marketing.angles.journey.generated", Lazy(lambda: f"Generated journey for campaign: {campaign_id}, journey: {journey}"))
         
         # Phase 3: Objections Analysis
         objections = await claude_service.generate_objections_analysis(product_model, avatars, journey)
-        logger.debug("marketing.angles.objections.generated", f"Generated objections for campaign: {campaign_id}, objections: {objections}")
+        logger.debug("marketing.angles.objections.generated", Lazy(lambda: f"Generated objections for campaign: {campaign_id}, objections: {objections}"))
         
         # Phase 4: Angles Generation
         angles = await claude_service.generate_angles(product_model, avatars, journey, objections)
-        logger.debug("marketing.angles.angles.generated", f"Generated angles for campaign: {campaign_id}, angles: {angles}")
+        logger.debug("marketing.angles.angles.generated", Lazy(lambda: f"Generated angles for campaign: {campaign_id}, angles: {angles}"))
         
         # Save to database (ensure all are dicts for consistency)
         analysis_data = {
@@ -804,7 +807,7 @@ async def create_marketing_research_v3(
         }
         
         success = await v3_db_service.save_marketing_analysis(campaign_id, analysis_data)
-        logger.debug("marketing.angles.analysis.saved", f"Saved marketing analysis for campaign: {campaign_id}, analysis_data: {analysis_data}, success: {success}")
+        logger.debug("marketing.angles.analysis.saved", Lazy(lambda: f"Saved marketing analysis for campaign: {campaign_id}, analysis_data: {analysis_data}, success: {success}"))
         
         # Return in the format MarketingAngles.tsx expects
         # Convert angles from Pydantic model to dict format
@@ -842,7 +845,7 @@ async def get_campaign_product_info(
             raise HTTPException(status_code=404, detail="Campaign not found")
         
         # Get campaign content
-        content = await v3_db_service.get_campaign_content(campaign_id)
+        content = await v3_db_service.get_campaign_content(campaign_id, fields=["product_data"])
         logger.debug("campaign.product_info.retrieved", f"Retrieved content for campaign: {campaign_id}, content: {content}")
         
         if not content or not content.get("product_data"):
@@ -895,7 +898,7 @@ async def get_campaign_marketing_analysis(
             raise HTTPException(status_code=404, detail="Campaign not found")
         
         # Get campaign content
-        content = await v3_db_service.get_campaign_content(campaign_id)
+        content = await v3_db_service.get_campaign_content(campaign_id, fields=["avatar_analysis", "journey_mapping", "objections_analysis", "angles", "selected_angles"])
         logger.debug("campaign.marketing.retrieved", f"Retrieved marketing content for campaign: {campaign_id}, content: {content}")
         
         if not content:
@@ -975,6 +978,60 @@ async def save_selected_hooks(
         logger.error("selected_hooks.save.error", f"Error saving selected hooks: {e}", error=str(e))
         raise HTTPException(status_code=500, detail=str(e))
 
+# ==================== Patch Selections ====================
+
+class SelectionPatchRequest(BaseModel):
+    add: List[Any] = []
+    remove: List[Any] = []
+    set: List[Dict[str, Any]] = []
+    key: str = "id"
+
+@router.patch("/campaign/{campaign_id}/selections/{kind}")
+async def patch_selections(
+    campaign_id: str,
+    kind: str,
+    request: SelectionPatchRequest,
+    current_user: dict = Depends(verify_token)
+):
+    """
+    Apply a delta to the selected angles, hooks or scripts, e.g.
+    {"add": [{"id": "h3", ...}], "remove": ["h1"], "set": [{"id": "h2", "selected": false}]}
+    """
+    field = f"selected_{kind}"
+    if field not in ("selected_angles", "selected_hooks", "selected_scripts"):
+        raise HTTPException(status_code=404, detail=f"Unknown selection: {kind}")
+
+    try:
+        user_id = current_user.get("user_id")
+
+        # Get campaign to verify ownership
+        if current_user.get("dev_mode"):
+            campaign = await v3_db_service.get_campaign(campaign_id)
+        else:
+            campaign = await v3_db_service.get_campaign(campaign_id, user_id)
+
+        if not campaign:
+            raise HTTPException(status_code=404, detail="Campaign not found")
+
+        count = await v3_db_service.patch_selection(
+            campaign_id, field,
+            add=request.add, remove=request.remove, set_items=request.set, key=request.key
+        )
+        if count is None:
+            raise HTTPException(status_code=404, detail="Campaign content not found")
+
+        logger.debug("selections.patched", f"Patched {field} for campaign: {campaign_id}, count: {count}",
+                     campaign_id=campaign_id, field=field, added=len(request.add), removed=len(request.remove),
+                     updated=len(request.set), count=count)
+
+        return {"status": "success", "campaign_id": campaign_id, "field": field, "count": count}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("selections.patch.error", f"Error patching selections: {e}", error=str(e))
+        raise HTTPException(status_code=500, detail=str(e))
+
 # ==================== Get Saved Hooks ====================
 
 @router.get("/campaign/{campaign_id}/hooks")
@@ -996,7 +1053,7 @@ async def get_campaign_hooks(
             raise HTTPException(status_code=404, detail="Campaign not found")
         
         # Get campaign content
-        content = await v3_db_service.get_campaign_content(campaign_id)
+        content = await v3_db_service.get_campaign_content(campaign_id, fields=["hooks", "selected_hooks"])
         logger.debug("campaign.hooks.content.retrieved", f"Retrieved content for hooks: campaign_id: {campaign_id}, content: {content}")
         
         if not content:
@@ -1085,7 +1142,7 @@ async def create_hooks_v3(
         logger.info("hooks.generation.start", f"Generating hooks for {len(selected_angles)} angles")
         
         # Get product info and marketing analysis from database
-        content = await v3_db_service.get_campaign_content(campaign_id)
+        content = await v3_db_service.get_campaign_content(campaign_id, fields=["product_data", "avatar_analysis", "journey_mapping", "objections_analysis"])
         logger.debug("hooks.generation.content.retrieved", f"Retrieved content for hooks generation: campaign_id: {campaign_id}, content_keys: {content.keys() if content else None}")
         
         if not content:
@@ -1236,7 +1293,7 @@ async def create_scripts_v3(
         logger.info("scripts.generation.start", f"Generating scripts for {len(selected_hooks)} hooks")
         
         # Get product info from database
-        content = await v3_db_service.get_campaign_content(campaign_id)
+        content = await v3_db_service.get_campaign_content(campaign_id, fields=["product_data"])
         if not content or not content.get("product_data"):
             raise HTTPException(status_code=404, detail="Product information not found for campaign")
         
@@ -1343,7 +1400,7 @@ async def get_campaign_scripts(
             raise HTTPException(status_code=404, detail="Campaign not found")
         
         # Get campaign content
-        content = await v3_db_service.get_campaign_content(campaign_id)
+        content = await v3_db_service.get_campaign_content(campaign_id, fields=["scripts", "selected_scripts"])
         logger.debug("campaign.scripts.retrieved", f"Retrieved scripts content for campaign: {campaign_id}, has_content: {bool(content)}")
         
         if not content or not content.get("scripts"):
@@ -1372,6 +1429,115 @@ async def get_campaign_scripts(
         logger.error("campaign.scripts.get.error", f"Error getting scripts: {e}", error=str(e))
         raise HTTPException(status_code=500, detail=str(e))
 
+# ==================== Hook & Script Items ====================
+
+@router.get("/campaign/{campaign_id}/scripts/{script_id}")
+async def get_campaign_script(
+    campaign_id: str,
+    script_id: str,
+    current_user: dict = Depends(verify_token)
+):
+    """Get a single script without loading the whole scripts document"""
+    try:
+        user_id = current_user.get("user_id")
+
+        # Get campaign to verify ownership
+        if current_user.get("dev_mode"):
+            campaign = await v3_db_service.get_campaign(campaign_id)
+        else:
+            campaign = await v3_db_service.get_campaign(campaign_id, user_id)
+
+        if not campaign:
+            raise HTTPException(status_code=404, detail="Campaign not found")
+
+        scripts = await v3_db_service.get_script_items(campaign_id, [script_id])
+        if not scripts:
+            raise HTTPException(status_code=404, detail=f"Script not found: {script_id}")
+
+        return {"campaign_id": campaign_id, "script": scripts[0]}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("campaign.script.get.error", f"Error getting script: {e}", error=str(e))
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.patch("/campaign/{campaign_id}/scripts/{script_id}")
+async def update_campaign_script(
+    campaign_id: str,
+    script_id: str,
+    updates: Dict[str, Any],
+    current_user: dict = Depends(verify_token)
+):
+    """Edit fields of a single script (e.g. content, cta) without rewriting the others"""
+    if not updates:
+        raise HTTPException(status_code=400, detail="No fields to update")
+
+    try:
+        user_id = current_user.get("user_id")
+
+        # Get campaign to verify ownership
+        if current_user.get("dev_mode"):
+            campaign = await v3_db_service.get_campaign(campaign_id)
+        else:
+            campaign = await v3_db_service.get_campaign(campaign_id, user_id)
+
+        if not campaign:
+            raise HTTPException(status_code=404, detail="Campaign not found")
+
+        script = await v3_db_service.update_script_item(campaign_id, script_id, updates)
+        if script is None:
+            raise HTTPException(status_code=404, detail=f"Script not found: {script_id}")
+
+        logger.debug("campaign.script.updated", f"Updated script {script_id} for campaign: {campaign_id}",
+                     campaign_id=campaign_id, script_id=script_id, fields=list(updates.keys()))
+
+        return {"status": "success", "campaign_id": campaign_id, "script": script}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("campaign.script.update.error", f"Error updating script: {e}", error=str(e))
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.patch("/campaign/{campaign_id}/hooks/{hook_id}")
+async def update_campaign_hook(
+    campaign_id: str,
+    hook_id: str,
+    updates: Dict[str, Any],
+    current_user: dict = Depends(verify_token)
+):
+    """Edit fields of a single hook (e.g. hook_text) without rewriting the others"""
+    if not updates:
+        raise HTTPException(status_code=400, detail="No fields to update")
+
+    try:
+        user_id = current_user.get("user_id")
+
+        # Get campaign to verify ownership
+        if current_user.get("dev_mode"):
+            campaign = await v3_db_service.get_campaign(campaign_id)
+        else:
+            campaign = await v3_db_service.get_campaign(campaign_id, user_id)
+
+        if not campaign:
+            raise HTTPException(status_code=404, detail="Campaign not found")
+
+        hook = await v3_db_service.update_hook_item(campaign_id, hook_id, updates)
+        if hook is None:
+            raise HTTPException(status_code=404, detail=f"Hook not found: {hook_id}")
+
+        logger.debug("campaign.hook.updated", f"Updated hook {hook_id} for campaign: {campaign_id}",
+                     campaign_id=campaign_id, hook_id=hook_id, fields=list(updates.keys()))
+
+        return {"status": "success", "campaign_id": campaign_id, "hook": hook}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("campaign.hook.update.error", f"Error updating hook: {e}", error=str(e))
+        raise HTTPException(status_code=500, detail=str(e))
+
 # ==================== Save Selected Scripts ====================
 
 @router.post("/campaign/{campaign_id}/selected-scripts")
@@ -1513,37 +1679,16 @@ async def save_selected_voice_actor_v3(
         if not voice_info:
             raise HTTPException(status_code=400, detail="voice_info is required")
         
-        # Update the campaign content with voice/actor selection
-        # Use supabase directly to update the campaign content table
-        from auth import supabase
-        
+        # Merge into the existing audio_data (read through the service: it may be stored offloaded)
         try:
-            # First check if campaign exists
-            result = supabase.table('video_ads_v3_campaign_content').select('*').eq('campaign_id', campaign_id).execute()
+            content = await v3_db_service.get_campaign_content(campaign_id, fields=["audio_data"])
+            audio_data = (content or {}).get("audio_data") or {}
+            audio_data["voice_info"] = voice_info
             
-            if result.data:
-                # Update existing record - merge with existing audio_data
-                existing_audio_data = result.data[0].get('audio_data', {}) or {}
-                existing_audio_data['voice_info'] = voice_info
-                
-                update_result = supabase.table('video_ads_v3_campaign_content').update({
-                    'audio_data': existing_audio_data,
-                    'updated_at': 'now()'
-                }).eq('campaign_id', campaign_id).execute()
-                
-                if not update_result.data:
-                    raise HTTPException(status_code=500, detail="Failed to update voice/actor selection")
-            else:
-                # Create new record
-                insert_result = supabase.table('video_ads_v3_campaign_content').insert({
-                    'campaign_id': campaign_id,
-                    'audio_data': {'voice_info': voice_info},
-                    'created_at': 'now()',
-                    'updated_at': 'now()'
-                }).execute()
-                
-                if not insert_result.data:
-                    raise HTTPException(status_code=500, detail="Failed to save voice/actor selection")
+            if not await v3_db_service.update_campaign_content(campaign_id, {"audio_data": audio_data}):
+                raise HTTPException(status_code=500, detail="Failed to save voice/actor selection")
+        except HTTPException:
+            raise
         except Exception as db_error:
             logger.error("voice_actor.save.db_error", f"Database error: {db_error}")
             raise HTTPException(status_code=500, detail=f"Database error: {str(db_error)}")
@@ -1756,7 +1901,7 @@ async def get_campaign_audio(
             raise HTTPException(status_code=404, detail="Campaign not found")
         
         # Get campaign content
-        content = await v3_db_service.get_campaign_content(campaign_id)
+        content = await v3_db_service.get_campaign_content(campaign_id, fields=["audio_data"])
         
         if not content or not content.get("audio_data"):
             logger.debug("campaign.audio.empty", f"No audio data found for campaign: {campaign_id}")
@@ -1813,7 +1958,7 @@ async def generate_video_v3(request: Dict[str, Any], current_user: dict = Depend
             raise HTTPException(status_code=404, detail="Campaign not found")
         
         # Get campaign content (including audio data)
-        content = await v3_db_service.get_campaign_content(campaign_id)
+        content = await v3_db_service.get_campaign_content(campaign_id, fields=["audio_data"])
         if not content:
             raise HTTPException(status_code=404, detail="Campaign content not found")
         
@@ -2002,7 +2147,7 @@ async def get_campaign_video(campaign_id: str, current_user: dict = Depends(veri
             raise HTTPException(status_code=404, detail="Campaign not found")
         
         # Get campaign content
-        content = await v3_db_service.get_campaign_content(campaign_id)
+        content = await v3_db_service.get_campaign_content(campaign_id, fields=["video_data"])
         if not content:
             return {
                 "campaign_id": campaign_id,
@@ -2036,65 +2181,62 @@ async def get_campaign_video(campaign_id: str, current_user: dict = Depends(veri
 async def get_user_campaigns(
     limit: int = 50,
     offset: int = 0,
+    cursor: Optional[str] = None,
     current_user: dict = Depends(verify_token)
 ):
-    """Get list of user's campaigns with V3 structure"""
+    """Get list of user's campaigns with V3 structure (pass next_cursor back as cursor for the next page)"""
     try:
         user_id = current_user.get("user_id")
         
-        # Get campaigns from V3 database (optimized query)
-        campaigns = await v3_db_service.get_user_campaigns(user_id, limit)
+        # One query for campaigns, product info, selections and videos
+        try:
+            campaigns, next_cursor = await v3_db_service.list_campaign_summaries(user_id, limit, cursor=cursor, offset=offset)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         
-        # Batch fetch product info for all campaigns (single DB query instead of N queries)
-        campaign_ids = [c.get('campaign_id') for c in campaigns if c.get('campaign_id')]
-        product_info_map = await v3_db_service.get_campaigns_product_info_batch(campaign_ids) if campaign_ids else {}
-
-        # Fetch video data for completed campaigns
-        for campaign in campaigns:
-            logger.debug(f"Campaign {campaign.get('campaign_id')}: step={campaign.get('current_step')}, status={campaign.get('status')}")
-            if campaign.get('current_step') == 8 and campaign.get('status') == 'completed':
-                # Get videos for this campaign
-                videos = await v3_db_service.get_campaign_videos(campaign['campaign_id'])
-                logger.debug(f"Found {len(videos) if videos else 0} videos for campaign {campaign['campaign_id']}")
-                if videos:
-                    # Add the first video's URL to the campaign
-                    campaign['video_url'] = videos[0].get('video_url', '')
-                    campaign['video_data'] = {
-                        'video_url': videos[0].get('video_url', ''),
-                        'audio_url': videos[0].get('audio_url', ''),
-                        'generated_videos': videos
-                    }
-                    logger.info(f"Added video data to campaign {campaign['campaign_id']}: {campaign['video_url'][:50]}...")
-
-        # Ensure backward compatibility with frontend
         for campaign in campaigns:
+            campaign_id = campaign.get('campaign_id')
+            videos = campaign.pop('videos', None)
+            selections = {key: campaign.pop(key, None) for key in ('selected_hooks', 'selected_scripts', 'selected_angles')}
+            has_content = campaign.pop('has_content', False)
+            for key in ('angle_count', 'hook_count', 'script_count'):
+                campaign.pop(key, None)
+            
+            # Add video data for completed campaigns
+            if videos:
+                campaign['video_url'] = videos[0].get('video_url', '')
+                campaign['video_data'] = {
+                    'video_url': videos[0].get('video_url', ''),
+                    'audio_url': videos[0].get('audio_url', ''),
+                    'generated_videos': videos
+                }
+            
             # Add 'id' field for frontend compatibility (uses campaign_id as id)
-            campaign['id'] = campaign.get('campaign_id')
+            campaign['id'] = campaign_id
             
             # Ensure conversation_id is present for legacy support
             if 'conversation_id' not in campaign:
-                campaign['conversation_id'] = campaign.get('campaign_id', '')
+                campaign['conversation_id'] = campaign_id or ''
             
-            # Add product info from batch query
-            campaign_id = campaign.get('campaign_id')
-            if campaign_id and campaign_id in product_info_map:
-                campaign['product_data'] = product_info_map[campaign_id]
-
-            # Fetch selected hooks and scripts for video ads selection
-            if campaign.get('current_step') >= 4:  # Has hooks
-                content = await v3_db_service.get_campaign_content(campaign_id)
-                if content:
-                    campaign['selected_hooks'] = content.get('selected_hooks', [])
-                    campaign['selected_scripts'] = content.get('selected_scripts', [])
-                    campaign['selected_angles'] = content.get('selected_angles', [])
+            if campaign.get('product_data') is None:
+                campaign.pop('product_data', None)
+            
+            # Selected hooks and scripts for video ads selection
+            if (campaign.get('current_step') or 0) >= 4 and has_content:
+                campaign['selected_hooks'] = selections['selected_hooks'] or []
+                campaign['selected_scripts'] = selections['selected_scripts'] or []
+                campaign['selected_angles'] = selections['selected_angles'] or []
         
         return {
             "campaigns": campaigns,
             "total": len(campaigns),
             "limit": limit,
-            "offset": offset
+            "offset": offset,
+            "next_cursor": next_cursor
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error("campaigns.list.error", f"Error getting user campaigns: {e}", error=str(e))
         raise HTTPException(status_code=500, detail="Failed to retrieve campaigns")
@@ -2110,60 +2252,11 @@ async def fork_campaign(
     try:
         user_id = current_user.get("user_id")
         
-        # Get source campaign
-        source_campaign = await v3_db_service.get_campaign(source_campaign_id, user_id)
-        if not source_campaign:
+        # Campaign and content are copied atomically by the database
+        new_campaign_id = await v3_db_service.fork_campaign(source_campaign_id, user_id, fork_from_step, campaign_name)
+        if not new_campaign_id:
             raise HTTPException(status_code=404, detail="Source campaign not found")
         
-        # Get source campaign content
-        source_content = await v3_db_service.get_campaign_content(source_campaign_id)
-        if not source_content:
-            raise HTTPException(status_code=404, detail="Source campaign content not found")
-        
-        # Create new campaign
-        new_campaign_id = str(uuid.uuid4())
-        new_campaign = await v3_db_service.create_campaign(
-            user_id=user_id,
-            campaign_id=new_campaign_id,
-            campaign_name=campaign_name
-        )
-        
-        if not new_campaign:
-            raise HTTPException(status_code=500, detail="Failed to create new campaign")
-        
-        # Copy content up to fork_from_step
-        content_to_copy = {}
-        
-        # Map steps to content fields
-        step_content_map = {
-            0: [],  # Start
-            1: ['product_info'],  # Import URL
-            2: ['product_info'],  # Product Info
-            3: ['marketing_analysis'],  # Marketing Analysis
-            4: ['hooks'],  # Hooks
-            5: ['scripts'],  # Scripts
-            6: ['voice_data', 'actor_data'],  # Voice & Actor
-            7: ['audio_data'],  # Audio
-            8: ['video_data']  # Video
-        }
-        
-        # Copy content based on fork_from_step
-        for step in range(min(fork_from_step + 1, 9)):
-            for field in step_content_map.get(step, []):
-                if field in source_content:
-                    content_to_copy[field] = source_content[field]
-        
-        # Save copied content to new campaign
-        if content_to_copy:
-            # Create campaign content entry
-            await v3_db_service.save_campaign_content(new_campaign_id, content_to_copy)
-        
-        # Update campaign step
-        await v3_db_service.update_campaign(new_campaign_id, {
-            "current_step": fork_from_step,
-            "status": "in_progress"
-        })
-        
         return {
             "success": True,
             "new_campaign_id": new_campaign_id,
@@ -2200,7 +2293,7 @@ async def get_campaign_details(
             raise HTTPException(status_code=404, detail=f"Campaign not found: {campaign_id}")
         
         # Get campaign content which includes product info
-        content = await v3_db_service.get_campaign_content(campaign_id)
+        content = await v3_db_service.get_campaign_content(campaign_id, fields=["product_data"])
         
         # Build response with all available data
         response = {
@@ -2216,12 +2309,12 @@ async def get_campaign_details(
         if campaign.get("product_url"):
             response["product_url"] = campaign["product_url"]
         
-        # Add product info if available
-        if content and content.get("product_info"):
-            response["product_info"] = content["product_info"]
+        # Add product info if available (stored as product_data)
+        if content and content.get("product_data"):
+            response["product_info"] = content["product_data"]
             # Also check if URL is in product info
-            if not response.get("product_url") and content["product_info"].get("original_url"):
-                response["product_url"] = content["product_info"]["original_url"]
+            if not response.get("product_url") and content["product_data"].get("original_url"):
+                response["product_url"] = content["product_data"]["original_url"]
         
         return response
         
@@ -2250,13 +2343,9 @@ async def update_campaign_name(
         user_id = current_user["user_id"]
         
         # Update campaign name - v3_db_service uses campaign_id as primary key
-        # Note: v3_db_service.supabase is synchronous, not async
-        result = v3_db_service.supabase.table("video_ads_v3_campaigns").update({
-            "campaign_name": request.campaign_name,
-            "updated_at": datetime.now(timezone.utc).isoformat()
-        }).eq("campaign_id", campaign_id).eq("user_id", user_id).execute()
+        renamed = await v3_db_service.rename_campaign(campaign_id, user_id, request.campaign_name)
         
-        if not result.data:
+        if not renamed:
             raise HTTPException(status_code=404, detail=f"Campaign not found: {campaign_id}")
         
         return {
@@ -8,15 +8,16 @@ import uuid
 import aiohttp
 import openai
 from bs4 import BeautifulSoup
-from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
-from typing import Dict, Any
+from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, Response
+from typing import Dict, Any, Optional
 from dotenv import load_dotenv
 
 # Import auth and database
 from auth import verify_token
 from video_ads_v3_database_service import v3_db_service
 from claude_service import ClaudeService
-from logging_service import logger
+from logging_service import logger, Lazy
+from app_metrics import track_job
 # Facebook targeting mapper removed - stub function for compatibility
 def map_avatar_to_facebook_targeting(avatar_data: dict) -> dict:
     """Stub function - Facebook integration removed"""
@@ -120,7 +121,7 @@ async def parse_url_v4(
             )
 
             raw_info = json.loads(response.choices[0].message.content)
-            logger.debug("v4.parse_url.openai.response", f"OpenAI parsed info: {raw_info}")
+            logger.debug("v4.parse_url.openai.response", Lazy(lambda: f"OpenAI parsed info: {raw_info}"))
 
             # Handle additional_information which might be a dict or string
             additional_info = raw_info.get("additional_information", "")
@@ -248,6 +249,7 @@ def load_prompt_template(prompt_name: str) -> Dict[str, Any]:
         return {}
 
 
+@track_job("v4_marketing_research")
 async def process_marketing_research_background(campaign_id: str, product_info: Dict[str, Any]):
     """Background task to process marketing research and generate hooks/scripts using regular API calls"""
 
@@ -533,7 +535,7 @@ async def create_marketing_research_v4(
             raise HTTPException(status_code=404, detail="Campaign not found")
 
         # Get product info from database
-        content = await v3_db_service.get_campaign_content(campaign_id)
+        content = await v3_db_service.get_campaign_content(campaign_id, fields=["product_data"])
         if not content or not content.get("product_data"):
             raise HTTPException(status_code=400, detail="Product information not found for campaign")
 
@@ -567,52 +569,33 @@ async def create_marketing_research_v4(
 
 @router.get("/campaigns")
 async def get_campaigns_v4(
+    response: Response,
     status: str = None,
+    limit: int = 50,
+    cursor: Optional[str] = None,
     current_user: dict = Depends(verify_token)
 ):
-    """Get all V4 campaigns for the user, optionally filtered by status"""
+    """
+    Get V4 campaigns for the user, optionally filtered by status.
+    The next page's cursor is returned in the X-Next-Cursor header.
+    """
     try:
         user_id = current_user["user_id"]
-        campaigns = await v3_db_service.get_user_campaigns(user_id)
-
-        # Apply status filter if provided
-        if status:
-            campaigns = [c for c in campaigns if c.get("status") == status]
-
-        # Add counts for angles, hooks, scripts if available
-        for campaign in campaigns:
-            try:
-                content = await v3_db_service.get_campaign_content(campaign["campaign_id"])
-
-                # Count angles
-                campaign["angle_count"] = len(content.get("hooks", [])) if content.get("hooks") else 0
-
-                # Count hooks (flatten hooks_by_category)
-                campaign["hook_count"] = 0
-                if content.get("hooks"):
-                    for angle in content.get("hooks", []):
-                        if angle.get("hooks_by_category") and isinstance(angle.get("hooks_by_category"), dict):
-                            for category_hooks in angle["hooks_by_category"].values():
-                                if isinstance(category_hooks, list):
-                                    campaign["hook_count"] += len(category_hooks)
-
-                # Count scripts
-                campaign["script_count"] = 0
-                if content.get("scripts") and isinstance(content["scripts"], list) and len(content["scripts"]) > 0:
-                    scripts_data = content["scripts"][0]
-                    if scripts_data.get("angles"):
-                        for angle in scripts_data["angles"]:
-                            if angle.get("hooks"):
-                                for hook in angle["hooks"]:
-                                    campaign["script_count"] += len(hook.get("scripts", []))
-            except Exception as e:
-                logger.warning("v4.campaigns.counts.error", f"Error calculating counts for campaign {campaign.get('campaign_id')}: {e}")
-                # Set default counts if calculation fails
-                campaign["angle_count"] = 0
-                campaign["hook_count"] = 0
-                campaign["script_count"] = 0
+
+        # Angle/hook/script counts are computed in the same query as the listing
+        try:
+            campaigns, next_cursor = await v3_db_service.list_campaign_summaries(
+                user_id, limit, cursor=cursor, status=status, counts_only=True
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
 
         return campaigns
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error("v4.campaigns.list.error", f"Error listing V4 campaigns: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -680,7 +663,7 @@ async def get_campaign_targeting(
             raise HTTPException(status_code=404, detail="Campaign not found")
 
         # Get avatar analysis
-        content = await v3_db_service.get_campaign_content(campaign_id)
+        content = await v3_db_service.get_campaign_content(campaign_id, fields=["avatar_analysis"])
         avatar_data = content.get("avatar_analysis")
 
         if not avatar_data:
@@ -727,7 +710,7 @@ async def get_ai_targeting_recommendations(
             raise HTTPException(status_code=404, detail="Campaign not found")
 
         # Get campaign content
-        content = await v3_db_service.get_campaign_content(campaign_id)
+        content = await v3_db_service.get_campaign_content(campaign_id, fields=["avatar_analysis", "journey_mapping"])
         avatar_data = content.get("avatar_analysis")
         journey_data = content.get("journey_mapping")
 
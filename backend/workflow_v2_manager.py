@@ -11,13 +11,15 @@ from video_ads_v2_models import (
     WorkflowStateV2, AngleWithHooksV2, HooksByCategoryV2
 )
 from logging_service import logger
+from conversation_store import create_conversation_store
 
 class VideoAdsV2WorkflowManager:
     """Manages the complete V2 workflow using Claude"""
     
     def __init__(self):
         self.client = ClaudeV2Client()
-        self.active_conversations = {}  # In production, use Redis/DB
+        # TTL/size-bounded LRU, optionally backed by a store shared across workers
+        self.active_conversations = create_conversation_store(lambda: ClaudeV2Conversation(self.client))
         
     async def create_marketing_analysis(
         self, 
@@ -0,0 +1,121 @@
+"""
+Write-Behind Buffer for row updates
+Merges updates to the same row issued within a short window into a single UPDATE
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+from logging_service import logger
+
+
+class WriteBehindBuffer:
+    """
+    Per-key pending updates, flushed by a timer window_seconds after the first one
+    arrives, or immediately through flush(). Flushes of the same key are serialized
+    so a later UPDATE can never land before an earlier one.
+
+    When apply() raises, the updates are put back (under anything queued since) and
+    retried after retry_delay, doubling each time, up to max_retries times.
+    """
+
+    def __init__(
+        self,
+        apply: Callable[[Hashable, Dict[str, Any]], Awaitable[bool]],
+        window_seconds: float = 0.5,
+        max_retries: int = 3,
+        retry_delay: float = 1.0
+    ):
+        self.apply = apply
+        self.window_seconds = window_seconds
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self._pending: Dict[Hashable, Dict[str, Any]] = {}
+        self._timers: Dict[Hashable, asyncio.Task] = {}
+        self._locks: Dict[Hashable, list] = {}
+        self._attempts: Dict[Hashable, int] = {}
+        self.stats = {"submitted": 0, "merged": 0, "flushes": 0, "errors": 0, "retries": 0, "dropped": 0}
+
+    async def submit(self, key: Hashable, updates: Dict[str, Any], flush: bool = False) -> bool:
+        """
+        Queue updates for key. With flush=True (or when buffering is disabled) the merged
+        updates are written now and the write result is returned; otherwise returns True.
+        """
+        self.stats["submitted"] += 1
+        pending = self._pending.setdefault(key, {})
+        if pending:
+            self.stats["merged"] += 1
+        pending.update(updates)
+
+        if flush or self.window_seconds <= 0:
+            return await self.flush(key)
+
+        if key not in self._timers:
+            self._timers[key] = asyncio.create_task(self._flush_later(key))
+        return True
+
+    def pending(self, key: Hashable) -> Optional[Dict[str, Any]]:
+        """Updates queued for key and not written yet (for read-your-writes overlays)"""
+        pending = self._pending.get(key)
+        return dict(pending) if pending else None
+
+    def backlog(self) -> int:
+        """Keys with updates not written yet"""
+        return len(self._pending)
+
+    async def flush(self, key: Hashable) -> bool:
+        """Write whatever is queued for key now"""
+        timer = self._timers.pop(key, None)
+        if timer is not None and timer is not asyncio.current_task():
+            timer.cancel()
+
+        # [lock, number of flushes using it]; dropped once nobody holds or waits for it
+        entry = self._locks.setdefault(key, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                updates = self._pending.pop(key, None)
+                if not updates:
+                    return True
+                self.stats["flushes"] += 1
+                try:
+                    result = await self.apply(key, updates)
+                except Exception as e:
+                    self.stats["errors"] += 1
+                    self._retry_later(key, updates, e)
+                    return False
+                self._attempts.pop(key, None)
+                return result
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                self._locks.pop(key, None)
+
+    async def flush_all(self):
+        """Write everything queued (called on shutdown)"""
+        for key in list(self._pending):
+            await self.flush(key)
+
+    def _retry_later(self, key: Hashable, updates: Dict[str, Any], error: Exception):
+        attempt = self._attempts.get(key, 0) + 1
+        if attempt > self.max_retries:
+            self._attempts.pop(key, None)
+            self.stats["dropped"] += 1
+            logger.error("write_buffer.flush_failed", f"Dropped buffered update for {key} after {self.max_retries} retries: {error}",
+                         key=str(key), error=str(error))
+            return
+
+        # Updates queued while this one was in flight are newer and win
+        self._pending[key] = {**updates, **self._pending.get(key, {})}
+        self._attempts[key] = attempt
+        self.stats["retries"] += 1
+        delay = self.retry_delay * 2 ** (attempt - 1)
+        logger.warning("write_buffer.flush_retry", f"Failed to flush buffered update for {key}, retrying in {delay:.1f}s: {error}",
+                       key=str(key), attempt=attempt, error=str(error))
+        if key not in self._timers:
+            self._timers[key] = asyncio.create_task(self._flush_later(key, delay))
+
+    async def _flush_later(self, key: Hashable, delay: float = None):
+        await asyncio.sleep(self.window_seconds if delay is None else delay)
+        if self._timers.get(key) is asyncio.current_task():
+            self._timers.pop(key, None)
+        await self.flush(key)